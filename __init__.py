@@ -1,16 +1,112 @@
-from .main import showModules
+'''
+Custom Python Modules for Physics 411.
 
-from .myData import readCoastLine, readMinuteData, readHourData, getStationInfo, removeStation, getBasicStats
-from .myData import function_list
+Submodules and their functions are only imported the first time they are used,
+so `import myPyPackages` does not load matplotlib, scipy or pandas.
+'''
 
-from .myDates import DateStrtoNum, DateNumtoStr, getRange
-from .myDates import function_list
+from importlib import import_module
 
-from .mySignal import localInterp, globalInterp, GetNS_NFFT, PowerSpectrumFFT, CI_psd, myWelch
-from .mySignal import function_list
+# Submodules of the package.
+_submodules = ['main', 'myData', 'myDates', 'mySignal', 'myStats', 'myPlots', 'myBench']
 
-from .myStats import StudentConfidenceInterval, CI_psd, UniformRandom
-from .myStats import function_list
+# Functions available from the top level and the submodule they come from.
+_attributes = {
+    'showModules': 'main',
 
-from .myPlots import plotLocalHeatMap, plotGlobalHeatMap
-from .myPlots import function_list
\ No newline at end of file
+    'setDataRoot': 'myData',
+    'getDataRoot': 'myData',
+    'getCatalog': 'myData',
+    'findDataset': 'myData',
+    'readCoastLine': 'myData',
+    'readMinuteData': 'myData',
+    'readHourData': 'myData',
+    'readStations': 'myData',
+    'getStationInfo': 'myData',
+    'removeStation': 'myData',
+    'getBasicStats': 'myData',
+    'computeBasicStats': 'myData',
+    'StationPanel': 'myData',
+    'readPanel': 'myData',
+    'readMinuteChunks': 'myData',
+    'StationIndex': 'myData',
+    'getStationIndex': 'myData',
+    'landMask': 'myData',
+    'elevationGrid': 'myData',
+
+    'DateStrtoNum': 'myDates',
+    'DateNumtoStr': 'myDates',
+    'getRange': 'myDates',
+    'resample': 'myDates',
+    'resampleChunks': 'myDates',
+    'cycleIndex': 'myDates',
+
+    'localInterp': 'mySignal',
+    'globalInterp': 'mySignal',
+    'GetNS_NFFT': 'mySignal',
+    'PowerSpectrumFFT': 'mySignal',
+    'myWelch': 'mySignal',
+    'EOF': 'mySignal',
+    'chunkedEOF': 'mySignal',
+    'projectEOF': 'mySignal',
+    'crossValidate': 'mySignal',
+    'fitLapseRate': 'mySignal',
+    'toSeaLevel': 'mySignal',
+    'fromSeaLevel': 'mySignal',
+    'KernelInterpolator': 'mySignal',
+    'kernelInterp': 'mySignal',
+    'designFilter': 'mySignal',
+    'filterBank': 'mySignal',
+    'filterChunks': 'mySignal',
+    'harmonicDesign': 'mySignal',
+    'harmonicFit': 'mySignal',
+    'harmonicFitChunks': 'mySignal',
+    'dpssTapers': 'mySignal',
+    'multitaper': 'mySignal',
+    'bandAverage': 'mySignal',
+    'waveletScales': 'mySignal',
+    'cwt': 'mySignal',
+    'cwtChunks': 'mySignal',
+
+    'StudentConfidenceInterval': 'myStats',
+    'CI_psd': 'myStats',
+    'UniformRandom': 'myStats',
+    'blockBootstrap': 'myStats',
+    'phaseRandomise': 'myStats',
+    'surrogateTest': 'myStats',
+    'climatology': 'myStats',
+    'anomalies': 'myStats',
+    'rolling': 'myStats',
+    'rollingChunks': 'myStats',
+    'autocorrelation': 'myStats',
+    'effectiveSampleSize': 'myStats',
+    'integralTimeScale': 'myStats',
+
+    'plotLocalHeatMap': 'myPlots',
+    'plotGlobalHeatMap': 'myPlots',
+
+    'makeSyntheticData': 'myBench',
+    'runBenchmarks': 'myBench',
+    'compareBenchmarks': 'myBench',
+
+    'function_list': 'myPlots',
+}
+
+
+def __getattr__(name):
+    '''
+    Function to import a submodule or function the first time it is accessed.
+    '''
+    if name in _submodules:
+        value = import_module('.' + name, __name__)
+    elif name in _attributes:
+        value = getattr(import_module('.' + _attributes[name], __name__), name)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    globals()[name] = value # only import once.
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules) | set(_attributes))
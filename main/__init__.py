@@ -1 +1,2 @@
-from .functions import showModules
\ No newline at end of file
+from .functions import showModules
+from . import instrument
\ No newline at end of file
@@ -0,0 +1,330 @@
+'''
+Command line batch runner for the station analysis pipeline.
+
+Runs the read -> range -> stats -> PSD -> heatmap stages for a set of stations
+and date windows without a notebook. Stations are processed in parallel and
+stages whose outputs are newer than their inputs are skipped.
+
+Example:
+    python -m myPyPackages.main.batch --stations UVicSci Monterey Craigflower ShawniganLake Cumberland \
+        --window summer "01/06/2017" "30/09/2017, 23:59" \
+        --window winter "01/11/2017" "28/02/2018, 23:59" \
+        --out results/
+
+Outputs (in --out):
+    <station>/<window>_stats.json: basic stats of temperature and pressure.
+    <station>/<window>_psd.npz: Welch PSD of temperature and pressure.
+    <station>/<window>_psd.jpeg: plot of the PSDs.
+    heatmaps/<window>_<variable>.jpeg: heat map of the window means.
+    profile.txt, profile.json, trace.json: timings of every stage (with --profile).
+'''
+
+import os
+import json
+import warnings
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .. import myData, myDates, mySignal
+from . import instrument
+from .instrument import stage
+
+# Sampling frequency in cycles per day for each resolution.
+SAMPLE_FREQ = {'min': 24*60, 'hr': 24}
+
+VARIABLES = ['temperature', 'pressure']
+
+
+def _upToDate(outputs, inputs):
+    '''
+    Function to check if all outputs exist and are newer than all inputs.
+    '''
+    if not all(os.path.exists(f) for f in outputs):
+        return False
+    newest_input = max((os.path.getmtime(f) for f in inputs if os.path.exists(f)), default=0)
+    return min(os.path.getmtime(f) for f in outputs) >= newest_input
+
+
+def _inputFiles(station, resolution):
+    '''
+    Function to get the data files a station is read from.
+    '''
+    if resolution == 'min':
+        return [myData.findDataset('min', station=station)['path']]
+    return [myData.findDataset('hr', variable=var)['path'] for var in VARIABLES]
+
+
+def _readStation(station, resolution):
+    '''
+    Function to read a station's data for the given resolution.
+    '''
+    if resolution == 'min':
+        return myData.readMinuteData(station)
+    names = list(myData.getStationInfo().station)
+    return myData.readHourData(names.index(station))
+
+
+def _plotPSD(psd, title, filepath):
+    '''
+    Function to plot the temperature and pressure PSDs of a window and save it.
+    Uses a matplotlib Figure directly (not pyplot), so it draws the same without
+    a display and doesn't touch the caller's backend or figures.
+    '''
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(14, 5))
+    axes = fig.subplots(1, 2)
+    fig.suptitle(title, fontsize=16)
+    units = {'temperature': '$^\\circ C^2/cpd$', 'pressure': '$hPa^2/cpd$'}
+    for axs, var in zip(axes, VARIABLES):
+        axs.loglog(psd['freqs'], psd[var])
+        axs.set_title(var.capitalize(), fontsize=14)
+        axs.set_xlabel('Frequency [$cpd$]', fontsize=12)
+        axs.set_ylabel('PSD [{}]'.format(units[var]), fontsize=12)
+        axs.grid()
+    with stage('savefig'):
+        fig.savefig(filepath)
+
+
+def _windowBound(bound, times, i):
+    '''
+    Function to get a JSON safe window bound, the first/last time in the window (or None)
+    for an open (infinite) bound, as json.dump would write -Infinity/Infinity.
+    '''
+    if np.isfinite(bound):
+        return float(bound)
+    return float(times[i]) if len(times) else None
+
+
+def runStation(station, windows, resolution='min', outdir='results', force=False):
+    '''
+    Function to run the read, range, stats and PSD stages for one station.
+
+    Parameters:
+        station (str): name of station.
+        windows (dict): {window name: (start, end)} as date numbers. See myDates.DateStrtoNum().
+        resolution (str): 'min' or 'hr' data. (default 'min')
+        outdir (str): directory to write results to. (default 'results')
+        force (bool): rerun stages even if their outputs are up to date. (default False)
+
+    Returns:
+        list of output files that were written.
+    '''
+    folder = os.path.join(outdir, station)
+    os.makedirs(folder, exist_ok=True)
+    inputs = _inputFiles(station, resolution)
+
+    # each stage is checked on its own outputs, so e.g. a missing figure is redrawn
+    # from the saved PSD without reading the data again.
+    todo = {}
+    for name, (start, end) in windows.items():
+        stats_file, psd_file, fig_file = [os.path.join(folder, name + ext) for ext in ['_stats.json', '_psd.npz', '_psd.jpeg']]
+        stats = force or not _upToDate([stats_file], inputs)
+        psd = force or not _upToDate([psd_file], inputs)
+        fig = psd or not _upToDate([fig_file], [psd_file])
+        if stats or psd or fig:
+            todo[name] = (start, end, stats, psd, fig, (stats_file, psd_file, fig_file))
+    if not todo:
+        return []
+
+    data = None
+    if any(stats or psd for _, _, stats, psd, _, _ in todo.values()):
+        with stage('read'):
+            data = _readStation(station, resolution)
+
+    written = []
+    for name, (start, end, do_stats, do_psd, do_fig, outputs) in todo.items():
+        stats_file, psd_file, fig_file = outputs
+        if do_stats or do_psd:
+            with stage('range'):
+                window = myDates.getRange(data, start, end)
+
+        if do_stats:
+            with stage('stats'):
+                stats = myData.computeBasicStats(window)
+                times = window.times.values
+                stats.update({'station': station, 'window': name,
+                              'start': _windowBound(start, times, 0), 'end': _windowBound(end, times, -1)})
+                with open(stats_file, 'w') as f:
+                    json.dump(stats, f, indent=2)
+            written.append(stats_file)
+
+        if do_psd:
+            with stage('psd'):
+                psd = {}
+                for var in VARIABLES:
+                    values = window[var].interpolate(limit_direction='both').values
+                    psd['freqs'], psd[var] = mySignal.myWelch(values, fs=SAMPLE_FREQ[resolution], noverlap='50%')
+                np.savez(psd_file, **psd)
+            written.append(psd_file)
+        elif do_fig:
+            with np.load(psd_file) as f:
+                psd = dict(f)
+
+        if do_fig:
+            _plotPSD(psd, '{}: {} PSD'.format(station, name), fig_file)
+            written.append(fig_file)
+    return written
+
+
+def runHeatmaps(stations, windows, outdir='results', grid=(100, 100), force=False):
+    '''
+    Function to run the heatmap stage from the window means in the stats outputs.
+
+    Parameters:
+        stations (list): names of stations.
+        windows (dict): {window name: (start, end)}.
+        outdir (str): directory with the station results. (default 'results')
+        grid (tuple): grid cells (x, y)-axis. (default (100, 100))
+        force (bool): rerun even if the heatmaps are up to date. (default False)
+
+    Returns:
+        list of output files that were written.
+    '''
+    import matplotlib.pyplot as plt
+    from .. import myPlots
+
+    folder = os.path.join(outdir, 'heatmaps')
+    os.makedirs(folder, exist_ok=True)
+
+    info = myData.getStationInfo()
+    locs = info.set_index('station').loc[stations].reset_index()
+
+    written = []
+    for name in windows:
+        inputs = [os.path.join(outdir, s, name + '_stats.json') for s in stations]
+        for var in VARIABLES:
+            outfile = os.path.join(folder, '{}_{}.jpeg'.format(name, var))
+            if not force and _upToDate([outfile], inputs):
+                continue
+
+            means = []
+            for f in inputs:
+                with open(f) as fp:
+                    means.append(json.load(fp)[var]['mean'])
+
+            with stage('heatmap'):
+                fig = plt.figure(figsize=(10, 8))
+                stuff = mySignal.localInterp(np.array(means), locs, grid)
+                myPlots.plotLocalHeatMap(stuff, title='{} mean {}'.format(name, var))
+                with stage('savefig'):
+                    fig.savefig(outfile)
+                plt.close(fig)
+            written.append(outfile)
+    return written
+
+
+def _runStationJob(args):
+    '''
+    Function to unpack the arguments of runStation in the process pool.
+    '''
+    data_root, profile, args = args[0], args[1], args[2:]
+    myData.setDataRoot(data_root)
+    if profile:
+        instrument.reset() # forked workers start with the parent's records.
+        instrument.instrumentAll()
+        instrument.enable(memory=True)
+    return runStation(*args), instrument.getRecords()
+
+
+def runBatch(stations, windows, resolution='min', outdir='results', workers=None,
+             heatmaps=True, grid=(100, 100), force=False, profile=False):
+    '''
+    Function to run the whole pipeline for a set of stations and date windows.
+
+    Parameters:
+        stations (list): names of stations.
+        windows (dict): {window name: (start, end)} as date numbers.
+        resolution (str): 'min' or 'hr' data. (default 'min')
+        outdir (str): directory to write results to. (default 'results')
+        workers (int): number of stations to run in parallel. (default number of cpus)
+        heatmaps (bool): run the heatmap stage, needs at least 3 stations (a warning is given
+                         otherwise). (default True)
+        grid (tuple): grid cells for the heat maps. (default (100, 100))
+        force (bool): rerun stages even if their outputs are up to date. (default False)
+        profile (bool): record timings and memory of every stage, see main.instrument. (default False)
+
+    Returns:
+        list of output files that were written.
+    '''
+    if profile:
+        instrument.instrumentAll()
+        instrument.enable(memory=True)
+
+    try:
+        myData.getCatalog() # building the catalog once before starting the workers.
+        jobs = [(myData.getDataRoot(), profile, s, windows, resolution, outdir, force) for s in stations]
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        written = []
+        if workers == 1:
+            for job in jobs:
+                written += runStation(*job[2:])
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                for out, records in pool.map(_runStationJob, jobs):
+                    written += out
+                    if profile:
+                        instrument.mergeRecords(records)
+
+        if heatmaps and len(stations) >= 3:
+            written += runHeatmaps(stations, windows, outdir, grid, force)
+        elif heatmaps:
+            warnings.warn("skipping the heatmap stage, it needs at least 3 stations (got {}).".format(len(stations)))
+    finally:
+        if profile: # the records are kept for the report.
+            instrument.disable()
+            instrument.restore()
+    return written
+
+
+def main(argv=None):
+    '''
+    Function for the command line interface.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+
+    parser = argparse.ArgumentParser(description='Batch runner for the station analysis pipeline.')
+    parser.add_argument('--stations', nargs='+', required=True, help='names of stations.')
+    parser.add_argument('--window', nargs=3, action='append', metavar=('NAME', 'START', 'END'),
+                        help="date window, e.g. summer '01/06/2017' '30/09/2017, 23:59'. "
+                             "Can be given more than once. (default whole record)")
+    parser.add_argument('--resolution', choices=['min', 'hr'], default='min', help='data resolution.')
+    parser.add_argument('--out', default='results', help='directory to write results and figures to.')
+    parser.add_argument('--data-root', default=None, help='directory of the data files. (default myData.getDataRoot())')
+    parser.add_argument('--workers', type=int, default=None, help='number of stations to run in parallel.')
+    parser.add_argument('--grid', type=int, nargs=2, default=[100, 100], help='heat map grid cells (x, y).')
+    parser.add_argument('--no-heatmaps', action='store_true', help='skip the heatmap stage.')
+    parser.add_argument('--force', action='store_true', help='rerun stages that are up to date.')
+    parser.add_argument('--profile', action='store_true',
+                        help='save a per-stage timing report (profile.txt, profile.json) and a Chrome trace (trace.json) in --out.')
+    args = parser.parse_args(argv)
+
+    if args.data_root:
+        myData.setDataRoot(args.data_root)
+
+    if args.window:
+        windows = {name: (myDates.DateStrtoNum(start, args.resolution), myDates.DateStrtoNum(end, args.resolution))
+                   for name, start, end in args.window}
+    else:
+        windows = {'all': (-np.inf, np.inf)}
+
+    written = runBatch(args.stations, windows, args.resolution, args.out, args.workers,
+                       not args.no_heatmaps, tuple(args.grid), args.force, args.profile)
+
+    if args.profile:
+        with open(os.path.join(args.out, 'profile.txt'), 'w') as f:
+            f.write(instrument.report() + '\n')
+        instrument.dumpReport(os.path.join(args.out, 'profile.json'))
+        instrument.dumpChromeTrace(os.path.join(args.out, 'trace.json'))
+        print(instrument.report())
+
+    print("Wrote {} files to {}".format(len(written), args.out))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+'''
+Opt-in timing and memory instrumentation for the package functions.
+
+Records call counts, wall time, cpu time and peak allocations for every
+instrumented function or stage. When instrumentation is turned off the
+wrappers only check one flag, so the overhead is negligible.
+
+Example:
+    from myPyPackages.main import instrument
+    instrument.instrumentAll()          # wrap the function_list of every module.
+    instrument.enable(memory=True)
+
+    with instrument.stage('savefig'):
+        plt.savefig(...)
+
+    print(instrument.report())
+    instrument.dumpChromeTrace('trace.json')  # open in chrome://tracing or Perfetto.
+    instrument.disable(); instrument.restore()  # back to the plain functions.
+'''
+
+import os
+import sys
+import json
+import time
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+_enabled = False
+_memory = False
+_started_tracing = False # if enable() started tracemalloc, so disable() only stops its own tracing.
+
+_records = {}   # {name: {'calls', 'wall', 'cpu', 'peak'}}
+_events = []    # chrome trace events.
+_stack = threading.local()
+_patched = []   # (namespace, name, original) of every rebinding done by instrument().
+
+_PACKAGE = __name__.rsplit('.', 2)[0]
+_MODULES = ['myData', 'myDates', 'mySignal', 'myStats', 'myPlots']
+
+
+def enable(memory=False):
+    '''
+    Function to turn instrumentation on.
+
+    Parameters:
+        memory (bool): also record peak allocations with tracemalloc (slower). (default False)
+    '''
+    global _enabled, _memory, _started_tracing
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+
+
+def disable():
+    '''
+    Function to turn instrumentation off.
+    '''
+    global _enabled, _started_tracing
+    _enabled = False
+    if _started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracing = False
+
+
+def reset():
+    '''
+    Function to clear all records.
+    '''
+    _records.clear()
+    del _events[:]
+
+
+@contextmanager
+def stage(name):
+    '''
+    Context manager to record the time and peak memory of a block of code.
+
+    Parameters:
+        name (str): name of the stage in the report.
+    '''
+    if not _enabled:
+        yield
+        return
+
+    stack = _stack.__dict__.setdefault('frames', [])
+    memory = _memory and tracemalloc.is_tracing()
+    if memory:
+        # saving the outer stage's peak before resetting it for this stage.
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame = {'start_mem': current, 'peak': current}
+    else:
+        frame = {'start_mem': 0, 'peak': 0}
+    stack.append(frame)
+
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        stack.pop()
+
+        peak = 0
+        if memory:
+            frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            peak = frame['peak'] - frame['start_mem']
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], frame['peak'])
+
+        record = _records.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak': 0})
+        record['calls'] += 1
+        record['wall'] += wall
+        record['cpu'] += cpu
+        record['peak'] = max(record['peak'], peak)
+
+        _events.append({'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                        'ts': wall0*1e6, 'dur': wall*1e6, 'args': {'cpu_s': cpu, 'peak_bytes': peak}})
+
+
+def timed(func=None, name=None):
+    '''
+    Decorator to record every call of a function as a stage.
+
+    Parameters:
+        func: function to wrap.
+        name (str): name in the report. (default module.function)
+    '''
+    if func is None:
+        return functools.partial(timed, name=name)
+    if getattr(func, '_instrumented', False):
+        return func
+
+    if name is None:
+        name = '{}.{}'.format(func.__module__.rsplit('.', 1)[-1], func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with stage(name):
+            return func(*args, **kwargs)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def instrument(*modules):
+    '''
+    Function to wrap the function_list entries of modules with timed().
+
+    Every loaded module of the package that refers to one of the functions is
+    updated too, so calls between modules (e.g. localInterp -> readCoastLine) are recorded.
+
+    Parameters:
+        modules: submodules of the package, e.g. myData, mySignal.
+    '''
+    for module in modules:
+        for i, func in enumerate(module.function_list):
+            wrapped = timed(func)
+            if wrapped is func:
+                continue
+            module.function_list[i] = wrapped
+            _patched.append((module.function_list, i, func))
+
+            for name, loaded in list(sys.modules.items()):
+                if loaded is None or not (name == _PACKAGE or name.startswith(_PACKAGE + '.')):
+                    continue
+                for attr, value in list(vars(loaded).items()):
+                    if value is func:
+                        setattr(loaded, attr, wrapped)
+                        _patched.append((loaded, attr, func))
+
+
+def restore():
+    '''
+    Function to undo instrument() and instrumentAll(), putting the original functions back.
+    '''
+    while _patched:
+        namespace, name, func = _patched.pop()
+        if isinstance(namespace, list):
+            namespace[name] = func
+        else:
+            setattr(namespace, name, func)
+
+
+def instrumentAll():
+    '''
+    Function to import and instrument every module of the package.
+    '''
+    from importlib import import_module
+    instrument(*[import_module('{}.{}'.format(_PACKAGE, m)) for m in _MODULES])
+
+
+def getRecords():
+    '''
+    Function to get a copy of the records, e.g. to send back from a worker process.
+    '''
+    return {'records': {k: dict(v) for k, v in _records.items()}, 'events': list(_events)}
+
+
+def mergeRecords(records):
+    '''
+    Function to add records from getRecords() (e.g. of a worker process) to this process.
+    '''
+    for name, other in records['records'].items():
+        record = _records.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak': 0})
+        record['calls'] += other['calls']
+        record['wall'] += other['wall']
+        record['cpu'] += other['cpu']
+        record['peak'] = max(record['peak'], other['peak'])
+    _events.extend(records['events'])
+
+
+def report(sort='wall'):
+    '''
+    Function to make a per-stage report of the records.
+
+    Parameters:
+        sort (str): column to sort by, 'wall', 'cpu', 'calls' or 'peak'. (default 'wall')
+    Returns:
+        report as a string.
+    '''
+    lines = ['{:<32} {:>8} {:>10} {:>10} {:>10} {:>10}'.format(
+        'stage', 'calls', 'wall [s]', 'cpu [s]', 'per call', 'peak [MB]')]
+    for name, r in sorted(_records.items(), key=lambda item: -item[1][sort]):
+        lines.append('{:<32} {:>8d} {:>10.4f} {:>10.4f} {:>10.5f} {:>10.1f}'.format(
+            name, r['calls'], r['wall'], r['cpu'], r['wall']/r['calls'], r['peak']/2**20))
+    return '\n'.join(lines)
+
+
+def dumpReport(filepath):
+    '''
+    Function to save the records as JSON.
+    '''
+    with open(filepath, 'w') as f:
+        json.dump(_records, f, indent=2)
+
+
+def dumpChromeTrace(filepath):
+    '''
+    Function to save the stages as a Chrome trace (chrome://tracing or ui.perfetto.dev).
+    '''
+    with open(filepath, 'w') as f:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,3 @@
+from .myBench import makeSyntheticData, runBenchmarks, compareBenchmarks
+
+from .myBench import function_list
\ No newline at end of file
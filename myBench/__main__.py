@@ -0,0 +1,3 @@
+from .myBench import main
+
+main()
@@ -0,0 +1,268 @@
+'''
+Module for benchmarking the I/O, interpolation and spectral hot paths.
+
+Synthetic station files of realistic size are written to a temporary data root,
+so no real data is needed. Each hot path is timed and its peak memory measured,
+and results are saved as JSON so runs can be compared.
+
+makeSyntheticData(root, scale=1.0, stations=MINUTE_STATIONS, seed=0):
+    Function to write synthetic minute, hour, coastline and station location files.
+
+runBenchmarks(scale=1.0, repeat=3, benchmarks=None, outfile=None):
+    Function to time each hot path and measure its memory peak.
+
+compareBenchmarks(old, new, threshold=1.1):
+    Function to compare two benchmark results and find regressions.
+
+Command line:
+    python -m myPyPackages.myBench --out bench.json --compare old_bench.json
+'''
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import tempfile
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .. import myData, myDates, mySignal
+
+# Sizes of the real data sets.
+MINUTE_N = 3461760       # rows in a minute file.
+HOUR_N = 57000           # rows in an hour file (about 6.5 years).
+COAST_N = 20402          # points in the coastline.
+MINUTE_STATIONS = ['UVicSci', 'Monterey', 'Craigflower', 'ShawniganLake', 'Cumberland']
+HOUR_STATIONS = ['Bowser', 'Cortes', 'Craigflower', 'Cumberland', 'HappyValley',
+                 'JamesBay', 'Macaulay', 'Monterey', 'Phoenix', 'RVYC',
+                 'Rogers', 'ShawniganLake', 'Strawberry', 'UVicSci', 'VIU']
+SYNTHETIC_FILE = '.synthetic.json' # scale and seed of the synthetic data in a data root.
+
+
+def makeSyntheticData(root, scale=1.0, stations=MINUTE_STATIONS, seed=0):
+    '''
+    Function to write synthetic minute, hour, coastline and station location files
+    with the same layout as the real data.
+
+    Parameters:
+        root (str): directory to write the files to.
+        scale (float): fraction of the real record lengths to write. (default 1.0)
+        stations (list): names of the minute stations. (default MINUTE_STATIONS)
+        seed (int): seed for the random numbers. (default 0)
+
+    The scale and seed are saved in <root>/SYNTHETIC_FILE, see runBenchmarks().
+    '''
+    rng = np.random.default_rng(seed)
+    n_min = max(int(MINUTE_N*scale), 1024)
+    n_hr = max(int(HOUR_N*scale), 1024)
+
+    # minute files, diurnal cycle plus noise.
+    folder = os.path.join(root, 'UVicWeatherdata_Minute_2022')
+    os.makedirs(folder, exist_ok=True)
+    t = np.arange(n_min)/(24*60)
+    for name in stations:
+        temp = 10 + 5*np.sin(2*np.pi*t) + rng.standard_normal(n_min)
+        press = 1010 + 10*np.sin(2*np.pi*t/7) + rng.standard_normal(n_min)
+        with open(os.path.join(folder, '{}_Tp.dat'.format(name)), 'w') as f:
+            f.write('Temperature Pressure\ndegC hPa\n')
+            np.savetxt(f, np.column_stack([temp, press]), fmt='%.2f')
+
+    # hour files, times then one column per station.
+    t = np.arange(n_hr)/24
+    for var, base in [('temperature', 10), ('pressure', 1010)]:
+        values = base + 5*np.sin(2*np.pi*t)[:, None] + rng.standard_normal((n_hr, len(HOUR_STATIONS)))
+        with open(os.path.join(root, 'All_hourly_{}_data_2022.dat'.format(var)), 'w') as f:
+            f.write('Hourly {} (synthetic)\n'.format(var) + ' '.join(['times'] + HOUR_STATIONS) + '\n-----\n')
+            np.savetxt(f, np.column_stack([t, values]), fmt='%.4f')
+
+    # coastline, a closed loop around the stations.
+    theta = np.linspace(0, 2*np.pi, COAST_N)
+    coast = np.column_stack([235.6 + 1.4*np.cos(theta) + 0.01*rng.standard_normal(COAST_N),
+                             49.2 + 0.9*np.sin(theta) + 0.01*rng.standard_normal(COAST_N)])
+    np.savetxt(os.path.join(root, 'VI_Coast_V2.dat'), coast, fmt='%.6f')
+
+    # station locations inside the coastline.
+    with open(os.path.join(root, 'AllStation_Location.txt'), 'w') as f:
+        f.write('StationName, longitude [East], latitude [North], elevation [m]\n')
+        for name in HOUR_STATIONS:
+            f.write('{} {:.3f} {:.4f} {}\n'.format(name, 235.6 + rng.uniform(-1, 1),
+                                                  49.2 + rng.uniform(-0.6, 0.6), rng.integers(0, 180)))
+
+    with open(os.path.join(root, SYNTHETIC_FILE), 'w') as f:
+        json.dump({'scale': scale, 'seed': seed, 'stations': list(stations)}, f)
+
+
+def _syntheticScale(root):
+    '''
+    Function to get the scale of the synthetic data in root, None if it isn't synthetic data
+    (or was written before the scale was saved).
+    '''
+    try:
+        with open(os.path.join(root, SYNTHETIC_FILE)) as f:
+            return json.load(f)['scale']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _measure(func, repeat):
+    '''
+    Function to time a function and measure its peak memory.
+    Returns dict of the wall times (s) and peak memory (MB).
+    '''
+    times = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # peak memory on a separate run so tracemalloc doesn't slow down the timing.
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'min': min(times), 'median': float(np.median(times)), 'times': times, 'peak_mb': peak/2**20}
+
+
+def _benchmarks():
+    '''
+    Function to get the hot paths to benchmark, {name: function}.
+    '''
+    station = MINUTE_STATIONS[0]
+    minute = myData.readMinuteData(station)
+    hour = myData.readHourData(0)
+    info = myData.getStationInfo()
+    start = minute.times.iloc[len(minute)//4]
+    end = minute.times.iloc[len(minute)//2]
+    means = pd.Series(np.linspace(5, 15, len(info)))
+
+    return {
+        'readMinuteData': lambda: myData.readMinuteData(station),
+        'readHourData': lambda: myData.readHourData(0),
+        'readCoastLine': myData.readCoastLine,
+        'getRange': lambda: myDates.getRange(minute, start, end),
+        'localInterp': lambda: mySignal.localInterp(means, info, (100, 100)),
+        'globalInterp': lambda: mySignal.globalInterp(means, info, (100, 100)),
+        'myWelch_minute': lambda: mySignal.myWelch(minute.temperature.values, fs=24*60, noverlap='50%'),
+        'myWelch_hour': lambda: mySignal.myWelch(hour.temperature.values, fs=24, noverlap='50%'),
+    }
+
+
+def runBenchmarks(scale=1.0, repeat=3, benchmarks=None, outfile=None, root=None):
+    '''
+    Function to time each hot path and measure its memory peak on synthetic data.
+
+    Parameters:
+        scale (float): fraction of the real record lengths to use. (default 1.0)
+        repeat (int): number of timed runs of each benchmark. (default 3)
+        benchmarks (list): names of benchmarks to run. (default all)
+        outfile (str): file to save the results to as JSON. (default None)
+        root (str): directory for the synthetic data. (default a temporary directory)
+                    Synthetic data of another scale in root is written again, other data
+                    already in root is used as it is.
+
+    Returns:
+        dict of results with 'info' (versions, the scale used, sizes) and 'results' {name: timings}.
+        The scale is None for data that isn't from makeSyntheticData().
+    '''
+    old_root = myData.getDataRoot()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = root or tmp
+        used_scale = _syntheticScale(root)
+        if not os.path.exists(os.path.join(root, 'VI_Coast_V2.dat')) or (used_scale is not None and used_scale != scale):
+            makeSyntheticData(root, scale)
+            used_scale = scale
+        myData.setDataRoot(root)
+
+        try:
+            myData.getCatalog(refresh=True)
+            sizes = {'minute_rows': myData.findDataset('min', station=MINUTE_STATIONS[0])['n'],
+                     'hour_rows': myData.findDataset('hr', variable='temperature')['n']}
+            funcs = _benchmarks()
+            if benchmarks:
+                funcs = {name: funcs[name] for name in benchmarks}
+
+            results = {}
+            for name, func in funcs.items():
+                results[name] = _measure(func, repeat)
+                print("{:>16}: {:8.4f} s  {:8.1f} MB".format(name, results[name]['min'], results[name]['peak_mb']))
+        finally:
+            myData.setDataRoot(old_root)
+
+    out = {'info': {'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': sys.version.split()[0],
+                    'numpy': np.__version__,
+                    'platform': platform.platform(),
+                    'scale': used_scale,
+                    **sizes,
+                    'repeat': repeat},
+           'results': results}
+
+    if outfile:
+        with open(outfile, 'w') as f:
+            json.dump(out, f, indent=2)
+    return out
+
+
+def compareBenchmarks(old, new, threshold=1.1):
+    '''
+    Function to compare two benchmark results and find regressions.
+
+    Parameters:
+        old, new: results from runBenchmarks() or paths to their JSON files.
+        threshold (float): ratio of new/old time counted as a regression. (default 1.1)
+
+    Returns:
+        dict of {name: new/old ratio of the minimum times} for the regressions.
+    '''
+    if isinstance(old, str):
+        with open(old) as f:
+            old = json.load(f)
+    if isinstance(new, str):
+        with open(new) as f:
+            new = json.load(f)
+
+    regressions = {}
+    for name, result in new['results'].items():
+        if name not in old['results']:
+            continue
+        ratio = result['min']/old['results'][name]['min']
+        mem = result['peak_mb']/max(old['results'][name]['peak_mb'], 1e-9)
+        flag = ''
+        if ratio > threshold:
+            regressions[name] = ratio
+            flag = '  <-- regression'
+        print("{:>16}: time x{:.2f}  memory x{:.2f}{}".format(name, ratio, mem, flag))
+    return regressions
+
+
+def main(argv=None):
+    '''
+    Function for the command line interface.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmarks for the I/O, interpolation and spectral hot paths.')
+    parser.add_argument('--scale', type=float, default=1.0, help='fraction of the real record lengths.')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each benchmark.')
+    parser.add_argument('--only', nargs='+', default=None, help='names of benchmarks to run.')
+    parser.add_argument('--root', default=None, help='directory to keep the synthetic data in.')
+    parser.add_argument('--out', default=None, help='JSON file to save the results to.')
+    parser.add_argument('--compare', default=None, help='JSON file of an earlier run to compare to.')
+    parser.add_argument('--threshold', type=float, default=1.1, help='time ratio counted as a regression.')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.scale, args.repeat, args.only, args.out, args.root)
+    if args.compare:
+        regressions = compareBenchmarks(args.compare, results, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+# List of functions.
+function_list = [makeSyntheticData, runBenchmarks, compareBenchmarks]
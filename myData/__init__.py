@@ -1,4 +1,11 @@
 from .myData import readCoastLine, readHourData, readMinuteData, getStationInfo, removeStation, getBasicStats
+from .myData import computeBasicStats, readStations
+from .myData import setDataRoot, getDataRoot, getCatalog, findDataset
+from .myData import StationPanel, readPanel
+from .myData import readMinuteChunks
+from .myData import StationIndex, getStationIndex
+from .myData import landMask
+from .myData import elevationGrid
 
 from .myData import function_list
 
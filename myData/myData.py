@@ -1,7 +1,18 @@
 '''
 Module for data handling, Physics 411
 
-readMinuteData(filepath):
+setDataRoot(path) / getDataRoot():
+    Functions to set/get the directory the data files are read from.
+    Defaults to the MYPYPACKAGES_DATA environment variable or "../../Data/".
+
+getCatalog(refresh=False):
+    Function to find the data files under the data root and read each file's
+    time extent and number of rows. The metadata is cached.
+
+findDataset(resolution, station=None, variable=None, year=None):
+    Function to find a dataset in the catalog.
+
+readMinuteData(name, year=None, cache=False, dtype=None):
     Function to read in minute resolution data and return a pandas dataframe.
     Nan values are automatically filled in using a cubic interpolation method.
 
@@ -9,6 +20,10 @@ readMinuteData(filepath):
         filepath (str): filepath to data file to read.
 
 
+readStations(names, resolution='min', workers=None, aligned=False):
+    Function to read several stations concurrently, as a dict of DataFrames
+    or one aligned (time x station) array per variable.
+
 getStationInfo(station):
     Function to get a station's longtitude, latitude and elevation.
     returns dataframe of lat, long and elev.
@@ -28,30 +43,237 @@ removeStationInfo(name):
     Parameters:
         name (str): name of Station to be deleted.
 
+StationPanel(times, values, stations, variables):
+    Class for data of several stations on one shared time axis, stored as one
+    (variable x station x time) array with views for station, variable and time selections.
+
+readPanel(names, resolution='min'):
+    Function to read several stations into a StationPanel.
+
+readMinuteChunks(name, chunk_size=10080, start=None, end=None):
+    Generator to read minute resolution data in chunks of (times, temperature, pressure),
+    starting at any date by seeking to the matching row.
+
+StationIndex(info):
+    Class for k-nearest and radius queries on the station locations with a scipy cKDTree,
+    using great circle distances in km and a cached station distance matrix.
+
+getStationIndex(info=None):
+    Function to get a (cached) StationIndex of the stations.
+
+landMask(grid, refresh=False):
+    Function to get the land cells of the coastline's bounding box grid, cached on disk.
 
+elevationGrid(grid, refresh=False):
+    Function to get the ground elevation of the coastline's bounding box grid, cached on disk.
 '''
 
 
 
+import os
+import re
+import glob
+import json
+
 import numpy as np
 import pandas as pd
 
-# Minute Data Parameters
+# Minute Data Parameters, used when a file's header doesn't give its time extent.
 START = 736330.0     # start date
 END = 738733.99931   # end date
 N = 3461760          # number of data points
 
 # Hour Data Parameters
 
+# Root directory of the data, can be changed with setDataRoot() or the MYPYPACKAGES_DATA environment variable.
 # MAINPATH = 'Data/' # for testing
-MAINPATH = "../../Data/"
+MAINPATH = os.environ.get('MYPYPACKAGES_DATA', "../../Data/")
+
+# Files relative to the data root.
+COASTLINE_FILE = 'VI_Coast_V2.dat'
+STATION_LOCATION_FILE = 'AllStation_Location.txt'
+ELEVATION_FILE = 'VI_Elevation.dat' # (long, lati, elev [m]) points of a terrain model, for elevationGrid().
+
+# Patterns for finding data files under the data root.
+MINUTE_PATTERN = re.compile(r'(?P<station>\w+)_Tp\.dat$')
+HOUR_PATTERN = re.compile(r'All_hourly_(?P<variable>temperature|pressure)_data_(?P<year>\d{4})\.dat$')
+YEAR_PATTERN = re.compile(r'(\d{4})')
+
+# Number of header lines and sample spacing (days) for each resolution.
+SKIPROWS = {'min': 2, 'hr': 3}
+DT = {'min': 1/(24*60), 'hr': 1/24}
+
+_catalog = {} # cached catalogs, {data root: list of datasets}.
+
+INT16_NAN = -32768 # NaN in int16 caches.
+ROW_INDEX_STEP = 10000 # rows between indexed byte offsets for seeking in minute files.
+
+
+def _path(filename):
+    '''
+    Function to get the path of a file under the data root.
+    '''
+    return os.path.join(MAINPATH, filename)
+
+
+def setDataRoot(path):
+    '''
+    Function to set the root directory the data files are read from.
+
+    Parameters:
+        path (str): data directory.
+    '''
+    global MAINPATH
+    MAINPATH = path
+
+
+def getDataRoot():
+    '''
+    Function to get the root directory the data files are read from.
+    '''
+    return MAINPATH
+
+
+def _countRows(path, skiprows):
+    '''
+    Function to count the data rows of a file without parsing it.
+    '''
+    n, last = 0, b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            n += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n': # no newline at the end of the last row.
+        n += 1
+    return n - skiprows
+
 
+def _lastLine(path):
+    '''
+    Function to read the last line of a file by seeking to the end.
+    '''
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().split(b'\n')
+    return [l for l in lines if l.strip()][-1].decode()
+
+
+def _readHeader(path, resolution):
+    '''
+    Function to read the time extent and number of rows of a data file.
+
+    Hour files have the times in the first column so the first and last rows are read.
+    Minute files only have temperature and pressure, so date numbers (> 700000)
+    in the header lines give the start (and end), otherwise START is used.
+    '''
+    skiprows = SKIPROWS[resolution]
+    with open(path) as f:
+        header = [f.readline() for i in range(skiprows)]
+        first = f.readline()
+
+    n = _countRows(path, skiprows)
+
+    if resolution == 'hr':
+        start = float(first.split()[0])
+        end = float(_lastLine(path).split()[0])
+    else:
+        nums = [float(x) for line in header for x in re.findall(r'[-+]?\d+\.?\d*', line)]
+        datenums = [x for x in nums if 7e5 < x < 8e5]
+        start = datenums[0] if datenums else START
+        end = datenums[1] if len(datenums) > 1 else start + (n - 1)*DT[resolution]
+
+    return {'header': [h.strip() for h in header], 'start': start, 'end': end, 'n': n}
+
+
+def getCatalog(refresh=False):
+    '''
+    Function to find the data files under the data root and read their metadata.
+
+    The catalog is cached in memory for each data root, and the metadata is also
+    saved in <data root>/.catalog.json so files are only re-read when they change.
+
+    Parameters:
+        refresh (bool): search the data root again. (default False)
+    Returns:
+        list of dicts, one per file with:
+            path, resolution ('min'/'hr'), station (minute files), variable,
+            year, start, end (date numbers), n (number of rows) and header.
+    '''
+    root = os.path.abspath(MAINPATH)
+    if root in _catalog and not refresh:
+        return _catalog[root]
+
+    cache_file = os.path.join(root, '.catalog.json')
+    cached = {}
+    try:
+        with open(cache_file) as f:
+            cached = {d['path']: d for d in json.load(f)}
+    except (OSError, ValueError): # no cache yet or a broken one.
+        pass
+
+    datasets = []
+    for path in sorted(glob.glob(os.path.join(root, '**', '*.dat'), recursive=True)):
+        name = os.path.basename(path)
+        minute, hour = MINUTE_PATTERN.match(name), HOUR_PATTERN.match(name)
+        if minute:
+            info = {'resolution': 'min', 'station': minute['station'], 'variable': 'Tp'}
+            year = YEAR_PATTERN.findall(os.path.relpath(os.path.dirname(path), root))
+            info['year'] = int(year[-1]) if year else None
+        elif hour:
+            info = {'resolution': 'hr', 'station': None, 'variable': hour['variable'], 'year': int(hour['year'])}
+        else:
+            continue
+
+        rel = os.path.relpath(path, root)
+        stat = os.stat(path)
+        old = cached.get(rel)
+        if old and old['mtime'] == stat.st_mtime and old['size'] == stat.st_size:
+            datasets.append(old)
+            continue
+
+        info.update(_readHeader(path, info['resolution']))
+        info.update({'path': rel, 'mtime': stat.st_mtime, 'size': stat.st_size})
+        datasets.append(info)
+
+    try:
+        # writing to a temporary file first so other processes never read half a file.
+        tmp_file = '{}.{}'.format(cache_file, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(datasets, f, indent=1)
+        os.replace(tmp_file, cache_file)
+    except OSError: # read only data directory.
+        pass
+
+    _catalog[root] = datasets
+    return datasets
+
+
+def findDataset(resolution, station=None, variable=None, year=None):
+    '''
+    Function to find a dataset in the catalog.
+
+    Parameters:
+        resolution (str): 'min' or 'hr'.
+        station (str): name of station (minute data).
+        variable (str): 'temperature' or 'pressure' (hour data).
+        year (int) Optional: year of the dataset, default the latest one.
+    Returns:
+        dict of the dataset's metadata, see getCatalog(). The path is absolute.
+    '''
+    matches = [d for d in getCatalog()
+               if d['resolution'] == resolution
+               and (station is None or d['station'] == station)
+               and (variable is None or d['variable'] == variable)
+               and (year is None or d['year'] == year)]
+    if not matches:
+        raise FileNotFoundError("No {} dataset for station={}, variable={}, year={} under {}".format(
+            resolution, station, variable, year, MAINPATH))
+
+    dataset = dict(max(matches, key=lambda d: d['year'] or 0))
+    dataset['path'] = os.path.join(os.path.abspath(MAINPATH), dataset['path'])
+    return dataset
 
-FILEPATH =  MAINPATH + '{}'
-MINUTE_FILEPATH = MAINPATH + 'UVicWeatherdata_Minute_2022/{}_Tp.dat'
-STATION_LOCATION_FILEPATH = MAINPATH + 'AllStation_Location.txt'
-TEMP_PATH_HR = MAINPATH + 'All_hourly_temperature_data_2022.dat'
-PRESS_PATH_HR = MAINPATH +  'All_hourly_pressure_data_2022.dat'
 
 def readCoastLine():
     '''
@@ -60,29 +282,141 @@ def readCoastLine():
     Returns:
         pd dataframe of longitude and latitude.
     '''
-    VI_coast = pd.read_csv(FILEPATH.format('VI_Coast_V2.dat'), sep='\s+', names=['long', 'lati'])
+    VI_coast = pd.read_csv(_path(COASTLINE_FILE), sep='\s+', names=['long', 'lati'])
     return VI_coast
 
 
-def readMinuteData(name):
+def _checkDtype(dtype):
+    '''
+    Function to check a storage dtype, returns 'float64', 'float32' or 'int16'.
+    '''
+    name = np.dtype(dtype or np.float64).name
+    if name not in ('float64', 'float32', 'int16'):
+        raise ValueError("dtype must be float64, float32 or int16, got {}".format(dtype))
+    return name
+
+
+def _cacheFile(dataset, dtype=None):
+    '''
+    Function to get the binary (.npz) cache file of a dataset, in <data root>/.cache/.
+    '''
+    root = os.path.abspath(MAINPATH)
+    return os.path.join(root, '.cache', '{}.{}.npz'.format(os.path.relpath(dataset['path'], root), _checkDtype(dtype)))
+
+
+def _encodeInt16(values):
+    '''
+    Function to store values as int16 with a scale and offset for each column.
+    The scale is 0.01 (the data have at most 2 decimals) unless a column's range needs a larger one.
+    NaNs are stored as -32768.
+    '''
+    low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+    offset = np.round((low + high)/2, 2)
+    scale = np.maximum(0.01, (high - low)/65000)
+    data = np.round((values - offset)/scale)
+    data[np.isnan(data)] = INT16_NAN
+    return data.astype(np.int16), scale, offset
+
+
+def _decodeInt16(data, scale, offset):
+    '''
+    Function to turn int16 values from _encodeInt16() back into float32.
+    '''
+    values = data.astype(np.float32)*scale.astype(np.float32) + offset.astype(np.float32)
+    values[data == INT16_NAN] = np.nan
+    return values
+
+
+def _loadArray(path, resolution, cache_file=None, dtype=None):
+    '''
+    Function to read the numeric values of a data file.
+    If cache_file is given the values are loaded from the binary cache when it is newer
+    than the data file, otherwise the file is parsed and the cache is written.
+
+    Returns:
+        times: first column of hour files as float64 (None for minute files).
+        values: (time x column) array of dtype, float32 for int16 (the cache is int16).
+    '''
+    dtype = _checkDtype(dtype)
+    if cache_file and os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(path):
+        with np.load(cache_file) as f:
+            times = f['times'] if f['times'].size else None
+            if dtype == 'int16':
+                return times, _decodeInt16(f['values'], f['scale'], f['offset'])
+            return times, f['values']
+
+    values = pd.read_csv(path, sep='\s+', skiprows=SKIPROWS[resolution], header=None).to_numpy(np.float64)
+    times = None
+    if resolution == 'hr':
+        times, values = values[:, 0].copy(), values[:, 1:]
+
+    stored = {'times': times if times is not None else np.empty(0)}
+    if dtype == 'int16':
+        stored['values'], stored['scale'], stored['offset'] = _encodeInt16(values)
+        values = _decodeInt16(stored['values'], stored['scale'], stored['offset'])
+    else:
+        values = np.ascontiguousarray(values, dtype=dtype)
+        stored['values'] = values
+
+    if cache_file:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = '{}.{}.npz'.format(cache_file[:-4], os.getpid())
+            np.savez(tmp_file, **stored)
+            os.replace(tmp_file, cache_file)
+        except OSError: # read only data directory.
+            pass
+    return times, values
+
+
+def _cacheValid(dataset, dtype=None):
+    '''
+    Function to check if a dataset has an up to date binary cache.
+    '''
+    cache_file = _cacheFile(dataset, dtype)
+    return os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(dataset['path'])
+
+
+def _valueDtype(dtype):
+    '''
+    Function to get the dtype of the returned values, int16 storage is returned as float32.
+    '''
+    return np.float32 if _checkDtype(dtype) == 'int16' else np.dtype(_checkDtype(dtype))
+
+
+def readMinuteData(name, year=None, cache=False, dtype=None):
     '''
     Function to read in minute resolution data and return a pandas dataframe.
     Parameters:
-        filepath (str): name of station.
+        name (str): name of station.
+        year (int) Optional: year of the dataset, default the latest one.
+        cache (bool) Optional: read from/write a binary cache of the file, default False.
+        dtype Optional: storage of the values, default np.float64.
+                        np.float32 halves the memory (about 7 significant digits).
+                        'int16' stores the cache as int16 with a scale (0.01) and offset,
+                        the values are returned as float32.
+                        Times are always float64.
     Returns:
         pd dataframe of times, temperature and pressure
     '''
+    dataset = findDataset('min', station=name, year=year)
+
     # Creating Series for time
-    times = np.linspace(START, END, N)
+    times = np.linspace(dataset['start'], dataset['end'], dataset['n'])
     times = pd.Series(times, name='times')
 
-    data = pd.read_csv(MINUTE_FILEPATH.format(name), sep='\s+', skiprows=2, names=['temperature', 'pressure'])
+    if cache or _checkDtype(dtype) == 'int16':
+        values = _loadArray(dataset['path'], 'min', _cacheFile(dataset, dtype) if cache else None, dtype)[1]
+        data = pd.DataFrame(values, columns=['temperature', 'pressure'])
+    else:
+        data = pd.read_csv(dataset['path'], sep='\s+', skiprows=SKIPROWS['min'], names=['temperature', 'pressure'],
+                           dtype=_valueDtype(dtype))
 
     data = pd.concat([times, data], axis=1)
     return data
 
 
-def readHourData(col_index):
+def readHourData(col_index, year=None, cache=False, dtype=None):
     '''
     Function to read hour resolution data given a filepath.
     Parameters:
@@ -102,19 +436,134 @@ def readHourData(col_index):
             12. Strawberry.
             13. UVicSci.
             14. VIU.
+        year (int) Optional: year of the dataset, default the latest one.
+        cache (bool) Optional: read from/write a binary cache of the files, default False.
+        dtype Optional: storage of the values (np.float64, np.float32 or 'int16'),
+                        default np.float64. See readMinuteData().
 
     Returns:
         : pandas frame of data, (timestamp, temp, press)
     '''
+    temp_data = findDataset('hr', variable='temperature', year=year)
+    press_data = findDataset('hr', variable='pressure', year=year)
+
+    if cache or _checkDtype(dtype) == 'int16':
+        times, temp = _loadArray(temp_data['path'], 'hr', _cacheFile(temp_data, dtype) if cache else None, dtype)
+        press = _loadArray(press_data['path'], 'hr', _cacheFile(press_data, dtype) if cache else None, dtype)[1]
+        return pd.DataFrame({'times': times, 'temperature': temp[:, col_index], 'pressure': press[:, col_index]})
+
     col_index += 1
+    temp_path, press_path = temp_data['path'], press_data['path']
+    value_dtype = _valueDtype(dtype)
 
-    times = pd.read_csv(TEMP_PATH_HR, sep="\s+", usecols=[0], names=["times"], skiprows=3)
-    temp = pd.read_csv(TEMP_PATH_HR, sep="\s+", usecols=[col_index], names=["temperature"], skiprows=3)
-    press = pd.read_csv(PRESS_PATH_HR, sep="\s+", usecols=[col_index], names=["pressure"], skiprows=3)
+    times = pd.read_csv(temp_path, sep="\s+", usecols=[0], names=["times"], skiprows=SKIPROWS['hr'])
+    temp = pd.read_csv(temp_path, sep="\s+", usecols=[col_index], names=["temperature"], skiprows=SKIPROWS['hr'], dtype=value_dtype)
+    press = pd.read_csv(press_path, sep="\s+", usecols=[col_index], names=["pressure"], skiprows=SKIPROWS['hr'], dtype=value_dtype)
 
     return pd.concat([times, temp, press], axis=1)
 
 
+def _loadJob(args):
+    '''
+    Function to unpack the arguments of _loadArray in the thread/process pool.
+    '''
+    return _loadArray(*args)
+
+
+def readStations(names, resolution='min', workers=None, max_parallel=None, cache=False,
+                 aligned=False, year=None, dtype=None):
+    '''
+    Function to read several stations concurrently.
+
+    Text files are parsed in a process pool; when every file has an up to date
+    binary cache they are loaded in a thread pool instead.
+    Hour data only reads the temperature and pressure files once for all stations.
+
+    Parameters:
+        names (list): names of stations.
+        resolution (str) Optional: 'min' or 'hr', default 'min'.
+        workers (int) Optional: size of the pool, default number of cpus.
+        max_parallel (int) Optional: most files being parsed or waiting to be collected
+                         at once, caps the memory used, default workers.
+        cache (bool) Optional: read from/write binary caches, default False.
+        aligned (bool) Optional: return one aligned array instead of DataFrames, default False.
+        year (int) Optional: year of the datasets, default the latest one.
+        dtype Optional: storage of the values (np.float64, np.float32 or 'int16'),
+                        default np.float64. See readMinuteData().
+
+    Returns:
+        aligned=False: dict of {name: pd dataframe of times, temperature and pressure}.
+        aligned=True: dict of
+            times: shared time axis (all minute stations are put on one uniform grid).
+            stations: list of names.
+            temperature, pressure: (time x station) arrays, NaN where a station has no data.
+                                   Both are views of one (variable x station x time) array,
+                                   see StationPanel.fromAligned().
+    '''
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    if resolution == 'min':
+        datasets = [findDataset('min', station=name, year=year) for name in names]
+    else:
+        datasets = [findDataset('hr', variable=var, year=year) for var in ['temperature', 'pressure']]
+
+    jobs = [(d['path'], resolution, _cacheFile(d, dtype) if cache else None, dtype) for d in datasets]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    max_parallel = max_parallel or workers
+
+    # threads are enough to load .npz caches, parsing text needs processes.
+    Pool = ThreadPoolExecutor if (cache and all(_cacheValid(d, dtype) for d in datasets)) else ProcessPoolExecutor
+
+    values = [None]*len(jobs)
+    if workers == 1:
+        values = [_loadJob(job) for job in jobs]
+    else:
+        with Pool(max_workers=workers) as pool:
+            todo = list(enumerate(jobs))
+            running = {}
+            while todo or running:
+                while todo and len(running) < max_parallel:
+                    i, job = todo.pop(0)
+                    running[pool.submit(_loadJob, job)] = i
+                done = wait(running, return_when=FIRST_COMPLETED)[0]
+                for future in done:
+                    values[running.pop(future)] = future.result()
+
+    # splitting/aligning the arrays.
+    if resolution == 'hr':
+        (times, temp), (_, press) = values
+        cols = list(getStationInfo().station)
+        idx = [cols.index(name) for name in names]
+        if aligned:
+            block = np.stack([temp[:, idx].T, press[:, idx].T]) # (variable x station x time)
+            return {'times': times, 'stations': list(names),
+                    'temperature': block[0].T, 'pressure': block[1].T}
+        return {name: pd.DataFrame({'times': times, 'temperature': temp[:, i], 'pressure': press[:, i]})
+                for name, i in zip(names, idx)}
+
+    values = [v for t, v in values]
+    if not aligned:
+        return {name: pd.DataFrame({'times': np.linspace(d['start'], d['end'], d['n']),
+                                    'temperature': v[:, 0], 'pressure': v[:, 1]})
+                for name, d, v in zip(names, datasets, values)}
+
+    dt = DT['min']
+    start = min(d['start'] for d in datasets)
+    offsets = [int(round((d['start'] - start)/dt)) for d in datasets]
+    n = max(o + len(v) for o, v in zip(offsets, values))
+
+    # one contiguous (variable x station x time) block, the (time x station) arrays are views of it.
+    block = np.full((2, len(names), n), np.nan, dtype=_valueDtype(dtype))
+    for j, (o, v) in enumerate(zip(offsets, values)):
+        block[:, j, o:o + len(v)] = v.T
+
+    return {'times': start + np.arange(n)*dt, 'stations': list(names),
+            'temperature': block[0].T, 'pressure': block[1].T}
+
+
 def getStationInfo(station=None):
     '''
     Function to get a station's longtitude, latitude and elevation.
@@ -127,12 +576,12 @@ def getStationInfo(station=None):
     '''
 
     if not station:
-        data = pd.read_csv(STATION_LOCATION_FILEPATH, sep='\s+',
+        data = pd.read_csv(_path(STATION_LOCATION_FILE), sep='\s+',
                    names=['station', 'long', 'lati', 'elev'], skiprows=1)
         return data
 
 
-    sl = pd.read_csv(STATION_LOCATION_FILEPATH, sep='\s+',
+    sl = pd.read_csv(_path(STATION_LOCATION_FILE), sep='\s+',
                      names=['station', 'long', 'lat', 'elev'], skiprows=1)
 
     ind = np.where(sl.station == station)[0][0]
@@ -168,7 +617,7 @@ def removeStation(name):
             14. VIU.
     '''
 
-    data = pd.read_csv(STATION_LOCATION_FILEPATH, sep='\s+',
+    data = pd.read_csv(_path(STATION_LOCATION_FILE), sep='\s+',
                        names=['station', 'long', 'lati', 'elev'], skiprows=1)
 
     idx = np.where(data == name)[0][0]      # getting index.
@@ -180,33 +629,643 @@ def removeStation(name):
 
 
 
-def getBasicStats(data, station_names):
+def computeBasicStats(d, effective=False):
+    '''
+    Function to calculate basic statistic info such as mean, variance, std, uncertainty.
+
+    Parameters:
+        d: dataframe with temperature and pressure
+        effective (bool) Optional: use the effective sample size of the autocorrelated data
+            for the uncertainty, see myStats.effectiveSampleSize(). default False.
+    Returns:
+        dict of {'temperature': {...}, 'pressure': {...}}, each with
+        mean, std, var, unc and count (number of non-NaN values),
+        and n_eff (effective sample size) if effective.
+    '''
+    stats = {}
+    for col in ['temperature', 'pressure']:
+        values = d[col]
+        # accumulating in float64 so float32 data give the same results.
+        std = np.nanstd(values, dtype=np.float64)
+        stats[col] = {'mean': float(np.nanmean(values, dtype=np.float64)),
+                      'std': float(std),
+                      'var': float(np.nanvar(values, dtype=np.float64)),
+                      'unc': float(std/np.sqrt(len(values))),
+                      'count': int(values.count())}
+        if effective:
+            from ..myStats import effectiveSampleSize
+
+            n_eff = float(effectiveSampleSize(values.values))
+            stats[col].update({'unc': float(std/np.sqrt(n_eff)), 'n_eff': n_eff})
+    return stats
+
+
+def getBasicStats(data, station_names, effective=False):
     '''
     Function to print basic statistic info such as mean, variance, std, uncertainty.
 
     Parameters:
         data: dataframe with temperature and pressure
         station_names: list of station names
+        effective (bool) Optional: also print the uncertainties from the effective sample size. default False.
     '''
     
     print("avg T, STD T, avg P, STD P, \nvar T, Var P\n")
 
     for d, name in zip(data, station_names):
-        meanT = d.temperature.mean()
-        meanP = d.pressure.mean()
-        varP = np.nanvar(d.pressure)
-        varT = np.nanvar(d.temperature)
-        stdP = np.nanstd(d.pressure)
-        stdT = np.nanstd(d.temperature)
-
-        uncT = stdT/np.sqrt(len(d.temperature))
-        uncP = stdP/np.sqrt(len(d.pressure))
-
+        stats = computeBasicStats(d, effective)
+        T, P = stats['temperature'], stats['pressure']
 
         print(name+": ")
-        print('{:.2f} {:.2f} {:.2f} {:.2f}'.format(meanT, stdT, meanP, stdP))
-        print("{:.2f} {:.2f}".format(varT, varP))
+        print('{:.2f} {:.2f} {:.2f} {:.2f}'.format(T['mean'], T['std'], P['mean'], P['std']))
+        print("{:.2f} {:.2f}".format(T['var'], P['var']))
+        if effective:
+            print("unc T {:.3f} (n_eff {:.0f}), unc P {:.3f} (n_eff {:.0f})".format(
+                T['unc'], T['n_eff'], P['unc'], P['n_eff']))
         print()
 
+
+class StationPanel:
+    '''
+    Class for data of several stations on one shared time axis.
+
+    The values are one contiguous (variable x station x time) array, so selecting
+    stations, variables or a time range returns views (no copies) as long as the
+    selected stations are next to each other.
+
+    Attributes:
+        times: (time) array of date numbers shared by all stations.
+        values: (variable x station x time) array.
+        variables (list): names of the variables, e.g. ['temperature', 'pressure'].
+        stations (list): names of the stations.
+
+    Example:
+        panel = myData.readPanel(['UVicSci', 'Monterey', 'Craigflower'])
+        summer = panel.sel(start=summer_start, end=summer_end)
+        myData.getBasicStats(summer.toFrames(), summer.stations)
+        eof = mySignal.EOF(summer.matrix('temperature'))
+    '''
+
+    def __init__(self, times, values, stations, variables=('temperature', 'pressure'), dtype=None):
+        '''
+        Parameters:
+            times: (time) array of date numbers.
+            values: (variable x station x time) array.
+            stations (list): names of the stations.
+            variables (list): names of the variables. (default temperature, pressure)
+            dtype: np.float32 or np.float64, default keeps the dtype of values.
+        '''
+        self.times = np.asarray(times, dtype=np.float64)
+        self.values = np.asarray(values, dtype=dtype)
+        self.stations = list(stations)
+        self.variables = list(variables)
+
+        if self.values.shape != (len(self.variables), len(self.stations), len(self.times)):
+            raise ValueError("values must be (variable x station x time) = ({}, {}, {}), got {}".format(
+                len(self.variables), len(self.stations), len(self.times), self.values.shape))
+
+    @classmethod
+    def fromAligned(cls, aligned, dtype=None):
+        '''
+        Function to make a panel from readStations(..., aligned=True), without copying.
+        '''
+        variables = [v for v in ['temperature', 'pressure'] if v in aligned]
+        base = aligned[variables[0]].T.base
+        if base is not None and base.shape == (len(variables), len(aligned['stations']), len(aligned['times'])):
+            values = base
+        else:
+            values = np.stack([aligned[v].T for v in variables])
+        return cls(aligned['times'], values, aligned['stations'], variables, dtype)
+
+    @classmethod
+    def fromFrames(cls, frames, names=None, dtype=None):
+        '''
+        Function to make a panel from DataFrames of times, temperature and pressure
+        that share the same times, e.g. [readMinuteData(s) for s in names].
+
+        Parameters:
+            frames: dict of {name: DataFrame} or list of DataFrames.
+            names (list): names of the stations when frames is a list.
+        '''
+        if isinstance(frames, dict):
+            names, frames = list(frames), list(frames.values())
+        variables = [c for c in frames[0].columns if c != 'times']
+        values = np.empty((len(variables), len(frames), len(frames[0])), dtype=_valueDtype(dtype))
+        for j, d in enumerate(frames):
+            values[:, j, :] = d[variables].to_numpy().T
+        return cls(frames[0].times.to_numpy(), values, names, variables)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return "StationPanel({} variables x {} stations x {} times, {})".format(
+            len(self.variables), len(self.stations), len(self.times), self.values.dtype)
+
+    def _slice(self, names, index):
+        '''
+        Function to turn names into a slice when they are next to each other (a view), or a list of indexes.
+        '''
+        if names is None:
+            return slice(None)
+        if isinstance(names, str):
+            names = [names]
+        idx = [index.index(n) for n in names]
+        if idx == list(range(idx[0], idx[-1] + 1)):
+            return slice(idx[0], idx[-1] + 1)
+        return idx
+
+    def timeSlice(self, start=None, end=None):
+        '''
+        Function to get the slice of times between start (inclusive) and end (exclusive), like myDates.getRange().
+        '''
+        i = 0 if start is None else np.searchsorted(self.times, start, side='left')
+        j = len(self.times) if end is None else np.searchsorted(self.times, end, side='left')
+        return slice(i, j)
+
+    def sel(self, stations=None, variables=None, start=None, end=None):
+        '''
+        Function to select stations, variables and a time range.
+
+        Parameters:
+            stations: name or list of names. (default all)
+            variables: name or list of names. (default all)
+            start, end (float): time range as date numbers, see myDates.DateStrtoNum(). (default all)
+
+        Returns:
+            StationPanel, sharing memory with this one when the stations are next to each other.
+        '''
+        s = self._slice(stations, self.stations)
+        v = self._slice(variables, self.variables)
+        t = self.timeSlice(start, end)
+
+        values = self.values[v][:, s][:, :, t] if isinstance(s, list) or isinstance(v, list) else self.values[v, s, t]
+        pick = lambda names, idx: names[idx] if isinstance(idx, slice) else [names[i] for i in idx]
+        return StationPanel(self.times[t], values, pick(self.stations, s), pick(self.variables, v))
+
+    def get(self, variable, station=None):
+        '''
+        Function to get the values of a variable, (station x time) or (time) for one station. Always a view.
+        '''
+        v = self.variables.index(variable)
+        if station is None:
+            return self.values[v]
+        return self.values[v, self.stations.index(station)]
+
+    def matrix(self, variable):
+        '''
+        Function to get a (time x station) array of a variable, as used by EOF(),
+        surrogateTest() and other station-matrix functions. A view of the panel.
+        '''
+        return self.get(variable).T
+
+    def stationValues(self, variable, time=None):
+        '''
+        Function to get one value per station for the heatmap interpolators
+        (localInterp, globalInterp), at one time step or the mean over time.
+
+        Parameters:
+            variable (str): name of the variable.
+            time (float) Optional: date number, default the mean over all times (ignoring NaNs).
+        Returns:
+            pd Series indexed by station.
+        '''
+        values = self.get(variable)
+        if time is None:
+            data = np.nanmean(values, axis=1, dtype=np.float64)
+        else:
+            data = values[:, np.abs(self.times - time).argmin()]
+        return pd.Series(data, index=self.stations, name=variable)
+
+    def toFrame(self, station):
+        '''
+        Function to get a DataFrame of times and variables for one station, like readMinuteData().
+        '''
+        j = self.stations.index(station)
+        data = {'times': self.times}
+        for i, var in enumerate(self.variables):
+            data[var] = self.values[i, j]
+        return pd.DataFrame(data)
+
+    def toFrames(self):
+        '''
+        Function to get a list of DataFrames in station order,
+        e.g. for getBasicStats(panel.toFrames(), panel.stations).
+        '''
+        return [self.toFrame(name) for name in self.stations]
+
+
+def readPanel(names, resolution='min', dtype=None, **kwargs):
+    '''
+    Function to read several stations into a StationPanel.
+
+    Parameters:
+        names (list): names of stations.
+        resolution (str) Optional: 'min' or 'hr', default 'min'.
+        dtype Optional: np.float64, np.float32 or 'int16' (int16 cache, float32 values), default np.float64.
+        **kwargs: passed to readStations() (workers, max_parallel, cache, year).
+    Returns:
+        StationPanel.
+    '''
+    return StationPanel.fromAligned(readStations(names, resolution, aligned=True, dtype=dtype, **kwargs))
+
+
+def _rowIndex(dataset, step=ROW_INDEX_STEP):
+    '''
+    Function to get the byte offset of every step-th data row of a file, so a reader
+    can seek close to any row. Built with one scan of the file and cached in <data root>/.cache/.
+    '''
+    path = dataset['path']
+    root = os.path.abspath(MAINPATH)
+    index_file = os.path.join(root, '.cache', '{}.rows{}.npy'.format(os.path.relpath(path, root), step))
+    if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(path):
+        return np.load(index_file)
+
+    skiprows = SKIPROWS[dataset['resolution']]
+    offsets = [np.zeros(1, dtype=np.int64)] if skiprows == 0 else []
+    count, pos = 0, 0 # newlines and bytes before the current block.
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 23), b''):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            number = count + np.arange(1, len(newlines) + 1) # line number each newline ends.
+            keep = (number >= skiprows) & ((number - skiprows) % step == 0)
+            offsets.append(pos + newlines[keep] + 1)
+            count += len(newlines)
+            pos += len(block)
+    offsets = np.concatenate(offsets)
+    offsets = offsets[offsets < pos] # no row starts at the end of the file.
+
+    try:
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        tmp_file = '{}.{}.npy'.format(index_file[:-4], os.getpid())
+        np.save(tmp_file, offsets)
+        os.replace(tmp_file, index_file)
+    except OSError: # read only data directory.
+        pass
+    return offsets
+
+
+def readMinuteChunks(name, chunk_size=24*60*7, start=None, end=None, year=None, dtype=None):
+    '''
+    Generator to read minute resolution data in chunks, so only one chunk is in memory.
+
+    Reading can start at any date: the file is opened at the nearest indexed row
+    (see _rowIndex) and only the rows before the start inside that step are skipped.
+
+    Parameters:
+        name (str): name of station.
+        chunk_size (int) Optional: number of rows per chunk, default one week (10080).
+        start (float) Optional: date number to start at, default the start of the file.
+        end (float) Optional: date number to stop before, default the end of the file.
+        year (int) Optional: year of the dataset, default the latest one.
+        dtype Optional: np.float64 or np.float32 for the values, default np.float64.
+                        ('int16' gives float32, there is no cache to store.)
+
+    Yields:
+        (times, temperature, pressure) arrays of up to chunk_size rows.
+        Times are the same as readMinuteData() gives for those rows.
+
+    Example:
+        for times, temp, press in myData.readMinuteChunks('UVicSci', start=summer_start, end=summer_end):
+            ...
+    '''
+    dataset = findDataset('min', station=name, year=year)
+    n, t0 = dataset['n'], dataset['start']
+    dt = (dataset['end'] - t0)/(n - 1) if n > 1 else DT['min']
+
+    first = 0 if start is None else int(np.clip(np.ceil((start - t0)/dt - 1e-6), 0, n))
+    last = n if end is None else int(np.clip(np.ceil((end - t0)/dt - 1e-6), 0, n))
+    if first >= last:
+        return
+
+    offsets = _rowIndex(dataset)
+    k = min(first // ROW_INDEX_STEP, len(offsets) - 1)
+
+    value_dtype = _valueDtype(dtype)
+    with open(dataset['path'], 'rb') as f:
+        f.seek(offsets[k])
+        reader = pd.read_csv(f, sep='\s+', header=None, names=['temperature', 'pressure'],
+                             skiprows=first - k*ROW_INDEX_STEP, nrows=last - first,
+                             chunksize=chunk_size, dtype=value_dtype)
+        row = first
+        for chunk in reader:
+            m = len(chunk)
+            yield t0 + np.arange(row, row + m)*dt, chunk.temperature.to_numpy(), chunk.pressure.to_numpy()
+            row += m
+
+
+EARTH_RADIUS = 6371.0 # km
+
+_station_index = {} # {(location file, mtime): StationIndex}
+
+
+def _toXYZ(long, lati):
+    '''
+    Function to convert longitudes and latitudes (degrees) to points on a sphere of radius EARTH_RADIUS.
+    Straight line (chord) distances between the points order the same as great circle distances.
+    '''
+    long, lati = np.radians(long), np.radians(lati)
+    cos_lat = np.cos(lati)
+    return EARTH_RADIUS*np.stack([cos_lat*np.cos(long), cos_lat*np.sin(long), np.sin(lati)], axis=-1)
+
+
+def _chordToArc(chord):
+    '''
+    Function to convert chord distances to great circle distances (km).
+    '''
+    return 2*EARTH_RADIUS*np.arcsin(np.clip(chord/(2*EARTH_RADIUS), 0, 1))
+
+
+def _arcToChord(arc):
+    '''
+    Function to convert great circle distances (km) to chord distances.
+    '''
+    return 2*EARTH_RADIUS*np.sin(np.minimum(arc/(2*EARTH_RADIUS), np.pi/2))
+
+
+class StationIndex:
+    '''
+    Class for fast spatial queries on the station locations.
+
+    The stations are converted from longitude/latitude to points on a sphere and
+    put in a scipy cKDTree, so queries are vectorised over whole grids and all
+    distances are great circle distances in km.
+
+    Attributes:
+        stations (list): names of the stations.
+        long, lati: arrays of the station longitudes and latitudes.
+        tree: scipy.spatial.cKDTree of the stations.
+
+    Example:
+        index = myData.getStationIndex()
+        dist, idx = index.query(xi, yi, k=3)      # 3 nearest stations of every grid cell.
+        index.neighbours('UVicSci', radius=20)    # stations within 20 km.
+    '''
+
+    def __init__(self, info):
+        '''
+        Parameters:
+            info (DataFrame): station info with station, long and lati, see getStationInfo().
+        '''
+        from scipy.spatial import cKDTree
+
+        self.stations = list(info.station)
+        self.long = np.asarray(info.long, dtype=np.float64)
+        self.lati = np.asarray(info.lati, dtype=np.float64)
+        self.tree = cKDTree(_toXYZ(self.long, self.lati))
+        self._distances = None
+
+    def __len__(self):
+        return len(self.stations)
+
+    def __repr__(self):
+        return 'StationIndex({} stations)'.format(len(self.stations))
+
+    def distanceMatrix(self):
+        '''
+        Function to get the (station x station) great circle distances in km.
+        Calculated on the first call and cached.
+        '''
+        if self._distances is None:
+            xyz = self.tree.data
+            chord = np.sqrt(((xyz[:, None, :] - xyz[None, :, :])**2).sum(axis=-1))
+            self._distances = _chordToArc(chord)
+            self._distances.setflags(write=False)
+        return self._distances
+
+    def distance(self, a, b):
+        '''
+        Function to get the distance in km between two stations by name.
+        '''
+        return self.distanceMatrix()[self.stations.index(a), self.stations.index(b)]
+
+    def query(self, long, lati, k=1, max_distance=np.inf):
+        '''
+        Function to find the k nearest stations of any number of points.
+
+        Parameters:
+            long, lati: longitudes and latitudes, any shape (e.g. meshgrid arrays).
+            k (int): number of nearest stations. (default 1)
+            max_distance (float): only find stations within this distance in km. (default no limit)
+        Returns:
+            (distances in km, station indexes), shape of long (k=1) or long.shape + (k,).
+            Missing neighbours have distance inf and index len(self).
+        '''
+        points = _toXYZ(np.asarray(long, dtype=np.float64), np.asarray(lati, dtype=np.float64))
+        chord, idx = self.tree.query(points, k=k, distance_upper_bound=_arcToChord(max_distance))
+        return _chordToArc(chord), idx
+
+    def queryRadius(self, long, lati, radius):
+        '''
+        Function to find all stations within a radius of any number of points.
+
+        Parameters:
+            long, lati: longitudes and latitudes, any shape.
+            radius (float): radius in km.
+        Returns:
+            object array the shape of long with a list of station indexes for each point.
+        '''
+        points = _toXYZ(np.asarray(long, dtype=np.float64), np.asarray(lati, dtype=np.float64))
+        return self.tree.query_ball_point(points, _arcToChord(radius))
+
+    def neighbours(self, station, k=None, radius=None):
+        '''
+        Function to get the nearest stations of a station, using the cached distance matrix.
+
+        Parameters:
+            station (str): name of the station.
+            k (int): number of neighbours. (default all)
+            radius (float): only neighbours within this distance in km. (default no limit)
+        Returns:
+            Pandas series of distances (km) indexed by station name, nearest first.
+        '''
+        i = self.stations.index(station)
+        dist = pd.Series(self.distanceMatrix()[i], index=self.stations).drop(station).sort_values()
+        if radius is not None:
+            dist = dist[dist <= radius]
+        return dist.iloc[:k] if k is not None else dist
+
+
+def getStationIndex(info=None):
+    '''
+    Function to get a StationIndex of the stations.
+
+    Parameters:
+        info (DataFrame) Optional: station info, e.g. from removeStation(). default all stations.
+    Returns:
+        StationIndex. The index of all stations is cached until the location file changes.
+    '''
+    if info is not None:
+        return StationIndex(info)
+
+    path = os.path.abspath(_path(STATION_LOCATION_FILE))
+    key = (path, os.path.getmtime(path))
+    if key not in _station_index:
+        _station_index[key] = StationIndex(getStationInfo())
+    return _station_index[key]
+
+
+_land_mask = {} # {(mask file, mtime of coastline): mask}
+
+
+def _coastGrid(coastline, grid):
+    '''
+    Function to make the (x, y) grid over the coastline's bounding box, used by landMask(),
+    elevationGrid() and the mySignal interpolators.
+    '''
+    min_long, min_lat = coastline.min()
+    max_long, max_lat = coastline.max()
+    return np.meshgrid(np.linspace(min_long, max_long, int(grid[0])),
+                       np.linspace(min_lat, max_lat, int(grid[1])))
+
+
+def _insidePolygon(x, y, px, py):
+    '''
+    Function to test which points are inside a polygon (even-odd rule), vectorised.
+    The polygon can have several rings separated by NaN rows.
+
+    Parameters:
+        x, y: arrays of point coordinates, any shape.
+        px, py: arrays of polygon vertices.
+    Returns:
+        bool array the shape of x.
+    '''
+    # edges of every ring, closing each ring.
+    breaks = np.flatnonzero(np.isnan(px) | np.isnan(py))
+    x0, y0, x1, y1 = [], [], [], []
+    for ring in np.split(np.column_stack([px, py]), breaks):
+        ring = ring[~np.isnan(ring).any(axis=1)]
+        if len(ring) < 3:
+            continue
+        nxt = np.roll(ring, -1, axis=0)
+        x0.append(ring[:, 0]); y0.append(ring[:, 1]); x1.append(nxt[:, 0]); y1.append(nxt[:, 1])
+    x0, y0, x1, y1 = map(np.concatenate, (x0, y0, x1, y1))
+
+    # a point is inside if an odd number of edges cross the horizontal line left of it,
+    # the crossings are found once for every distinct y (one per row of a grid).
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    flat_x = x.ravel()
+    rows, inverse = np.unique(y.ravel(), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(rows) + 1))
+
+    inside = np.zeros(flat_x.shape, dtype=bool)
+    for k, row in enumerate(rows):
+        cross = (y0 > row) != (y1 > row)
+        xc = x0[cross] + (row - y0[cross])*(x1[cross] - x0[cross])/(y1[cross] - y0[cross])
+        xc.sort()
+        idx = order[bounds[k]:bounds[k + 1]]
+        inside[idx] = np.searchsorted(xc, flat_x[idx]) % 2 == 1
+    return inside.reshape(x.shape)
+
+
+def landMask(grid, refresh=False):
+    '''
+    Function to get the land cells of the coastline's bounding box grid (see mySignal.localInterp()).
+
+    The mask is calculated once per grid with a vectorised point-in-polygon test
+    against readCoastLine(), and saved in <data root>/.cache/ until the coastline file changes.
+
+    Parameters:
+        grid (tuple): grid cells (x, y)-axis.
+        refresh (bool): recalculate the mask. (default False)
+    Returns:
+        (y x x) bool array, True on land, matching np.meshgrid(xi, yi).
+    '''
+    coast_file = _path(COASTLINE_FILE)
+    root = os.path.abspath(MAINPATH)
+    mask_file = os.path.join(root, '.cache', 'landmask_{}x{}.npy'.format(int(grid[0]), int(grid[1])))
+    key = (mask_file, os.path.getmtime(coast_file))
+    if key in _land_mask and not refresh:
+        return _land_mask[key]
+
+    mask = None
+    if not refresh and os.path.exists(mask_file) and os.path.getmtime(mask_file) >= key[1]:
+        try:
+            mask = np.load(mask_file)
+        except (OSError, ValueError): # broken cache file.
+            mask = None
+
+    if mask is None:
+        coastline = readCoastLine()
+        xi, yi = _coastGrid(coastline, grid)
+        mask = _insidePolygon(xi, yi, coastline.long.values, coastline.lati.values)
+        try:
+            os.makedirs(os.path.dirname(mask_file), exist_ok=True)
+            tmp_file = '{}.{}.npy'.format(mask_file, os.getpid())
+            np.save(tmp_file, mask)
+            os.replace(tmp_file, mask_file)
+        except OSError: # read only data directory.
+            pass
+
+    mask.setflags(write=False)
+    _land_mask[key] = mask
+    return mask
+
+
+_elevation = {} # {(raster file, mtimes of sources): elevation raster}
+
+
+def elevationGrid(grid, refresh=False):
+    '''
+    Function to get the ground elevation of the coastline's bounding box grid (see mySignal.localInterp()).
+
+    The elevations are interpolated (linear) from ELEVATION_FILE, a (long, lati, elev) terrain
+    model in the data root. Ocean cells are 0 m. The raster is saved in <data root>/.cache/
+    until its sources change.
+
+    Parameters:
+        grid (tuple): grid cells (x, y)-axis.
+        refresh (bool): recalculate the raster. (default False)
+    Returns:
+        (y x x) array of elevations in m, matching np.meshgrid(xi, yi).
+    Raises:
+        FileNotFoundError if there is no ELEVATION_FILE. Interpolating the station elevations
+        instead would add no terrain information between the stations.
+    '''
+    elev_file = _path(ELEVATION_FILE)
+    if not os.path.exists(elev_file):
+        raise FileNotFoundError("elevationGrid needs a (long, lati, elev [m]) terrain model in {}".format(elev_file))
+    root = os.path.abspath(MAINPATH)
+    raster_file = os.path.join(root, '.cache', 'elevation_{}x{}.npz'.format(int(grid[0]), int(grid[1])))
+    key = (raster_file, os.path.getmtime(elev_file), os.path.getmtime(_path(COASTLINE_FILE)))
+    if key in _elevation and not refresh:
+        return _elevation[key]
+
+    raster = None
+    if not refresh and os.path.exists(raster_file) and os.path.getmtime(raster_file) >= max(key[1:]):
+        try:
+            with np.load(raster_file) as f:
+                raster = f['elev']
+        except (OSError, ValueError, KeyError): # broken cache file.
+            raster = None
+
+    if raster is None:
+        from scipy import interpolate
+
+        xi, yi = _coastGrid(readCoastLine(), grid)
+        land = landMask(grid)
+        points = pd.read_csv(elev_file, sep='\s+', names=['long', 'lati', 'elev'])
+        raster = np.zeros(xi.shape)
+        raster[land] = interpolate.griddata(points[['long', 'lati']].values, points.elev.values,
+                                            (xi[land], yi[land]), method='linear')
+        raster = np.nan_to_num(raster)
+        try:
+            os.makedirs(os.path.dirname(raster_file), exist_ok=True)
+            tmp_file = '{}.{}.npz'.format(raster_file, os.getpid())
+            np.savez(tmp_file, elev=raster)
+            os.replace(tmp_file, raster_file)
+        except OSError: # read only data directory.
+            pass
+
+    raster.setflags(write=False)
+    _elevation[key] = raster
+    return raster
+
+
 # List of functions. 
-function_list = [readCoastLine, readMinuteData, readHourData, getStationInfo, removeStation, getBasicStats]
+function_list = [setDataRoot, getDataRoot, getCatalog, findDataset, readCoastLine, readMinuteData, readHourData, readStations, getStationInfo, removeStation, computeBasicStats, getBasicStats, readPanel, readMinuteChunks, getStationIndex, landMask, elevationGrid]
@@ -1,3 +1,5 @@
 from .myDates import DateNumtoStr, DateStrtoNum, getRange
+from .myDates import resample, resampleChunks
+from .myDates import cycleIndex
 
 from .myDates import function_list
\ No newline at end of file
@@ -9,12 +9,17 @@ DateStrtoNum(datestr, dtype)
 DateNumtoStr(datenum, dtype, giveTime=False)
 
 NumToStr(datenum, giveTime = False)
+
+resample(times, values, width=1/24, stats=('mean', 'min', 'max', 'std', 'count'), partial=True)
+
+resampleChunks(chunks, width=1/24, stats=('mean', 'min', 'max', 'std', 'count'))
+
+cycleIndex(times, dtype='min', cycle='doy')
 '''
 
 
 import numpy as np
 from datetime import datetime
-from scipy import stats as sp_stats
 
 #  Date handling Function
 def DateStrtoNum(datestr, dtype):
@@ -106,6 +111,185 @@ def getRange(data, start, end):
     return tmp[tmp.times < end]
 
 
+def _binStats(blocks, stats):
+    '''
+    Function to calculate NaN-aware statistics of (..., bins x samples) blocks in one pass.
+    '''
+    valid = ~np.isnan(blocks)
+    count = valid.sum(axis=-1)
+    total = np.where(valid, blocks, 0).sum(axis=-1, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total/count
+
+    out = {}
+    if 'mean' in stats:
+        out['mean'] = mean
+    if 'std' in stats:
+        dev = np.where(valid, blocks - mean[..., None], 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out['std'] = np.sqrt((dev**2).sum(axis=-1)/count)
+    if 'min' in stats:
+        out['min'] = np.fmin.reduce(blocks, axis=-1) # fmin ignores NaNs.
+    if 'max' in stats:
+        out['max'] = np.fmax.reduce(blocks, axis=-1)
+    if 'count' in stats:
+        out['count'] = count
+    return out
+
+
+def resample(times, values, width=1/24, stats=('mean', 'min', 'max', 'std', 'count'), partial=True):
+    '''
+    Function to resample data on a uniform datenum grid into bins, e.g. minute data into hours.
+    The full bins are a (bins x samples) reshape (a view) of the data, so all
+    statistics are calculated in one vectorised pass without pandas.
+
+    Parameters:
+        times: [array] uniform date numbers, e.g. data.times.values.
+        values: [array] data with time on the last axis, (time) or (station x time).
+        width (float): bin width in days, default 1/24 (one hour). Bins start at multiples of width.
+        stats (tuple): statistics to calculate, any of 'mean', 'min', 'max', 'std', 'count'.
+        partial (bool): keep the incomplete bins at the start and end, default True.
+
+    Returns:
+        dict of times (start of each bin) and one (..., bins) array per statistic.
+        NaNs are ignored, bins with no data have count 0 and NaN statistics.
+        std is the population std (like np.nanstd).
+        Empty input gives empty arrays. A single sample has no spacing to work
+        out the samples per bin from, so it gives one (partial) bin, or none if partial=False.
+
+    Example:
+        hourly = myDates.resample(data.times.values, data.temperature.values, width=1/24)
+    '''
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values)
+    n = len(times)
+    if n < 2:
+        if n and partial:
+            start = np.floor(times[0]/width + 1e-6)*width
+            return dict(times=np.array([start]), **_binStats(values[..., None, :], stats))
+        return dict(times=np.empty(0), **{stat: np.empty(values.shape[:-1] + (0,)) for stat in stats})
+    dt = (times[-1] - times[0])/(n - 1)
+    k = int(round(width/dt)) # samples per bin.
+
+    # samples before the first bin boundary.
+    boundary = np.ceil(times[0]/width - 1e-6)*width
+    head = int(round((boundary - times[0])/dt)) % k
+    n_full = (n - head)//k
+    body_end = head + n_full*k
+
+    blocks, starts = [], []
+    if partial and head:
+        pad = np.full(values.shape[:-1] + (k - head,), np.nan)
+        blocks.append(np.concatenate([pad, values[..., :head]], axis=-1)[..., None, :])
+        starts.append(boundary - width)
+    if n_full:
+        blocks.append(values[..., head:body_end].reshape(values.shape[:-1] + (n_full, k)))
+        starts.append(boundary + np.arange(n_full)*width)
+    if partial and body_end < n:
+        pad = np.full(values.shape[:-1] + (k - (n - body_end),), np.nan)
+        blocks.append(np.concatenate([values[..., body_end:], pad], axis=-1)[..., None, :])
+        starts.append(boundary + n_full*width)
+
+    parts = [_binStats(b, stats) for b in blocks]
+    out = {'times': np.hstack(starts) if starts else np.empty(0)}
+    for stat in stats:
+        out[stat] = np.concatenate([p[stat] for p in parts], axis=-1) if parts else np.empty(values.shape[:-1] + (0,))
+    return out
+
+
+def resampleChunks(chunks, width=1/24, stats=('mean', 'min', 'max', 'std', 'count')):
+    '''
+    Generator to resample a stream of chunks, e.g. from myData.readMinuteChunks().
+    Samples of a bin that is split between chunks are carried to the next chunk,
+    so the results are the same as resample() on the whole record.
+
+    Parameters:
+        chunks: iterable of (times, values, ...) tuples with time on the last axis of each values array.
+        width (float): bin width in days, default 1/24 (one hour).
+        stats (tuple): statistics to calculate, see resample().
+
+    Yields:
+        (times, [stats dict for each values array]) of the complete bins in each chunk.
+    '''
+    carry = None
+    for chunk in chunks:
+        times, arrays = np.asarray(chunk[0], dtype=np.float64), [np.asarray(a) for a in chunk[1:]]
+        if carry is not None:
+            times = np.concatenate([carry[0], times])
+            arrays = [np.concatenate([c, a], axis=-1) for c, a in zip(carry[1], arrays)]
+        if len(times) < 2:
+            carry = (times, arrays)
+            continue
+
+        # keeping back the samples of the last (maybe incomplete) bin.
+        dt = times[1] - times[0]
+        last_bin = np.floor(times[-1]/width + 1e-6)*width
+        cut = int(np.searchsorted(times, last_bin - dt/2))
+        carry = (times[cut:], [a[..., cut:] for a in arrays])
+        if cut == 0:
+            continue
+
+        results = [resample(times[:cut], a[..., :cut], width, stats) for a in arrays]
+        yield results[0]['times'], results
+
+    if carry is not None and len(carry[0]):
+        # the carried samples are all in the last bin.
+        times, arrays = carry
+        start = np.floor(times[-1]/width + 1e-6)*width
+        yield np.array([start]), [_binStats(a[..., None, :], stats) for a in arrays]
+
+
+# Cached cycle indexes, {(dtype, cycle, n, first, middle, last): index array}.
+_cycle_cache = {}
+_CYCLE_CACHE_SIZE = 8
+
+CYCLE_LENGTH = {'doy': 366, 'hour': 24, 'doy-hour': 366*24}
+
+
+def cycleIndex(times, dtype='min', cycle='doy'):
+    '''
+    Function to convert date numbers into integer indexes of the annual or diurnal cycle.
+    Indexes of the last few time axes are cached, so repeated calls for the same
+    record (e.g. every station of a panel) don't recompute them.
+
+    Parameters:
+        times: [array] date numbers.
+        dtype (str): 'min' or 'hr' date numbers. See DateStrtoNum().
+        cycle (str): 'doy' (day of year, 0-365), 'hour' (hour of day, 0-23)
+                     or 'doy-hour' (doy*24 + hour). (default 'doy')
+
+    Returns:
+        int array of the same length as times.
+    '''
+    if cycle not in CYCLE_LENGTH:
+        raise ValueError("cycle must be one of {}".format(list(CYCLE_LENGTH)))
+    if dtype not in ('min', 'hr'):
+        raise ValueError("dtype must be 'min' or 'hr'")
+
+    times = np.asarray(times, dtype=np.float64)
+    n = len(times)
+    key = (dtype, cycle, n) + ((times[0], times[n//2], times[-1]) if n else ())
+    if key in _cycle_cache:
+        return _cycle_cache[key]
+
+    if dtype == 'hr': # hour date numbers count days from 2016-01-01.
+        times = times + datetime.toordinal(datetime(2016, 1, 1)) + 366
+
+    days = np.floor(times + 1e-9)
+    index = None
+    if cycle in ('doy', 'doy-hour'):
+        date = (days - 719529).astype(np.int64).astype('M8[D]') # 719529 is 1970-01-01.
+        index = (date - date.astype('M8[Y]').astype('M8[D]')).astype(np.int64)
+    if cycle in ('hour', 'doy-hour'):
+        hour = np.floor((times - days)*24 + 1e-6).astype(np.int64) % 24
+        index = hour if index is None else index*24 + hour
+
+    if len(_cycle_cache) >= _CYCLE_CACHE_SIZE:
+        _cycle_cache.pop(next(iter(_cycle_cache)))
+    index.setflags(write=False)
+    _cycle_cache[key] = index
+    return index
+
 
 # List of functions. 
-function_list = [DateStrtoNum, NumToStr, DateNumtoStr, getRange]
\ No newline at end of file
+function_list = [DateStrtoNum, NumToStr, DateNumtoStr, getRange, resample, resampleChunks, cycleIndex]
\ No newline at end of file
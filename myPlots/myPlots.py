@@ -7,8 +7,8 @@ Module for handling custom plotting functions
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from scipy import interpolate
+
+# matplotlib is imported inside the plotting functions to keep the import of this module fast.
 
 
 # from myData import getStationInfo # For testing
@@ -25,15 +25,18 @@ def plotLocalHeatMap(stuff,
     Function to plot a heat map after apply a scipy griddata.
 
     Parameters:
-        data (tuple): (xi, yi, zi, coastline, locs) *see applyGrid()
+        data (tuple): (xi, yi, zi, coastline, locs) *see mySignal.localInterp()
+            zi can be a masked array, masked cells show the ocean/land colour.
         useUnit (T/P): T for temperature units, P for pressure units.
         title (str): title of map.
         style (str): style used for coloring map (pcolor, contourf) default pcolor.
         fontsize (int): fontsize to use for labels default 12.
         axisLimits (bool): to apply axis limits on the plot, default False.
     '''
+    import matplotlib.pyplot as plt
+
     xi, yi, zi, VI_coast, stations = stuff
-    
+    zi = np.ma.masked_invalid(zi) # ocean and missing cells are left out instead of painted over.
 
     # Creating the Heatmap
     ax = plt.axes()
@@ -91,7 +94,10 @@ def plotGlobalHeatMap(stuff,
                  fontsize=12,
                  axisLimits=False):
 
-    xi, yi, temps, coastline, locations = stuff
+    import matplotlib.pyplot as plt
+
+    xi, yi, zi, coastline, locations = stuff
+    zi = np.ma.masked_invalid(zi) # ocean and missing cells are left out instead of painted over.
 
     ax = plt.axes()
     ax.set_facecolor('steelblue') # coloring ocean.
@@ -110,7 +116,7 @@ def plotGlobalHeatMap(stuff,
         c = plt.pcolor(xi, yi, zi, cmap=cmap)
         plt.rcParams['pcolor.shading'] = 'auto'
 
-    fontsize=12
+    cbar = plt.colorbar(c, format=barFormat, pad=0.02) # adding a color bar.
     plt.scatter(locations.long, 
                 locations.lati,
                 color='white',
@@ -122,6 +128,7 @@ def plotGlobalHeatMap(stuff,
     plt.legend(fontsize=fontsize)
     
     if axisLimits:
+        station_info = getStationInfo()
         maxs = station_info.max()[1:3] + 0.05
         mins = station_info.min()[1:3] - 0.05
         plt.xlim(mins.long)
@@ -1,3 +1,12 @@
 from .mySignal import localInterp, globalInterp, GetNS_NFFT, PowerSpectrumFFT, CI_psd, myWelch
+from .mySignal import EOF, chunkedEOF, projectEOF
+from .mySignal import crossValidate
+from .mySignal import fitLapseRate, toSeaLevel, fromSeaLevel
+from .mySignal import KernelInterpolator, kernelInterp
+from .mySignal import designFilter, filterBank, filterChunks
+from .mySignal import harmonicDesign, harmonicFit, harmonicFitChunks
+from .mySignal import dpssTapers, multitaper
+from .mySignal import bandAverage
+from .mySignal import waveletScales, cwt, cwtChunks
 
 from .mySignal import function_list
\ No newline at end of file
@@ -5,6 +5,10 @@ def applyGrid(data, stationInfo, grid, method=''):
     Function to apply a scipy griddata and interpolation for making a heatmap.
     Returns: (tuple): (xi, yi, zi, coastline, locs)
 
+localInterp(data, stationInfo, grid, method='', landOnly=True) / globalInterp(data, locs, grid, landOnly=True):
+    Functions to interpolate station data onto a grid, only the land cells (see myData.landMask())
+    are evaluated and zi is a masked array.
+
 GetNS_NFFT(data):
     Function to determine the best NS and NFFT for calculating the power spectral density (PSD).
     returns NS, NFFT.
@@ -12,78 +16,144 @@ GetNS_NFFT(data):
 PowerSpectrum(data, dt, rec_len):
     Function to calculate the power spectrum density (PSD) of a time series
     using the Fast Fourier Transform (fft) package from scipy.
+
+EOF(data, n_modes=3, method='svd', scale=False):
+    Function to calculate the empirical orthogonal functions (EOFs) of a (time x station) array.
+    Returns dict of modes, pcs (principal components), variance (explained) and eigenvalues.
+
+chunkedEOF(chunks, n_modes=3):
+    Function to calculate EOFs of a long record one chunk at a time.
+
+projectEOF(data, eof):
+    Function to calculate the principal components of data on a set of EOFs.
+
+crossValidate(values, stationInfo, method='idw', workers=None):
+    Function to validate the interpolation by leaving out one station at a time, for every time step.
+    Returns dict of the predictions and a table of rmse and bias for each station.
+
+fitLapseRate(values, elev, per_step=False):
+    Function to fit the temperature lapse rate by regression on station elevation.
+
+toSeaLevel(values, elev, variable='temperature', lapse_rate=LAPSE_RATE, temperature=None) /
+fromSeaLevel(values, elev, variable='temperature', lapse_rate=LAPSE_RATE, temperature=None):
+    Functions to reduce (time x station) data to sea level before interpolating, and to
+    restore interpolated grids to the ground elevation (see myData.elevationGrid()).
+
+KernelInterpolator(stationInfo, grid, kernel='gaussian', length_scale=None, noise=1e-6, landOnly=True):
+    Class for radial basis function (kriging) interpolation onto the heat map grid, with the
+    kernel factorisation cached so each time step costs one triangular solve.
+
+kernelInterp(data, stationInfo, grid, kernel='gaussian', length_scale=None, noise=1e-6, landOnly=True):
+    Function to apply a cached KernelInterpolator, returns (xi, yi, zi, coastline, locs).
+
+designFilter(band, fs, order=4):
+    Function to design (and cache) a Butterworth filter for a band in FILTER_BANDS or (low, high).
+
+filterBank(values, bands, fs, order=4, zero_phase=True):
+    Function to filter (station x time) data into several frequency bands in one call.
+
+filterChunks(chunks, bands, fs, order=4):
+    Generator to causally filter a stream of chunks, carrying the filter state between chunks.
+
+harmonicDesign(times, freqs=('S1', 'S2')):
+    Function to build (and cache) the least squares design matrix of harmonics for a time axis.
+
+harmonicFit(times, values, freqs=('S1', 'S2'), return_fit=False):
+    Function to fit harmonic amplitudes and phases to many series with one least squares solve.
+
+harmonicFitChunks(chunks, freqs=('S1', 'S2')):
+    Function to fit harmonics to a record read in chunks by accumulating the normal equations.
+
+dpssTapers(N, NW=4, K=None):
+    Function to get (and cache) the DPSS tapers of a record length.
+
+multitaper(x, fs=1.0, NW=4, K=None, interval=0.95):
+    Function to calculate the multitaper PSD of (station x time) arrays with chi-squared confidence bounds.
+
+bandAverage(freqs, psd, bins_per_decade=10, dof=2, interval=0.95, variance_preserving=False, bandwidth=None):
+    Function to average a PSD in log spaced frequency bands with CI_psd bounds from the band
+    degrees of freedom, optionally variance preserving (freqs*PSD).
+
+waveletScales(N, dt, dj=0.125, s0=None, max_scale=None):
+    Function to make log spaced wavelet scales.
+
+cwt(x, dt, scales=None, omega0=6, return_coef=False):
+    Function to calculate the Morlet wavelet power of (station x time) arrays with cached
+    wavelet spectra, returns the power, periods and cone of influence.
+
+cwtChunks(chunks, dt, scales, omega0=6, return_coef=False, means=None):
+    Generator to calculate the wavelet power of a stream of chunks in bounded memory.
 '''
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-from scipy.fft import fft, fftfreq, fftshift
-from scipy import interpolate
-from scipy import stats as sp_stats
-from scipy import signal
+
+# scipy is imported inside the functions that use it to keep the import of this module fast.
 
 # from myData import readCoastLine # for testing
-from ..myData import readCoastLine
+from ..myData import readCoastLine, landMask
+from ..myData.myData import _coastGrid, _toXYZ, _chordToArc
 
-def globalInterp(data, locs, grid):
+def globalInterp(data, locs, grid, landOnly=True):
     '''
-    Function to apply a global interpolation.
+    Function to apply a global interpolation (inverse distance squared weighting of all stations).
+
+    This replaces the old globalInterp, which was wrong: it used the coastline points as the
+    grid coordinates instead of the grid cells. Only land cells are calculated by default
+    (landOnly=True), so zi is a masked array with the ocean masked; pass landOnly=False for
+    the whole bounding box. A cell on top of a station takes that station's value.
 
     Parameters:
         grid (tuple) - grid cell (x, y)-axis.
         data - data to be analyzed
         locs - station locations
+        landOnly (bool) - only interpolate the land cells, see myData.landMask(). default True.
+
+    Returns: (tuple): (xi, yi, zi, coastline, locs)
+        zi: masked array, ocean cells are masked if landOnly.
     '''
     coastline = readCoastLine()
-    
-    # Doing global Interpolation.
-    temps = np.zeros((grid[1], grid[0]))
-    for i in range(grid[0]):
-        for j in range(grid[1]):
-            r_sq = (coastline.long[i] - locs.long)**2 + (coastline.lati[j] - locs.lati)**2
-            w = 1/r_sq
-            w = w/sum(w)
-            temps[j, i] = np.multiply(w, data.values).sum()
-
-    # Applying gridding.
-    # Getting min and max for long and lati for gridding.
-    min_long, min_lat = coastline.min()
-    max_long, max_lat = coastline.max()
-
-    # Creating grids for gridding data.
-    xi = np.linspace(min_long, max_long, int(grid[0]))
-    yi = np.linspace(min_lat, max_lat, int(grid[1]))
-    xi, yi = np.meshgrid(xi, yi)
-    zi = temps # just for understanding
-
-    return xi, yi, zi, coastline, locs
-
-def localInterp(data, stationInfo, grid, method=''):
+    xi, yi = _coastGrid(coastline, grid)
+    land = landMask(grid) if landOnly else np.ones(xi.shape, dtype=bool)
+
+    # Doing global Interpolation, all land cells at once.
+    values = np.asarray(data, dtype=np.float64)
+    r_sq = (xi[land][:, None] - np.asarray(locs.long))**2 + (yi[land][:, None] - np.asarray(locs.lati))**2
+    w = 1/np.maximum(r_sq, 1e-12) # a cell on a station gets (almost) all the weight.
+    w /= w.sum(axis=1, keepdims=True)
+
+    zi = np.full(xi.shape, np.nan)
+    zi[land] = w @ values
+    return xi, yi, np.ma.masked_array(zi, ~land), coastline, locs
+
+def localInterp(data, stationInfo, grid, method='', landOnly=True):
     '''
     Function to apply a griddata and locally interpolate using scipy
     interpolate.griddata to make a heat map.
+
+    Only land cells are interpolated by default (landOnly=True), so zi is a masked array
+    with the ocean masked; pass landOnly=False for the whole bounding box as before.
     
     Parameters:
         data: data to be analized.
         StationInfo (DataFrame): dataframe of stations' info.
         grid (tuple): grid cells (x, y)-axis.
         method (str): method to use for the intepolation, default = cubic.
+        landOnly (bool): only interpolate the land cells, see myData.landMask(). default True.
         
     Returns: (tuple): (xi, yi, zi, coastline, locs)
         xi & yi: arrays representing the coordinates of a grid.
+        zi: masked array, ocean cells are masked if landOnly.
         coastline: DataFrame for the coastline.
         locs: DataFrame for station locations. 
         
     '''
     coastline = readCoastLine() # getting coastal line.
-    
-    # Getting min and max for long and lati for gridding.
-    min_long, min_lat = coastline.min()
-    max_long, max_lat = coastline.max()
-
-    # Creating grids for gridding data.
-    xi = np.linspace(min_long, max_long, int(grid[0]))
-    yi = np.linspace(min_lat, max_lat, int(grid[1]))
-    xi, yi = np.meshgrid(xi, yi)
+    xi, yi = _coastGrid(coastline, grid)
+    land = landMask(grid) if landOnly else np.ones(xi.shape, dtype=bool)
     
     if method == '':
         method = 'cubic'
@@ -93,9 +163,12 @@ def localInterp(data, stationInfo, grid, method=''):
         locs = pd.concat([stationInfo.long, stationInfo.lati], axis=1)
     
         
+    from scipy import interpolate
+
     # Doing the interpolation.
-    zi = interpolate.griddata(locs, data, (xi, yi), method=method)
-    return xi, yi, zi, coastline, locs
+    zi = np.full(xi.shape, np.nan)
+    zi[land] = interpolate.griddata(locs, data, (xi[land], yi[land]), method=method)
+    return xi, yi, np.ma.masked_array(zi, ~land), coastline, locs
 
 def GetNS_NFFT(data, showInfo=False):
     '''
@@ -141,6 +214,8 @@ def PowerSpectrumFFT(data, dt, rec_len):
         Frequency points [array]: array of frquencies associated with the PSD.
 
     '''
+    from scipy.fft import fft, fftfreq
+
     xs = np.arange(0, rec_len, dt)
     N = len(xs)
 
@@ -151,7 +226,7 @@ def PowerSpectrumFFT(data, dt, rec_len):
 
     return PSD, freqs
 
-def CI_psd(NS, interval=0.95, boxcar=False):
+def CI_psd(NS, interval=0.95, boxcar=False, dof=None):
     '''
     Function to calculate the confidence interval of a power spectral density (PSD)
     based on the chi-squared distribution.
@@ -160,15 +235,21 @@ def CI_psd(NS, interval=0.95, boxcar=False):
         NS: number of sub sections.
         interval: default 95%, confidence interval as decimal.
         boxcar: default False, bool var for if a boxcar method was used to calculate the PSD.
+        dof: default None, degrees of freedom to use instead of NS (number or array, e.g. per frequency).
         
     Returns: 
         lower and upper bounds
     '''
-    M = 2*NS-1 # number of subsections
-    
-    nu = (4/3)*M # degrees of freedom
-    if boxcar:
-        nu = 2*M
+    from scipy import stats as sp_stats
+
+    if dof is not None: # e.g. multitaper or band averaged PSDs.
+        nu = np.asarray(dof, dtype=np.float64)
+    else:
+        M = 2*NS-1 # number of subsections
+
+        nu = (4/3)*M # degrees of freedom
+        if boxcar:
+            nu = 2*M
 
     l = nu/sp_stats.chi2.ppf(1 - (1-interval)/2, nu)
     h = nu/sp_stats.chi2.ppf((1 - interval)/2, nu)
@@ -200,11 +281,1168 @@ def myWelch(x, fs=1.0, window='hann', nperseg=None, noverlap=None):
         case '50%':
             noverlap = NFFT // 2
 
+    from scipy import signal
+
+    x = np.asarray(x, dtype=np.float64) # float32 data are upcast so the PSD keeps full precision.
+
     ff, Pxx = signal.welch(x=x, fs=fs, window=window, nperseg=nperseg, noverlap=noverlap)
 
     return ff, Pxx
 
 
+def _randomizedSVD(X, k, n_oversamples=10, n_iter=4, seed=None):
+    '''
+    Function to calculate the first k singular values/vectors with a randomised SVD.
+    '''
+    rng = np.random.default_rng(seed)
+    n = min(k + n_oversamples, min(X.shape))
+
+    # range finder with power iterations.
+    Q = np.linalg.qr(X @ rng.standard_normal((X.shape[1], n)))[0]
+    for i in range(n_iter):
+        Q = np.linalg.qr(X.T @ Q)[0]
+        Q = np.linalg.qr(X @ Q)[0]
+
+    U, S, Vt = np.linalg.svd(Q.T @ X, full_matrices=False)
+    return (Q @ U)[:, :k], S[:k], Vt[:k]
+
+
+def _fixSigns(modes, pcs=None):
+    '''
+    Function to make the largest value of each mode positive so the signs are repeatable.
+    '''
+    idx = np.abs(modes).argmax(axis=1)
+    signs = np.sign(modes[np.arange(len(modes)), idx])
+    signs[signs == 0] = 1
+    if pcs is not None:
+        pcs *= signs
+    modes *= signs[:, None]
+    return modes, pcs
+
+
+def EOF(data, n_modes=3, method='svd', scale=False, seed=None):
+    '''
+    Function to calculate the empirical orthogonal functions (EOFs) of a (time x station) array.
+    The modes come from a thin or randomised SVD of the anomalies, the covariance matrix is never built.
+
+    Parameters:
+        data: [array_like] (time x station) array, e.g. temperatures of each station side by side.
+              Time steps with a NaN at any station are left out of the fit.
+        n_modes (optional): [int] number of modes to return. (default 3)
+        method (optional): [str] 'svd' for a thin SVD, 'randomized' for a randomised SVD. (default 'svd')
+        scale (optional): [bool] divide each station by its std (correlation EOFs). (default False)
+        seed (optional): seed for the randomised SVD.
+
+    Returns:
+        dict of:
+            modes: (n_modes x station) array, can be mapped with localInterp(modes[i], stationInfo, grid).
+            pcs: (time x n_modes) principal components (NaN where a station was missing).
+            variance: fraction of the total variance explained by each mode.
+            eigenvalues: variance of each mode.
+            mean, std: station means (and stds) removed before the fit.
+    '''
+    X = np.asarray(data, dtype=np.float64)
+    good = np.isfinite(X).all(axis=1)
+    Xg = X[good]
+
+    mean = Xg.mean(axis=0)
+    std = Xg.std(axis=0) if scale else np.ones(X.shape[1])
+    A = (Xg - mean)/std
+
+    n_modes = min(n_modes, min(A.shape))
+    if method == 'randomized':
+        U, S, Vt = _randomizedSVD(A, n_modes, seed=seed)
+    elif method == 'svd':
+        U, S, Vt = np.linalg.svd(A, full_matrices=False)
+        U, S, Vt = U[:, :n_modes], S[:n_modes], Vt[:n_modes]
+    else:
+        raise ValueError("method must be 'svd' or 'randomized'.")
+
+    total = (A**2).sum() # total variance without needing all the singular values.
+    pcs = np.full((X.shape[0], n_modes), np.nan)
+    pcs[good] = U*S
+    modes, pcs = _fixSigns(Vt.copy(), pcs)
+
+    return {'modes': modes,
+            'pcs': pcs,
+            'variance': S**2/total,
+            'eigenvalues': S**2/(len(A) - 1),
+            'mean': mean,
+            'std': std}
+
+
+def chunkedEOF(chunks, n_modes=3, scale=None):
+    '''
+    Function to calculate EOFs of a long record one chunk at a time, e.g. minute data.
+    Each chunk is merged into a small (station x station) R factor with a QR decomposition
+    (with the chunk means merged like Chan's parallel variance), so memory is one chunk.
+
+    Parameters:
+        chunks: iterable of (time x station) arrays. Rows with a NaN are left out.
+        n_modes (optional): [int] number of modes to return. (default 3)
+        scale (optional): [array_like] station stds to divide by (correlation EOFs). (default None)
+
+    Returns:
+        dict of modes, variance, eigenvalues, mean, std and n (number of time steps used).
+        Use projectEOF() to get the principal components of any chunk.
+    '''
+    R, mean, n = None, None, 0
+    for chunk in chunks:
+        X = np.asarray(chunk, dtype=np.float64)
+        X = X[np.isfinite(X).all(axis=1)]
+        if scale is not None:
+            X = X/np.asarray(scale)
+        m = len(X)
+        if m == 0:
+            continue
+
+        chunk_mean = X.mean(axis=0)
+        rows = [X - chunk_mean]
+        if R is None:
+            mean = chunk_mean
+        else:
+            # correction for the difference between the running and chunk means.
+            rows = [R] + rows + [np.sqrt(n*m/(n + m))*(mean - chunk_mean)[None, :]]
+            mean = mean + (chunk_mean - mean)*m/(n + m)
+        R = np.linalg.qr(np.vstack(rows), mode='r')
+        n += m
+
+    if R is None:
+        raise ValueError("chunks contain no complete time steps.")
+
+    S, Vt = np.linalg.svd(R, full_matrices=False)[1:]
+    n_modes = min(n_modes, len(S))
+    modes = _fixSigns(Vt[:n_modes].copy())[0]
+    std = np.ones(len(mean)) if scale is None else np.asarray(scale, dtype=np.float64)
+
+    return {'modes': modes,
+            'variance': S[:n_modes]**2/(S**2).sum(),
+            'eigenvalues': S[:n_modes]**2/(n - 1),
+            'mean': mean*std,
+            'std': std,
+            'n': n}
+
+
+def projectEOF(data, eof):
+    '''
+    Function to calculate the principal components of data on a set of EOFs.
+
+    Parameters:
+        data: [array_like] (time x station) array.
+        eof: dict from EOF() or chunkedEOF().
+
+    Returns:
+        (time x n_modes) array of principal components.
+    '''
+    X = (np.asarray(data, dtype=np.float64) - eof['mean'])/eof['std']
+    return X @ eof['modes'].T
+
+
+_INTERPOLATORS = {'nearest': 'NearestNDInterpolator', 'linear': 'LinearNDInterpolator', 'cubic': 'CloughTocher2DInterpolator'}
+
+
+def _idwLeaveOneOut(values, points):
+    '''
+    Function to predict every station from all the others with inverse distance squared
+    weighting (as globalInterp), for all time steps and stations at once.
+    '''
+    r_sq = ((points[:, None, :] - points[None, :, :])**2).sum(axis=-1)
+    np.fill_diagonal(r_sq, np.inf) # a station has no weight on itself.
+    w = 1/r_sq
+
+    # NaN stations are left out of the weights at each time step.
+    valid = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (np.where(valid, values, 0) @ w)/(valid @ w)
+
+
+def _foldWorker(args):
+    '''
+    Function to predict one held-out station at every time step from the other stations
+    with a scipy interpolator, runs in the process pool.
+    The triangulation is built once for each pattern of missing stations.
+    '''
+    from scipy import interpolate
+    from scipy.spatial import Delaunay
+
+    values, points, target, method = args
+    Interpolator = getattr(interpolate, _INTERPOLATORS[method])
+
+    predicted = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    patterns, inverse = np.unique(valid, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    for k, pattern in enumerate(patterns):
+        rows = np.flatnonzero(inverse == k)
+        if pattern.sum() < (1 if method == 'nearest' else 3):
+            continue
+        try:
+            tri = points[pattern] if method == 'nearest' else Delaunay(points[pattern])
+        except Exception: # e.g. the remaining stations are on a line.
+            continue
+        # all time steps with this pattern are interpolated at once (values as extra dimensions).
+        predicted[rows] = Interpolator(tri, values[rows][:, pattern].T)(target[None, :])[0]
+    return predicted
+
+
+def crossValidate(values, stationInfo, method='idw', workers=None):
+    '''
+    Function to validate interpolation by leaving out one station at a time and
+    predicting it from the others at every time step.
+
+    The distances (idw) are calculated once for all folds and time steps, and
+    the triangulations (griddata methods) once per fold and pattern of missing
+    stations, so whole records are validated in one call. The folds are spread
+    across a process pool.
+
+    Parameters:
+        values: [array] data, (time x station) or (station) for one time step.
+                Columns in the order of stationInfo, e.g. StationPanel.matrix('temperature').
+        stationInfo (DataFrame): stations' info with long and lati, see myData.getStationInfo().
+        method (str): 'idw' (as globalInterp), or 'linear', 'cubic', 'nearest' (as localInterp).
+                      default 'idw'.
+        workers (int): number of processes for the folds (default number of cpus).
+                       Use 1 to run in the current process.
+
+    Returns:
+        dict of:
+            predicted: (time x station) array of the held-out predictions.
+            table: DataFrame of rmse, bias (predicted - observed) and count for each station.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    single = values.ndim == 1
+    values = np.atleast_2d(values)
+    points = np.column_stack([np.asarray(stationInfo.long, dtype=np.float64),
+                              np.asarray(stationInfo.lati, dtype=np.float64)])
+    n_stations = len(points)
+    if values.shape[1] != n_stations:
+        raise ValueError("values must have one column per station ({}), got {}".format(n_stations, values.shape))
+
+    if method == 'idw':
+        predicted = _idwLeaveOneOut(values, points)
+    elif method in _INTERPOLATORS:
+        jobs = [(np.delete(values, j, axis=1), np.delete(points, j, axis=0), points[j], method)
+                for j in range(n_stations)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers == 1:
+            results = [_foldWorker(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                results = list(pool.map(_foldWorker, jobs))
+        predicted = np.column_stack(results)
+    else:
+        raise ValueError("method must be 'idw' or one of {}".format(list(_INTERPOLATORS)))
+
+    error = predicted - values
+    valid = ~np.isnan(error)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bias = np.where(valid, error, 0).sum(axis=0)/count
+        rmse = np.sqrt(np.where(valid, error**2, 0).sum(axis=0)/count)
+
+    names = list(stationInfo.station) if 'station' in stationInfo else list(range(n_stations))
+    table = pd.DataFrame({'rmse': rmse, 'bias': bias, 'count': count}, index=pd.Index(names, name='station'))
+    return {'predicted': predicted[0] if single else predicted, 'table': table}
+
+
+LAPSE_RATE = 0.0065     # standard atmosphere temperature lapse rate [degC/m].
+_PRESSURE_EXP = 5.2559  # g/(R*L) of the standard atmosphere.
+
+
+def _lapseShape(lapse_rate, values, elev):
+    '''
+    Function to broadcast a lapse rate or temperature (a number, one per time step or an array
+    the shape of values) against (time x ...) values. A 1d array is one per time step
+    whenever values have a time axis, even if there are as many stations as time steps.
+    '''
+    lapse_rate = np.asarray(lapse_rate, dtype=np.float64)
+    if lapse_rate.ndim == 1 and np.ndim(values) > np.ndim(elev):
+        lapse_rate = lapse_rate.reshape((-1,) + (1,)*np.ndim(elev))
+    return lapse_rate
+
+
+def _pressureRatio(values, elev, lapse_rate, temperature):
+    '''
+    Function to get the ratio of the pressure at elev to the sea level pressure, for a
+    temperature falling by lapse_rate from the sea level temperature (isothermal for 0).
+    '''
+    L = _lapseShape(lapse_rate, values, elev)
+    t0 = _lapseShape(15.0 if temperature is None else temperature, values, elev) + 273.15
+    g_R = _PRESSURE_EXP*LAPSE_RATE  # g/R.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = (1 - L*elev/t0)**(g_R/L)
+    return np.where(np.abs(L) < 1e-9, np.exp(-g_R*elev/t0), ratio)
+
+
+def fitLapseRate(values, elev, per_step=False):
+    '''
+    Function to fit the temperature lapse rate by regression of temperature on station elevation.
+
+    Parameters:
+        values: [array] temperatures, (time x station).
+        elev: [array] station elevations in m, e.g. getStationInfo().elev.
+        per_step (bool): fit a lapse rate for every time step instead of one for the record. default False.
+
+    Returns:
+        lapse rate(s) in degC/m (positive when temperature drops with height).
+    '''
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    elev = np.asarray(elev, dtype=np.float64)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+
+    # least squares slope at every time step at once, leaving out NaN stations.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(valid, elev, 0)
+        z_mean = z.sum(axis=1)/count
+        t_mean = np.where(valid, values, 0).sum(axis=1)/count
+        dz = np.where(valid, elev - z_mean[:, None], 0)
+        sxy = (dz*np.where(valid, values - t_mean[:, None], 0)).sum(axis=1)
+        sxx = (dz**2).sum(axis=1)
+        if per_step:
+            return -sxy/sxx
+        # pooled slope of the anomalies from each time step's mean.
+        return -np.nansum(sxy)/np.nansum(sxx)
+
+
+def toSeaLevel(values, elev, variable='temperature', lapse_rate=LAPSE_RATE, temperature=None):
+    '''
+    Function to reduce temperature or pressure of all stations to sea level, e.g. before interpolating.
+
+    Parameters:
+        values: [array] data, (time x station) or (station).
+        elev: [array] station elevations in m.
+        variable (str): 'temperature' or 'pressure'.
+        lapse_rate: temperature lapse rate in degC/m, a number or one per time step. See fitLapseRate().
+                    The pressure reduction uses it for the temperature profile too. (default standard atmosphere)
+        temperature: sea level temperature in degC for the pressure reduction, a number, one per
+                     time step or the shape of values, e.g. toSeaLevel(temperature, elev). default 15 degC.
+
+    Returns:
+        array of sea level values, the shape of values.
+    '''
+    values = np.asarray(values)
+    elev = np.asarray(elev, dtype=np.float64)
+    if variable == 'temperature':
+        return values + _lapseShape(lapse_rate, values, elev)*elev
+    if variable == 'pressure':
+        return values/_pressureRatio(values, elev, lapse_rate, temperature)
+    raise ValueError("variable must be 'temperature' or 'pressure'")
+
+
+def fromSeaLevel(values, elev, variable='temperature', lapse_rate=LAPSE_RATE, temperature=None):
+    '''
+    Function to restore sea level temperature or pressure to the ground elevation,
+    e.g. on an interpolated grid with myData.elevationGrid().
+
+    Parameters:
+        values: [array] sea level data, (time x station), (y x x) grid or (time x y x x) grids.
+        elev: [array] elevations in m, broadcast against the last axes of values.
+        variable (str): 'temperature' or 'pressure'.
+        lapse_rate: temperature lapse rate in degC/m, a number or one per time step, also used
+                    for the pressure. (default standard atmosphere)
+        temperature: sea level temperature in degC for the pressure, a number, one per time step
+                     or the shape of values. default 15 degC.
+
+    Returns:
+        array of values at the ground elevation, the shape of values (masked arrays stay masked).
+    '''
+    elev = np.asarray(elev, dtype=np.float64)
+    if variable == 'temperature':
+        return values - _lapseShape(lapse_rate, values, elev)*elev
+    if variable == 'pressure':
+        return values*_pressureRatio(values, elev, lapse_rate, temperature)
+    raise ValueError("variable must be 'temperature' or 'pressure'")
+
+
+_KERNELS = {
+    'gaussian': lambda r: np.exp(-0.5*r**2),
+    'exponential': lambda r: np.exp(-r),
+    'matern32': lambda r: (1 + np.sqrt(3)*r)*np.exp(-np.sqrt(3)*r),
+}
+
+
+class KernelInterpolator:
+    '''
+    Class for radial basis function (Gaussian process / simple kriging) interpolation
+    of station data onto the heat map grid.
+
+    The kernel matrix of the fixed station set is Cholesky factorised once and the
+    grid-by-station kernel product is cached, so each time step only costs one
+    triangular solve and one matrix product. (time x station) blocks are solved
+    as one matrix right hand side. Time steps with missing stations use a
+    factorisation of the remaining stations, cached for each pattern of missing stations.
+
+    Unlike localInterp there are no NaNs outside the station convex hull; far from
+    the stations the interpolation relaxes to the mean of the stations.
+
+    Attributes:
+        xi, yi: (y x x) grid coordinates, see localInterp().
+        land: (y x x) bool array of the evaluated cells.
+        length_scale (float): kernel length scale in km.
+
+    Example:
+        gp = mySignal.KernelInterpolator(info, (100, 100))
+        zi = gp.predict(panel.matrix('temperature')[::60])   # (time x y x x) masked array.
+        myPlots.plotLocalHeatMap(gp.interp(means))
+    '''
+
+    def __init__(self, stationInfo, grid, kernel='gaussian', length_scale=None, noise=1e-6, landOnly=True):
+        '''
+        Parameters:
+            stationInfo (DataFrame): stations' info with long and lati.
+            grid (tuple): grid cells (x, y)-axis.
+            kernel (str): 'gaussian', 'exponential' or 'matern32'. (default 'gaussian')
+            length_scale (float): length scale in km, distances are great circle distances as
+                                  myData.StationIndex. (default median distance between stations)
+            noise (float): noise variance relative to the signal variance, smooths
+                           instead of passing exactly through the stations. (default 1e-6)
+            landOnly (bool): only evaluate the land cells, see myData.landMask(). (default True)
+        '''
+        if kernel not in _KERNELS:
+            raise ValueError("kernel must be one of {}".format(list(_KERNELS)))
+
+        self.coastline = readCoastLine()
+        self.xi, self.yi = _coastGrid(self.coastline, grid)
+        self.land = landMask(grid) if landOnly else np.ones(self.xi.shape, dtype=bool)
+        self.locs = pd.concat([stationInfo.long, stationInfo.lati], axis=1)
+
+        # great circle distances in km, as myData.StationIndex.
+        from scipy.spatial.distance import cdist
+
+        stations = _toXYZ(stationInfo.long.values, stationInfo.lati.values)
+        cells = _toXYZ(self.xi[self.land], self.yi[self.land])
+        d_ss = _chordToArc(cdist(stations, stations))
+        if length_scale is None:
+            length_scale = np.median(d_ss[np.triu_indices(len(stations), 1)])
+        self.length_scale = float(length_scale)
+        self.kernel = kernel
+        self.noise = noise
+
+        k = _KERNELS[kernel]
+        self._K = k(d_ss/self.length_scale) + noise*np.eye(len(stations))
+        self._Kgs = k(_chordToArc(cdist(cells, stations))/self.length_scale)
+        self._factors = {}
+
+    def __repr__(self):
+        return 'KernelInterpolator({} stations, {} cells, {}, length_scale={:.1f} km)'.format(
+            len(self.locs), int(self.land.sum()), self.kernel, self.length_scale)
+
+    def _factor(self, pattern):
+        '''
+        Function to get the Cholesky factor of the kernel matrix of the stations in pattern,
+        and the grid product A = Kgs L^-T. Cached for each pattern.
+        '''
+        key = pattern.tobytes()
+        if key not in self._factors:
+            from scipy import linalg
+
+            L = linalg.cholesky(self._K[np.ix_(pattern, pattern)], lower=True)
+            A = linalg.solve_triangular(L, self._Kgs[:, pattern].T, lower=True).T
+            self._factors[key] = (L, A)
+        return self._factors[key]
+
+    def predict(self, values, return_std=False):
+        '''
+        Function to interpolate station data onto the grid.
+
+        Parameters:
+            values: [array] data, (station) or (time x station) in the order of stationInfo.
+            return_std (bool): also return the relative interpolation error (0 at the stations,
+                               1 far from them) of each cell. (default False)
+        Returns:
+            (y x x) or (time x y x x) masked array, ocean cells masked if landOnly.
+            With return_std, (zi, std) where std has the same shape.
+        '''
+        from scipy import linalg
+
+        values = np.asarray(values, dtype=np.float64)
+        single = values.ndim == 1
+        values = np.atleast_2d(values)
+
+        n_cells = self._Kgs.shape[0]
+        out = np.full((len(values), n_cells), np.nan)
+        std = np.full((len(values), n_cells), np.nan) if return_std else None
+
+        valid = ~np.isnan(values)
+        patterns, inverse = np.unique(valid, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, pattern in enumerate(patterns):
+            if not pattern.any():
+                continue
+            rows = np.flatnonzero(inverse == k)
+            L, A = self._factor(pattern)
+
+            # simple kriging about the station mean of each time step.
+            y = values[np.ix_(rows, np.flatnonzero(pattern))]
+            mean = y.mean(axis=1, keepdims=True)
+            beta = linalg.solve_triangular(L, (y - mean).T, lower=True)
+            out[rows] = (A @ beta).T + mean
+            if return_std:
+                std[rows] = np.sqrt(np.clip(1 - (A**2).sum(axis=1), 0, None))
+
+        zi = np.full((len(values),) + self.xi.shape, np.nan)
+        zi[:, self.land] = out
+        zi = np.ma.masked_array(zi, np.broadcast_to(~self.land, zi.shape))
+        if return_std:
+            s = np.full(zi.shape, np.nan)
+            s[:, self.land] = std
+            s = np.ma.masked_array(s, zi.mask)
+            return (zi[0], s[0]) if single else (zi, s)
+        return zi[0] if single else zi
+
+    def interp(self, data):
+        '''
+        Function to interpolate one time step and return the tuple used by the heat map plots.
+
+        Returns: (tuple): (xi, yi, zi, coastline, locs), see localInterp().
+        '''
+        return self.xi, self.yi, self.predict(data), self.coastline, self.locs
+
+
+_kernel_cache = {} # {(stations, grid, kernel, length_scale, noise, landOnly): KernelInterpolator}
+
+
+def kernelInterp(data, stationInfo, grid, kernel='gaussian', length_scale=None, noise=1e-6, landOnly=True):
+    '''
+    Function to apply a radial basis function (kriging) interpolation to make a heat map.
+    The interpolator of each station set and grid is cached, see KernelInterpolator.
+
+    Parameters:
+        data: data to be analized, (station) or (time x station).
+        stationInfo (DataFrame): dataframe of stations' info.
+        grid (tuple): grid cells (x, y)-axis.
+        kernel (str): 'gaussian', 'exponential' or 'matern32', default 'gaussian'.
+        length_scale (float): length scale in km, default median distance between stations.
+        noise (float): relative noise variance, default 1e-6.
+        landOnly (bool): only interpolate the land cells. default True.
+
+    Returns: (tuple): (xi, yi, zi, coastline, locs), see localInterp().
+    '''
+    locs = np.column_stack([np.asarray(stationInfo.long, dtype=np.float64),
+                            np.asarray(stationInfo.lati, dtype=np.float64)])
+    key = (locs.tobytes(), tuple(int(g) for g in grid), kernel, length_scale, noise, landOnly)
+    if key not in _kernel_cache:
+        if len(_kernel_cache) >= 8:
+            _kernel_cache.pop(next(iter(_kernel_cache)))
+        _kernel_cache[key] = KernelInterpolator(stationInfo, grid, kernel, length_scale, noise, landOnly)
+
+    gp = _kernel_cache[key]
+    return gp.xi, gp.yi, gp.predict(np.asarray(data)), gp.coastline, gp.locs
+
+
+# Frequency bands in cycles per day (low, high), None for a low or high pass.
+FILTER_BANDS = {
+    'seasonal': (None, 1/30),     # periods longer than a month.
+    'synoptic': (1/30, 1/2),      # weather systems, 2 days to a month.
+    'diurnal': (1/2, 3),          # daily cycle and its first harmonics.
+    'highpass': (3, None),        # periods shorter than 8 hours.
+}
+
+_sos_cache = {} # {(low, high, fs, order): second order sections}
+
+
+def designFilter(band, fs, order=4):
+    '''
+    Function to design a Butterworth filter as second order sections. Cached for each (band, fs, order).
+
+    Parameters:
+        band: name in FILTER_BANDS or (low, high) in the units of fs, None for a low or high pass.
+        fs (float): sampling frequency, e.g. 1440 for minute data in cycles per day.
+        order (int): filter order. (default 4)
+    Returns:
+        (sections x 6) array for scipy.signal.sosfilt/sosfiltfilt.
+    '''
+    low, high = FILTER_BANDS[band] if isinstance(band, str) else band
+    key = (low, high, float(fs), int(order))
+    if key not in _sos_cache:
+        from scipy import signal
+
+        if low is None and high is None:
+            raise ValueError("a band needs a low or a high frequency")
+        if low is None:
+            sos = signal.butter(order, high, 'lowpass', fs=fs, output='sos')
+        elif high is None:
+            sos = signal.butter(order, low, 'highpass', fs=fs, output='sos')
+        else:
+            sos = signal.butter(order, [low, high], 'bandpass', fs=fs, output='sos')
+        _sos_cache[key] = sos
+    return _sos_cache[key]
+
+
+def _steadyState(sos, x):
+    '''
+    Function to get the sosfilt state of the steady state of the first samples of x, no start up transient.
+    '''
+    from scipy import signal
+
+    zi = signal.sosfilt_zi(sos)
+    return zi[(slice(None),) + (None,)*(x.ndim - 1) + (slice(None),)]*x[..., :1]
+
+
+def filterBank(values, bands, fs, order=4, zero_phase=True):
+    '''
+    Function to filter all stations into several frequency bands in one call.
+
+    Parameters:
+        values: [array] data with time on the last axis, (time) or (station x time). Must not contain NaNs.
+        bands: list of band names in FILTER_BANDS or (low, high) tuples, see designFilter().
+        fs (float): sampling frequency, e.g. 1440 for minute data in cycles per day.
+        order (int): filter order. (default 4)
+        zero_phase (bool): filter forwards and backwards (sosfiltfilt), otherwise causal,
+                           starting in the steady state of the first sample. (default True)
+
+    Returns:
+        dict of {band: filtered array the shape of values}.
+    '''
+    from scipy import signal
+
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).any():
+        raise ValueError("values contain NaNs, interpolate the gaps first.")
+
+    out = {}
+    for band in bands:
+        sos = designFilter(band, fs, order)
+        if zero_phase:
+            out[band] = signal.sosfiltfilt(sos, values, axis=-1)
+        else:
+            out[band] = signal.sosfilt(sos, values, axis=-1, zi=_steadyState(sos, values))[0]
+    return out
+
+
+def filterChunks(chunks, bands, fs, order=4):
+    '''
+    Generator to causally filter a stream of chunks, e.g. from myData.readMinuteChunks().
+    The sosfilt state of each band is carried between chunks, so the results are the same
+    as filterBank(..., zero_phase=False) on the whole record; both start in the steady state
+    of the first sample.
+
+    Parameters:
+        chunks: iterable of (times, values, ...) tuples with time on the last axis of each values array.
+                Must not contain NaNs.
+        bands, fs, order: see filterBank().
+
+    Yields:
+        (times, [{band: filtered} for each values array]) for each chunk.
+    '''
+    from scipy import signal
+
+    sos = {band: designFilter(band, fs, order) for band in bands}
+    state = None
+    for chunk in chunks:
+        times, arrays = chunk[0], [np.asarray(a, dtype=np.float64) for a in chunk[1:]]
+        if any(np.isnan(a).any() for a in arrays):
+            raise ValueError("values contain NaNs, interpolate the gaps first.")
+        if state is None:
+            if not arrays[0].shape[-1]: # nothing to start from yet.
+                yield times, [{band: a.copy() for band in sos} for a in arrays]
+                continue
+            state = [{band: _steadyState(s, a) for band, s in sos.items()} for a in arrays]
+
+        results = []
+        for a, zi in zip(arrays, state):
+            out = {}
+            for band, s in sos.items():
+                out[band], zi[band] = signal.sosfilt(s, a, axis=-1, zi=zi[band])
+            results.append(out)
+        yield times, results
+
+
+# Harmonic frequencies in cycles per day.
+HARMONICS = {
+    'S1': 1.0,              # diurnal.
+    'S2': 2.0,              # semidiurnal.
+    'S3': 3.0,              # terdiurnal.
+    'Sa': 1/365.25,         # annual.
+    'Ssa': 2/365.25,        # semiannual.
+}
+
+_design_cache = {} # {(n, first, middle, last, freqs): design matrix}
+
+
+def _harmonicFreqs(freqs):
+    '''
+    Function to convert harmonic names in HARMONICS or frequencies (cpd) to a tuple of frequencies.
+    '''
+    return tuple(float(HARMONICS[f]) if isinstance(f, str) else float(f) for f in freqs)
+
+
+def harmonicDesign(times, freqs=('S1', 'S2')):
+    '''
+    Function to build the least squares design matrix [1, cos(2 pi f t), sin(2 pi f t), ...]
+    of a time axis. Cached for the last few time axes.
+
+    Parameters:
+        times: [array] date numbers (days).
+        freqs: names in HARMONICS or frequencies in cycles per day. (default S1, S2)
+    Returns:
+        (time x 1 + 2*len(freqs)) array.
+    '''
+    times = np.asarray(times, dtype=np.float64)
+    freqs = _harmonicFreqs(freqs)
+    n = len(times)
+    key = (n, times[0], times[n//2], times[-1], freqs)
+    if key in _design_cache:
+        return _design_cache[key]
+
+    X = np.empty((n, 1 + 2*len(freqs)))
+    X[:, 0] = 1
+    for i, f in enumerate(freqs):
+        # phases from the fraction of each cycle, so large date numbers don't lose precision.
+        phase = 2*np.pi*np.mod(f*times, 1.0)
+        X[:, 1 + 2*i] = np.cos(phase)
+        X[:, 2 + 2*i] = np.sin(phase)
+
+    if len(_design_cache) >= 4:
+        _design_cache.pop(next(iter(_design_cache)))
+    X.setflags(write=False)
+    _design_cache[key] = X
+    return X
+
+
+def _harmonicResult(coef, freqs, shape):
+    '''
+    Function to convert (1 + 2*freqs x series) coefficients to means, amplitudes and phases.
+    '''
+    cos, sin = coef[1::2], coef[2::2]
+    return {'freqs': np.array(freqs),
+            'mean': coef[0].reshape(shape),
+            'amplitude': np.moveaxis(np.hypot(cos, sin), 0, -1).reshape(shape + (len(freqs),)),
+            'phase': np.moveaxis(np.arctan2(sin, cos), 0, -1).reshape(shape + (len(freqs),)),
+            'coef': np.moveaxis(coef, 0, -1).reshape(shape + (len(coef),))}
+
+
+def harmonicFit(times, values, freqs=('S1', 'S2'), return_fit=False):
+    '''
+    Function to fit harmonics (e.g. the diurnal and semidiurnal cycles) to many series at once.
+
+    The design matrix is built once for the time axis and all series without gaps are
+    solved as one least squares problem with a matrix right hand side. Series with NaNs
+    are solved on their valid samples.
+
+    Parameters:
+        times: [array] date numbers (days).
+        values: [array] data with time on the last axis, e.g. (time), (station x time)
+                or StationPanel.values (variable x station x time).
+        freqs: names in HARMONICS or frequencies in cycles per day. (default S1, S2)
+        return_fit (bool): also return the fitted harmonics, e.g. to remove them. (default False)
+
+    Returns:
+        dict of:
+            freqs: frequencies (cpd).
+            mean: (...) mean of each series.
+            amplitude, phase: (..., freq), the fit is mean + amplitude*cos(2 pi f t - phase).
+            coef: (..., 1 + 2*freq) least squares coefficients.
+            fit: (..., time) fitted values, if return_fit.
+    '''
+    freqs = _harmonicFreqs(freqs)
+    X = harmonicDesign(times, freqs)
+    values = np.asarray(values)
+    shape = values.shape[:-1]
+    Y = values.reshape(-1, values.shape[-1]).T # (time x series)
+
+    valid = ~np.isnan(Y)
+    full = valid.all(axis=0)
+    coef = np.full((X.shape[1], Y.shape[1]), np.nan)
+    if full.any():
+        coef[:, full] = np.linalg.lstsq(X, Y[:, full], rcond=None)[0]
+    for s in np.flatnonzero(~full):
+        rows = valid[:, s]
+        if rows.sum() >= X.shape[1]:
+            coef[:, s] = np.linalg.lstsq(X[rows], Y[rows, s], rcond=None)[0]
+
+    out = _harmonicResult(coef, freqs, shape)
+    if return_fit:
+        out['fit'] = (X @ coef).T.reshape(values.shape)
+    return out
+
+
+def harmonicFitChunks(chunks, freqs=('S1', 'S2')):
+    '''
+    Function to fit harmonics to a record read in chunks, e.g. from myData.readMinuteChunks(),
+    by accumulating the normal equations of every series. NaNs are left out.
+
+    Parameters:
+        chunks: iterable of (times, values, ...) tuples with time on the last axis of each values array.
+        freqs: names in HARMONICS or frequencies in cycles per day. (default S1, S2)
+
+    Returns:
+        list of result dicts (see harmonicFit(), without fit) for each values array.
+        Raises ValueError if there are no samples in the chunks.
+    '''
+    freqs = _harmonicFreqs(freqs)
+    shapes, gram, rhs = None, None, None
+    for chunk in chunks:
+        if not len(chunk[0]):
+            continue
+        X = harmonicDesign(chunk[0], freqs)
+        arrays = [np.asarray(a) for a in chunk[1:]]
+        if shapes is None:
+            shapes = [a.shape[:-1] for a in arrays]
+            gram = [np.zeros((int(np.prod(s)), X.shape[1], X.shape[1])) for s in shapes]
+            rhs = [np.zeros((int(np.prod(s)), X.shape[1])) for s in shapes]
+
+        for a, G, b in zip(arrays, gram, rhs):
+            Y = a.reshape(-1, a.shape[-1]) # (series x time)
+            valid = ~np.isnan(Y)
+            G += np.einsum('st,tk,tj->skj', valid.astype(np.float64), X, X, optimize=True)
+            b += np.where(valid, Y, 0) @ X
+
+    if shapes is None:
+        raise ValueError("no samples to fit, the chunks are empty.")
+    results = []
+    for shape, G, b in zip(shapes, gram, rhs):
+        coef = np.full(b.shape, np.nan)
+        ok = np.linalg.matrix_rank(G) == G.shape[-1]
+        if ok.any():
+            coef[ok] = np.linalg.solve(G[ok], b[ok][..., None])[..., 0]
+        results.append(_harmonicResult(coef.T, freqs, shape))
+    return results
+
+
+_dpss_cache = {} # {(N, NW, K): (tapers, eigenvalue ratios)}
+
+# elements (series x tapers x time) per batched FFT, keeps the memory of long records bounded.
+_MT_BATCH = 2**24
+
+
+def dpssTapers(N, NW=4, K=None):
+    '''
+    Function to get the DPSS (Slepian) tapers of a record length. Cached for each (N, NW, K).
+
+    Parameters:
+        N (int): record length.
+        NW (float): time half bandwidth product. (default 4)
+        K (int): number of tapers. (default 2*NW - 1)
+    Returns:
+        (K x N) array of unit energy tapers and their eigenvalue ratios.
+    '''
+    K = int(2*NW - 1) if K is None else int(K)
+    key = (int(N), float(NW), K)
+    if key not in _dpss_cache:
+        from scipy.signal import windows
+
+        tapers, ratios = windows.dpss(int(N), NW, K, norm=2, return_ratios=True)
+        tapers = np.atleast_2d(tapers)
+        tapers.setflags(write=False)
+        _dpss_cache[key] = (tapers, np.atleast_1d(ratios))
+    return _dpss_cache[key]
+
+
+def multitaper(x, fs=1.0, NW=4, K=None, interval=0.95):
+    '''
+    Function to calculate the multitaper power spectral density of many series.
+
+    All tapered copies of a series are transformed in one batched FFT, and the
+    tapers are cached, so repeated calls on records of the same length are cheap.
+    Unlike myWelch the record isn't split into segments, so the lowest frequencies are kept.
+
+    Parameters:
+        x: [array_like] time series with time on the last axis, (time) or (station x time). No NaNs.
+        fs (optional): [float] sampling frequency. (default 1)
+        NW (optional): [float] time half bandwidth product, the resolution is NW*fs/N. (default 4)
+        K (optional): [int] number of tapers. (default 2*NW - 1)
+        interval (optional): [float] confidence interval as decimal. (default 0.95)
+
+    Returns:
+        dict of freqs, psd (..., freq), lower and upper confidence bounds (see CI_psd),
+        dof (2K degrees of freedom) and bandwidth (2*NW*fs/N, for bandAverage).
+    '''
+    from scipy import fft
+
+    x = np.asarray(x, dtype=np.float64)
+    if np.isnan(x).any():
+        raise ValueError("x contains NaNs, interpolate the gaps first.")
+
+    N = x.shape[-1]
+    tapers, ratios = dpssTapers(N, NW, K)
+    series = x.reshape(-1, N)
+    series = series - series.mean(axis=-1, keepdims=True)
+
+    n_freqs = N//2 + 1
+    psd = np.empty((len(series), n_freqs))
+    step = max(1, _MT_BATCH // (len(tapers)*N))
+    for i in range(0, len(series), step):
+        spectra = fft.rfft(series[i:i + step, None, :]*tapers, axis=-1)
+        psd[i:i + step] = (np.abs(spectra)**2).mean(axis=1)
+
+    # one sided density.
+    psd *= 2/fs
+    psd[:, 0] /= 2
+    if N % 2 == 0:
+        psd[:, -1] /= 2
+
+    dof = 2*len(tapers)
+    l, h = CI_psd(None, interval, dof=dof)
+    psd = psd.reshape(x.shape[:-1] + (n_freqs,))
+    return {'freqs': fft.rfftfreq(N, 1/fs), 'psd': psd, 'lower': psd*l, 'upper': psd*h, 'dof': dof,
+            'bandwidth': 2*NW*fs/N}
+
+
+def bandAverage(freqs, psd, bins_per_decade=10, dof=2, interval=0.95, variance_preserving=False, bandwidth=None):
+    '''
+    Function to average a PSD in log spaced frequency bands, e.g. for compact plots and results.
+
+    All bands are averaged in one np.add.reduceat pass along the frequency axis. Neighbouring
+    frequencies of a tapered or windowed PSD aren't independent, so each band has
+    dof x (number of frequencies x frequency spacing/bandwidth) degrees of freedom, between dof
+    and dof x number of frequencies, which give its CI_psd bounds.
+
+    Parameters:
+        freqs: [array] frequencies of the PSD (increasing), e.g. from myWelch or multitaper.
+        psd: [array] PSD with frequency on the last axis, (freq) or (station x freq).
+        bins_per_decade (optional): [int] number of bands per decade of frequency. (default 10)
+        dof (optional): degrees of freedom of each PSD estimate, e.g. 2 for a periodogram,
+                        multitaper()['dof'], or (4/3)*(2*NS - 1) for myWelch as CI_psd(NS). (default 2)
+        interval (optional): [float] confidence interval as decimal. (default 0.95)
+        variance_preserving (optional): [bool] return freqs*PSD (and bounds), so the area under
+                                        a semilogx plot is the variance. (default False)
+        bandwidth (optional): [float] bandwidth of each PSD estimate, in the units of freqs:
+                              multitaper()['bandwidth'] (2*NW*fs/N), or the equivalent noise
+                              bandwidth fs*sum(w**2)/sum(w)**2 of the window w for myWelch
+                              (1.5*fs/nperseg for hann). (default the frequency spacing,
+                              independent frequencies as a periodogram)
+
+    Returns:
+        dict of freqs (mean frequency of each band), psd, lower, upper (..., band),
+        dof and count (number of frequencies) of each band.
+    '''
+    freqs = np.asarray(freqs, dtype=np.float64)
+    psd = np.asarray(psd)
+
+    # log spaced band edges from the lowest non-zero frequency, the DC value is left out.
+    positive = np.flatnonzero(freqs > 0)
+    if len(positive) == 0:
+        raise ValueError("no frequencies above 0 to average, the PSD needs at least 2 frequencies.")
+    first = positive[0]
+    lo, hi = np.log10(freqs[first]), np.log10(freqs[-1])
+    n_bands = max(int(np.ceil((hi - lo)*bins_per_decade)), 1)
+    edges = np.logspace(lo, hi, n_bands + 1)
+    starts = np.searchsorted(freqs, edges[:-1])
+    starts[0] = first  # the rounded edge can be just above the lowest frequency.
+    starts = np.unique(starts[starts < len(freqs)])
+
+    count = np.diff(np.append(starts, len(freqs)))
+    band_freqs = np.add.reduceat(freqs, starts)/count
+    band_psd = np.add.reduceat(psd, starts, axis=-1, dtype=np.float64)/count
+
+    # number of independent estimates in each band.
+    df = np.median(np.diff(freqs[first:])) if len(freqs) - first > 1 else 1.0
+    independent = count if bandwidth is None else np.clip(count*df/bandwidth, 1, count)
+    band_dof = np.asarray(dof, dtype=np.float64)*independent
+
+    l, h = CI_psd(None, interval, dof=band_dof)
+    out = {'freqs': band_freqs, 'psd': band_psd, 'lower': band_psd*l, 'upper': band_psd*h,
+           'dof': band_dof, 'count': count}
+    if variance_preserving:
+        for key in ('psd', 'lower', 'upper'):
+            out[key] = out[key]*band_freqs
+    return out
+
+
+_wavelet_cache = {} # {(n_fft, dt, scales, omega0): (scales x n_fft) Morlet spectra}
+
+# elements (series x scales x n_fft) per batched inverse FFT, keeps the memory bounded.
+_CWT_BATCH = 2**24
+
+
+def waveletScales(N, dt, dj=0.125, s0=None, max_scale=None):
+    '''
+    Function to make log spaced wavelet scales (Torrence & Compo, 1998).
+
+    Parameters:
+        N (int): record length.
+        dt (float): sampling interval, e.g. 1/24 days for hourly data.
+        dj (float): spacing of the scales in octaves. (default 1/8)
+        s0 (float): smallest scale. (default 2*dt)
+        max_scale (float): largest scale. (default N*dt/2)
+    Returns:
+        array of scales.
+    '''
+    s0 = 2*dt if s0 is None else s0
+    max_scale = N*dt/2 if max_scale is None else max_scale
+    J = int(np.floor(np.log2(max_scale/s0)/dj))
+    return s0*2**(dj*np.arange(J + 1))
+
+
+def _morletSpectra(n_fft, dt, scales, omega0):
+    '''
+    Function to get the FFT of the Morlet wavelet at each scale, normalised to unit energy. Cached.
+    '''
+    key = (n_fft, float(dt), tuple(np.round(scales, 12)), float(omega0))
+    if key not in _wavelet_cache:
+        omega = 2*np.pi*np.fft.fftfreq(n_fft, dt)
+        so = scales[:, None]*omega
+        spectra = np.pi**-0.25*np.sqrt(2*np.pi*scales[:, None]/dt)*np.exp(-0.5*(so - omega0)**2)*(omega > 0)
+        if len(_wavelet_cache) >= 8:
+            _wavelet_cache.pop(next(iter(_wavelet_cache)))
+        spectra.setflags(write=False)
+        _wavelet_cache[key] = spectra
+    return _wavelet_cache[key]
+
+
+def _fourierFactor(omega0):
+    '''
+    Function to get the ratio of the Fourier period to the scale of a Morlet wavelet.
+    '''
+    return 4*np.pi/(omega0 + np.sqrt(2 + omega0**2))
+
+
+def _cwtMargin(scales, dt):
+    '''
+    Function to get the number of samples where the wavelet of the largest scale has fallen
+    to exp(-16), four times its e-folding time.
+    '''
+    return int(np.ceil(4*np.sqrt(2)*np.max(scales)/dt))
+
+
+def _cwtBlock(x, dt, scales, omega0, return_coef, mean=None, n_fft=None):
+    '''
+    Function to transform a (series x time) block, the FFT of each series is done once.
+    mean is subtracted from the block first. (default the block's own mean)
+    n_fft is the zero padded FFT length. (default a power of 2 with at least a margin
+    of zeros, so the ends of the block don't wrap around into each other)
+    '''
+    from scipy import fft
+
+    N = x.shape[-1]
+    if n_fft is None:
+        n_fft = 1 << int(np.ceil(np.log2(N + _cwtMargin(scales, dt))))
+    spectra = _morletSpectra(n_fft, dt, scales, omega0)
+    mean = x.mean(axis=-1, keepdims=True) if mean is None else mean
+    X = fft.fft(x - mean, n=n_fft, axis=-1)
+
+    out = np.empty(x.shape[:-1] + (len(scales), N), dtype=np.complex128 if return_coef else np.float64)
+    step = max(1, _CWT_BATCH // n_fft)
+    for i in range(0, len(scales), step):
+        W = fft.ifft(X[..., None, :]*spectra[i:i + step], axis=-1)[..., :N]
+        out[..., i:i + step, :] = W if return_coef else np.abs(W)**2
+    return out
+
+
+def cwt(x, dt, scales=None, omega0=6, return_coef=False):
+    '''
+    Function to calculate the continuous (Morlet) wavelet transform of many series.
+
+    The FFT of each series is calculated once and multiplied by the cached wavelet
+    spectra of all scales in batched inverse FFTs. The series are zero padded (after
+    removing their mean) to a power of 2 at least four e-folding times of the largest
+    scale longer, so the ends of the record don't wrap around into each other.
+
+    Parameters:
+        x: [array_like] time series with time on the last axis, (time) or (station x time). No NaNs.
+        dt (float): sampling interval, e.g. 1/24 days for hourly data.
+        scales (optional): [array] wavelet scales. (default waveletScales(N, dt))
+        omega0 (optional): [float] Morlet wavelet frequency. (default 6)
+        return_coef (optional): [bool] return the complex coefficients instead of the power. (default False)
+
+    Returns:
+        dict of:
+            power (or coef): (..., scale, time) array.
+            scales, periods: the scales and their Fourier periods (units of dt).
+            coi: (time) cone of influence as a period, values at longer periods are affected by the edges.
+    '''
+    x = np.asarray(x, dtype=np.float64)
+    if np.isnan(x).any():
+        raise ValueError("x contains NaNs, interpolate the gaps first.")
+    N = x.shape[-1]
+    scales = waveletScales(N, dt) if scales is None else np.asarray(scales, dtype=np.float64)
+
+    factor = _fourierFactor(omega0)
+    edge = np.minimum(np.arange(N), np.arange(N)[::-1]) + 1
+    return {'coef' if return_coef else 'power': _cwtBlock(x, dt, scales, omega0, return_coef),
+            'scales': scales, 'periods': factor*scales, 'coi': factor/np.sqrt(2)*dt*edge}
+
+
+def cwtChunks(chunks, dt, scales, omega0=6, return_coef=False, means=None):
+    '''
+    Generator to calculate the wavelet transform of a stream of chunks, e.g. from
+    myData.readMinuteChunks() or slices of a long hourly record, in bounded memory.
+
+    The samples are transformed in blocks with margin samples of context on both sides,
+    four times the e-folding time of the largest scale (the wavelet has fallen to exp(-16)
+    there), and every block uses the same zero padded FFT length of at least 4 margins,
+    so neither the context nor the padding wraps around into the output. With the record
+    means given the power matches cwt() on the whole record, inside the cone of influence
+    too, to about 1e-6 of its largest value at each scale. Scales below about 3.5*dt are the
+    exception: their wavelet spectrum is cut off at the Nyquist frequency, the wavelet has
+    long tails and differences up to about 1e-3 remain. Results are yielded one margin late.
+
+    The memory and the work for each block grow with the largest scale, not with the chunks:
+    blocks are 4 to 8 margins (about 23 to 45 times the largest scale/dt) long, so for
+    chunks of a few thousand samples limit the largest scale, e.g.
+    waveletScales(chunk_size, dt, max_scale=chunk_size*dt/8). The default waveletScales(chunk_size, dt)
+    also works, with blocks about 11 to 23 chunks long.
+
+    Parameters:
+        chunks: iterable of (times, values, ...) tuples with time on the last axis of each values array.
+        dt (float): sampling interval (units of times).
+        scales: [array] wavelet scales, e.g. waveletScales(chunk_size, dt, max_scale=chunk_size*dt/8).
+        omega0, return_coef: see cwt().
+        means (optional): [list] record mean of each values array, (...) or a number, e.g. from a
+                          first pass. cwt() removes the record mean, so pass them for the same
+                          results, e.g. [x.mean(axis=-1)] for one (station x time) array.
+                          (default None, the values are used as they are and should already be de-meaned)
+
+    Yields:
+        (times, [dict of power (or coef), scales, periods and coi for each values array]).
+        coi is measured from the start of the record, and from its end in the last results
+        (it only differs from cwt() at periods longer than the largest scale).
+    '''
+    scales = np.asarray(scales, dtype=np.float64)
+    factor = _fourierFactor(omega0)
+    margin = _cwtMargin(scales, dt)
+    n_fft = 1 << int(np.ceil(np.log2(4*margin)))
+    block = n_fft - 2*margin  # output samples per FFT, the rest is context and padding.
+
+    def transform(times, arrays, left, start, end):
+        # start is the record index of the first output sample, end the record length if known.
+        n = len(times)
+        index = start + np.arange(n)
+        edge = index + 1
+        if end is not None:
+            edge = np.minimum(edge, end - index)
+        results = []
+        for i, a in enumerate(arrays):
+            mean = 0.0 if means is None else np.asarray(means[i], dtype=np.float64)[..., None]
+            out = []
+            for j in range(0, n, block):
+                k = min(block, n - j)
+                # up to margin samples of context before and after the output samples.
+                lo = max(left + j - margin, 0)
+                part = _cwtBlock(a[..., lo:left + j + k + margin], dt, scales, omega0, return_coef, mean, n_fft)
+                out.append(part[..., left + j - lo:left + j - lo + k])
+            results.append({'coef' if return_coef else 'power': np.concatenate(out, axis=-1), 'scales': scales,
+                            'periods': factor*scales, 'coi': factor/np.sqrt(2)*dt*edge})
+        return times, results
+
+    buf_times, buf, left, start = None, None, 0, 0
+    for chunk in chunks:
+        times, arrays = np.asarray(chunk[0]), [np.asarray(a, dtype=np.float64) for a in chunk[1:]]
+        if buf is None:
+            buf_times, buf = times, arrays
+        else:
+            buf_times = np.concatenate([buf_times, times])
+            buf = [np.concatenate([b, a], axis=-1) for b, a in zip(buf, arrays)]
+
+        # samples with a full margin of data after them can be output.
+        stop = len(buf_times) - margin
+        if stop <= left:
+            continue
+        yield transform(buf_times[left:stop], buf, left, start, None)
+        start += stop - left
+
+        # keeping a margin of context before the samples still to output.
+        keep = max(stop - margin, 0)
+        buf_times = buf_times[keep:]
+        buf = [b[..., keep:] for b in buf]
+        left = stop - keep
+
+    if buf is not None and len(buf_times) > left:
+        yield transform(buf_times[left:], buf, left, start, start + len(buf_times) - left)
+
 
 # List of functions. 
-function_list = [localInterp, globalInterp ,GetNS_NFFT, PowerSpectrumFFT, CI_psd, myWelch]
\ No newline at end of file
+function_list = [localInterp, globalInterp ,GetNS_NFFT, PowerSpectrumFFT, CI_psd, myWelch, EOF, chunkedEOF, projectEOF, crossValidate, fitLapseRate, toSeaLevel, fromSeaLevel, kernelInterp, designFilter, filterBank, filterChunks, harmonicDesign, harmonicFit, harmonicFitChunks, dpssTapers, multitaper, bandAverage, waveletScales, cwt, cwtChunks]
\ No newline at end of file
@@ -1,3 +1,7 @@
 from .myStats import StudentConfidenceInterval, CI_psd, UniformRandom
+from .myStats import blockBootstrap, phaseRandomise, surrogateTest
+from .myStats import climatology, anomalies
+from .myStats import rolling, rollingChunks
+from .myStats import autocorrelation, effectiveSampleSize, integralTimeScale
 
 from .myStats import function_list
\ No newline at end of file
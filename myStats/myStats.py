@@ -4,10 +4,10 @@ Module for custom satistic functions.
 UniformRandom(a, b):
     Function to return a random number from a uniform distribution between (a, b).
 
-StudentConfidenceInterval(DATA, CONFIDENCE=0.95, DOF=False):
+StudentConfidenceInterval(DATA, CONFIDENCE=0.95, DOF=False, N_EFF=None):
     Function to calculate the confidence interval based on the student-t distribution.
 
-CI_psd(NS, interval=0.95, boxcar=False):
+CI_psd(NS, interval=0.95, boxcar=False, dof=None):
     Function to calculate the confidence interval of a power spectral density (PSD)
     based on the chi-squared distribution.
     
@@ -15,40 +15,87 @@ CI_psd(NS, interval=0.95, boxcar=False):
         NS: number of sub sections.
         interval: default 95%, confidence interval as decimal.
         boxcar: default False, bool var for if a boxcar method was used to calculate the PSD.
+        dof: default None, degrees of freedom to use instead of NS (number or array, e.g. per frequency).
         
     Returns: 
         lower and upper bounds
+
+blockBootstrap(data, n_surrogates=1000, block_len=None, joint=True, seed=None):
+    Function to make moving block bootstrap surrogates of a time series.
+
+phaseRandomise(data, n_surrogates=1000, joint=True, seed=None):
+    Function to make phase randomised (Fourier) surrogates of a time series.
+
+surrogateTest(data, statistic='welch', method=None, n_surrogates=1000, ...):
+    Function to calculate percentile bands of the Welch PSD or the station
+    correlations from surrogate data.
+
+climatology(times, values, dtype='min', cycle='doy'):
+    Function to calculate the mean annual or diurnal cycle of many stations at once.
+
+anomalies(times, values, clim=None, dtype='min', cycle='doy', inplace=False):
+    Function to subtract the mean annual or diurnal cycle from data.
+
+rolling(values, window, stats=('mean', 'var', 'min', 'max'), min_count=1, ddof=1):
+    Function to calculate O(n) NaN-aware moving window statistics of (station x time) arrays.
+
+rollingChunks(chunks, window, stats=('mean', 'var', 'min', 'max'), min_count=1, ddof=1):
+    Generator to calculate moving window statistics of a stream of chunks.
+
+autocorrelation(data, max_lag=None):
+    Function to calculate the FFT autocorrelation of (station x time) arrays.
+
+effectiveSampleSize(data, method='sum', max_lag=None):
+    Function to estimate the effective number of independent samples of autocorrelated series.
+
+integralTimeScale(data, dt=1.0, method='sum', max_lag=None):
+    Function to estimate the integral time scale of series.
 '''
 
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from scipy import stats as sp_stats
 
-def StudentConfidenceInterval(DATA, CONFIDENCE=0.95, DOF=False):
+# scipy is imported inside the functions that use it to keep the import of this module fast.
+
+def StudentConfidenceInterval(DATA, CONFIDENCE=0.95, DOF=False, N_EFF=None):
     '''
     Function to calculate the confidence interval based on the student-t distribution.
     
     Parameters: DATA - list/array of data, CONFIDENCE - desired confidence interval as a decimal (default: 95%),
-                DOF - degrees of freedom (default: N-1).
+                DOF - degrees of freedom (default: N-1, at least 1),
+                N_EFF - effective sample size of autocorrelated data, a number or True to estimate it
+                        with effectiveSampleSize(DATA) (default: None, all N samples are independent).
+                        The standard error uses N_EFF and the default DOF is N_EFF-1 (at least 1).
     
     Returns: lower and upper bounds of the confidence interval 
              and the t-value, (lower, upper, t-value).
              
     '''
-    m = np.mean(DATA)     # Sample mean.
-    s = np.std(DATA)      # Sample standard deviation.
+    from scipy import stats as sp_stats
+
+    m = np.mean(DATA, dtype=np.float64)     # Sample mean (float64 accumulation for float32 data).
+    s = np.std(DATA, dtype=np.float64)      # Sample standard deviation.
+
+    N = len(DATA)
+    if N_EFF is True:
+        N = float(effectiveSampleSize(DATA))
+    elif N_EFF:
+        N = N_EFF
     
     if not DOF: # default
-        DOF = len(DATA)-1     # Degrees of freedom.
+        DOF = max(N-1, 1)     # Degrees of freedom, at least 1 (t.ppf is NaN for N_EFF <= 1).
     
     T_C = np.abs(sp_stats.t.ppf((1-CONFIDENCE)/2, DOF)) # t-value (aka t_critical)
     
-    LOWER = m - T_C * (s / np.sqrt(len(DATA))) 
-    UPPER =  m + T_C * (s / np.sqrt(len(DATA)))
+    LOWER = m - T_C * (s / np.sqrt(N)) 
+    UPPER =  m + T_C * (s / np.sqrt(N))
     return LOWER, UPPER, T_C 
 
 
-def CI_psd(NS, interval=0.95, boxcar=False):
+def CI_psd(NS, interval=0.95, boxcar=False, dof=None):
     '''
     Function to calculate the confidence interval of a power spectral density (PSD)
     based on the chi-squared distribution.
@@ -57,17 +104,22 @@ def CI_psd(NS, interval=0.95, boxcar=False):
         NS: number of sub sections.
         interval: default 95%, confidence interval as decimal.
         boxcar: default False, bool var for if a boxcar method was used to calculate the PSD.
+        dof: default None, degrees of freedom to use instead of NS (number or array, e.g. per frequency).
         
     Returns: 
         lower and upper bounds
     '''
-    M = 2*NS-1 # number of subsections
-    
-    nu = (4/3)*M # degrees of freedom
-    if boxcar:
-        nu = 2*M
+    from scipy import stats as sp_stats
+
+    if dof is not None: # e.g. multitaper or band averaged PSDs.
+        nu = np.asarray(dof, dtype=np.float64)
+    else:
+        M = 2*NS-1 # number of subsections
+
+        nu = (4/3)*M # degrees of freedom
+        if boxcar:
+            nu = 2*M
 
-        
     l = nu/sp_stats.chi2.ppf(1 - (1-interval)/2, nu)
     h = nu/sp_stats.chi2.ppf((1 - interval)/2, nu)
     
@@ -78,12 +130,508 @@ def UniformRandom(a, b):
     '''
     Function to return a random number from a uniform distribution between (a, b)
     '''
+    from scipy import stats as sp_stats
+
     return sp_stats.uniform.rvs(loc=a, scale=b-a)
 
 
+def _checkSeries(data):
+    '''
+    Function to check a (time) or (station x time) array for the surrogate functions.
+    '''
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim not in (1, 2):
+        raise ValueError("data must be a (time) or (station x time) array.")
+    if not np.isfinite(data).all():
+        raise ValueError("data contains NaNs, interpolate or drop them before making surrogates.")
+    return data
+
+
+def blockBootstrap(data, n_surrogates=1000, block_len=None, joint=True, seed=None):
+    '''
+    Function to make moving block bootstrap surrogates of a time series.
+    Blocks of consecutive points are drawn with replacement and joined together,
+    which keeps the autocorrelation within each block.
+
+    Parameters:
+        data: [array_like] time series, (time) or (station x time).
+        n_surrogates (optional): [int] number of surrogates (default 1000).
+        block_len (optional): [int] length of each block (default sqrt of record length).
+        joint (optional): [bool] use the same blocks for every station, keeps the
+                          cross-correlation between stations (default True).
+        seed (optional): seed or np.random.Generator.
+
+    Returns:
+        array of surrogates, (n_surrogates, time) or (n_surrogates, station, time).
+    '''
+    data = _checkSeries(data)
+    rng = np.random.default_rng(seed)
+
+    N = data.shape[-1]
+    if block_len is None:
+        block_len = int(np.sqrt(N))
+    block_len = max(1, min(int(block_len), N))
+    n_blocks = -(-N // block_len) # ceiling division
+
+    # index arrays for every surrogate at once, (n_surrogates, [station], N).
+    shape = (n_surrogates, n_blocks) if (joint or data.ndim == 1) else (n_surrogates, data.shape[0], n_blocks)
+    starts = rng.integers(0, N - block_len + 1, size=shape)
+    idx = (starts[..., None] + np.arange(block_len)).reshape(shape[:-1] + (-1,))[..., :N]
+
+    if data.ndim == 1:
+        return data[idx]
+    if joint:
+        return data[:, idx].transpose(1, 0, 2)
+    return np.take_along_axis(data[None, :, :], idx, axis=-1)
+
+
+def phaseRandomise(data, n_surrogates=1000, joint=True, seed=None):
+    '''
+    Function to make phase randomised (Fourier) surrogates of a time series.
+    The amplitude of the Fourier transform is kept and the phases are replaced with
+    random ones, so each surrogate has the same periodogram as the data.
+
+    Parameters:
+        data: [array_like] time series, (time) or (station x time).
+        n_surrogates (optional): [int] number of surrogates (default 1000).
+        joint (optional): [bool] use the same phases for every station, keeps the
+                          cross-spectrum between stations (default True).
+                          Use False for a null hypothesis of uncorrelated stations.
+        seed (optional): seed or np.random.Generator.
+
+    Returns:
+        array of surrogates, (n_surrogates, time) or (n_surrogates, station, time).
+    '''
+    from scipy.fft import rfft, irfft
+
+    data = _checkSeries(data)
+    rng = np.random.default_rng(seed)
+
+    N = data.shape[-1]
+    FT = rfft(data, axis=-1) # only one forward transform is needed.
+    n_freqs = FT.shape[-1]
+
+    shape = (n_surrogates, n_freqs) if (joint or data.ndim == 1) else (n_surrogates, data.shape[0], n_freqs)
+    phases = np.exp(2j*np.pi*rng.random(shape))
+    phases[..., 0] = 1 # keeping the mean.
+    if N % 2 == 0:
+        phases[..., -1] = 1 # Nyquist frequency has to stay real.
+
+    if joint and data.ndim == 2:
+        phases = phases[:, None, :]
+
+    return irfft(FT*phases, n=N, axis=-1) # batched inverse transform.
+
+
+def _welchStat(x, fs, nperseg, noverlap):
+    '''
+    Function to calculate the Welch PSD along the last axis.
+    '''
+    from scipy import signal
+
+    return signal.welch(x, fs=fs, nperseg=nperseg, noverlap=noverlap, axis=-1)
+
+
+def _corrStat(x):
+    '''
+    Function to calculate the station correlation matrix of (..., station, time) arrays.
+    '''
+    x = x - x.mean(axis=-1, keepdims=True)
+    x = x/np.sqrt((x**2).sum(axis=-1, keepdims=True))
+    return x @ np.swapaxes(x, -1, -2)
+
+
+def _surrogateWorker(args):
+    '''
+    Function to make one batch of surrogates and calculate the statistic, runs in the process pool.
+    '''
+    data, statistic, method, n, block_len, joint, seed, fs, nperseg, noverlap = args
+    if method == 'block':
+        batch = blockBootstrap(data, n, block_len=block_len, joint=joint, seed=seed)
+    else:
+        batch = phaseRandomise(data, n, joint=joint, seed=seed)
 
+    if statistic == 'corr':
+        return _corrStat(batch)
+    return _welchStat(batch, fs, nperseg, noverlap)[1]
 
 
+def surrogateTest(data, statistic='welch', method=None, n_surrogates=1000,
+                  percentiles=(2.5, 97.5), fs=1.0, nperseg=None, noverlap=None,
+                  block_len=None, joint=None, batch_size=100, workers=None, seed=None):
+    '''
+    Function to calculate percentile bands of the Welch PSD or the station
+    correlations from surrogate data.
+
+    Surrogates are made in batches with vectorised FFTs and the batches are
+    spread across a process pool.
+
+    Parameters:
+        data: [array_like] time series, (time) or (station x time). Must not contain NaNs.
+        statistic (optional): [str] 'welch' for the PSD or 'corr' for the correlation
+                              matrix (default 'welch').
+        method (optional): [str] 'block' for block bootstrap or 'phase' for phase randomised
+                           surrogates (default 'block' for welch, 'phase' for corr).
+                           'phase' can't be used with welch: every phase randomised surrogate
+                           has the periodogram of the data, so there would be nothing to test.
+        n_surrogates (optional): [int] number of surrogates (default 1000).
+        percentiles (optional): [tuple] percentiles for the lower and upper bands (default 95%).
+        fs (optional): [float] sampling frequency (default 1).
+        nperseg (optional): [int] length of each segment (default the largest power of 2 with
+                            at least 8 segments in the record, as mySignal.GetNS_NFFT).
+        noverlap (optional): [int] number of points to overlap (default nperseg//2).
+        block_len (optional): [int] block length for the block bootstrap.
+        joint (optional): [bool] same blocks/phases for every station
+                          (default True for welch, False for corr).
+        batch_size (optional): [int] number of surrogates per batch (default 100).
+        workers (optional): [int] number of processes (default number of cpus).
+                            Use 1 to run in the current process.
+        seed (optional): [int] seed for reproducible surrogates.
+
+    Returns:
+        dict with 'observed', 'lower', 'upper' and 'pvalue' arrays
+        (and 'freqs' for the welch statistic).
+            pvalue: fraction of surrogates at least as large as the observed value, two sided
+                    (of |r|) for corr, with NaN on the diagonal where r is always 1.
+    '''
+    data = _checkSeries(data)
+    if statistic not in ('welch', 'corr'):
+        raise ValueError("statistic must be 'welch' or 'corr'.")
+    if statistic == 'corr' and data.ndim != 2:
+        raise ValueError("statistic 'corr' needs a (station x time) array.")
+
+    if method is None:
+        method = 'block' if statistic == 'welch' else 'phase'
+    if statistic == 'welch' and method == 'phase':
+        raise ValueError("phase randomised surrogates keep the periodogram, use method='block' for welch.")
+    if joint is None:
+        joint = statistic == 'welch'
+
+    if statistic == 'welch':
+        if nperseg is None:
+            # largest power of 2 (8 to 2**19) with at least 8 segments in the record.
+            nperseg = 2**int(np.clip(np.ceil(np.log2(data.shape[-1]/8)) - 1, 3, 19))
+        if noverlap is None:
+            noverlap = nperseg // 2
+        freqs, observed = _welchStat(data, fs, nperseg, noverlap)
+    else:
+        observed = _corrStat(data)
+
+    # splitting into batches with independent random streams.
+    sizes = [batch_size]*(n_surrogates // batch_size)
+    if n_surrogates % batch_size:
+        sizes.append(n_surrogates % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(data, statistic, method, n, block_len, joint, s, fs, nperseg, noverlap)
+            for n, s in zip(sizes, seeds)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = [_surrogateWorker(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_surrogateWorker, jobs))
+    stats = np.concatenate(results, axis=0)
+
+    lower, upper = np.percentile(stats, percentiles, axis=0)
+    if statistic == 'corr':
+        pvalue = (np.abs(stats) >= np.abs(observed)).mean(axis=0)
+        np.fill_diagonal(pvalue, np.nan)
+    else:
+        pvalue = (stats >= observed).mean(axis=0)
+    out = {'observed': observed,
+           'lower': lower,
+           'upper': upper,
+           'pvalue': pvalue}
+    if statistic == 'welch':
+        out['freqs'] = freqs
+    return out
+
+
+# rows per block in the climatology reductions, keeps the temporary index arrays small.
+_CLIM_BLOCK = 2**18
+
+
+def _timeFirst(times, values):
+    '''
+    Function to check that values has time on its first axis, like StationPanel.matrix().
+    '''
+    values = np.asarray(values)
+    if values.ndim == 0 or len(values) != len(times):
+        raise ValueError("values must have time on the first axis, (time) or (time x station): "
+                         "got shape {} for {} times".format(values.shape, len(times)))
+    return values
+
+
+def climatology(times, values, dtype='min', cycle='doy'):
+    '''
+    Function to calculate the mean annual or diurnal cycle of many stations at once.
+    Uses the cached myDates.cycleIndex() and np.bincount, so no getRange slicing per day or hour.
+
+    Parameters:
+        times: [array] date numbers.
+        values: [array] data, (time) or (time x station), e.g. StationPanel.matrix('temperature').
+                Time is on the first axis here (unlike rolling() and myDates.resample()).
+        dtype (str): 'min' or 'hr' date numbers.
+        cycle (str): 'doy', 'hour' or 'doy-hour'. See myDates.cycleIndex().
+
+    Returns:
+        dict of mean and count, (cycle) or (cycle x station) arrays, and the cycle.
+        NaNs are ignored, days/hours with no data have count 0 and a NaN mean.
+    '''
+    from ..myDates.myDates import cycleIndex, CYCLE_LENGTH
+
+    values = _timeFirst(times, values)
+    data = values.reshape(len(values), -1)
+    n, n_stations = data.shape
+    groups = cycleIndex(times, dtype, cycle)
+    size = CYCLE_LENGTH[cycle]*n_stations
+    stations = np.arange(n_stations)
+
+    total = np.zeros(size)
+    count = np.zeros(size)
+    for i in range(0, n, _CLIM_BLOCK):
+        block = data[i:i + _CLIM_BLOCK]
+        valid = ~np.isnan(block)
+        index = (groups[i:i + _CLIM_BLOCK, None]*n_stations + stations).ravel()
+        total += np.bincount(index, np.where(valid, block, 0).ravel(), minlength=size)
+        count += np.bincount(index, valid.ravel(), minlength=size)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (total/count).reshape(-1, n_stations)
+    count = count.astype(np.int64).reshape(-1, n_stations)
+    if values.ndim == 1:
+        mean, count = mean[:, 0], count[:, 0]
+    return {'mean': mean, 'count': count, 'cycle': cycle}
+
+
+def anomalies(times, values, clim=None, dtype='min', cycle='doy', inplace=False):
+    '''
+    Function to subtract the mean annual or diurnal cycle from data.
+
+    Parameters:
+        times: [array] date numbers.
+        values: [array] data, (time) or (time x station), time on the first axis like climatology().
+        clim (dict): climatology from climatology(), e.g. of a longer record. (default from values)
+        dtype (str): 'min' or 'hr' date numbers.
+        cycle (str): 'doy', 'hour' or 'doy-hour', ignored if clim is given.
+        inplace (bool): subtract from values itself instead of a copy, values must be a float
+                        array. (default False)
+
+    Returns:
+        array of anomalies, the same shape as values.
+    '''
+    from ..myDates.myDates import cycleIndex
+
+    if inplace and not (isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.floating)):
+        raise ValueError("inplace=True needs a float numpy array, not {}".format(
+            getattr(values, 'dtype', type(values).__name__)))
+    values = _timeFirst(times, values)
+    if clim is None:
+        clim = climatology(times, values, dtype, cycle)
+    groups = cycleIndex(times, dtype, clim['cycle'])
+
+    out = values if inplace else np.array(values, dtype=np.result_type(values, np.float32))
+    for i in range(0, len(out), _CLIM_BLOCK):
+        out[i:i + _CLIM_BLOCK] -= clim['mean'][groups[i:i + _CLIM_BLOCK]].astype(out.dtype, copy=False)
+    return out
+
+
+def _windowSums(x, window):
+    '''
+    Function to calculate the trailing window sums along the last axis with a cumulative sum.
+    '''
+    cs = np.cumsum(x, axis=-1, dtype=np.float64)
+    sums = cs.copy()
+    sums[..., window:] -= cs[..., :-window]
+    return sums
+
+
+def _windowExtreme(x, window, ufunc):
+    '''
+    Function to calculate the trailing window minimum (np.fmin) or maximum (np.fmax) along the last axis.
+
+    Uses the van Herk/Gil-Werman algorithm: running extremes forwards and backwards
+    within blocks of the window length, so each point costs 3 comparisons whatever the
+    window length, vectorised over stations. NaNs are ignored (fmin/fmax).
+    '''
+    n = x.shape[-1]
+    m = n + window - 1
+    n_blocks = -(-m // window)
+    padded = np.full(x.shape[:-1] + (n_blocks*window,), np.nan, dtype=np.result_type(x, np.float32))
+    padded[..., window - 1:m] = x
+
+    blocks = padded.reshape(x.shape[:-1] + (n_blocks, window))
+    forward = ufunc.accumulate(blocks, axis=-1).reshape(padded.shape)
+    backward = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+
+    # the window ending at padded index i + window - 1 starts at i.
+    return ufunc(backward[..., :n], forward[..., window - 1:m])
+
+
+def rolling(values, window, stats=('mean', 'var', 'min', 'max'), min_count=1, ddof=1):
+    '''
+    Function to calculate trailing moving window statistics of many stations in one call.
+
+    Means and variances use cumulative sums and the minimum/maximum use the van Herk/Gil-Werman
+    algorithm, so the cost is O(n) whatever the window length. NaNs are left out of each window.
+
+    Parameters:
+        values: [array] data with time on the last axis, (time) or (station x time).
+        window (int): number of samples in the window, ending at (and including) each sample.
+        stats (tuple): any of 'mean', 'var', 'std', 'min', 'max', 'count'.
+        min_count (int): fewest valid samples in a window for a result, otherwise NaN. default 1.
+        ddof (int): delta degrees of freedom of the variance, default 1 (as pandas rolling).
+
+    Returns:
+        dict of one array the shape of values for each statistic.
+    '''
+    values = np.asarray(values)
+    window = int(window)
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    valid = ~np.isnan(values)
+    count = _windowSums(valid, window)
+    enough = count >= max(min_count, 1)
+
+    out = {}
+    if set(stats) & {'mean', 'var', 'std'}:
+        # shifting by the mean of each series keeps the sums of squares accurate.
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shift = np.nanmean(values, axis=-1, keepdims=True, dtype=np.float64)
+        shift = np.nan_to_num(shift)
+        x = np.where(valid, values - shift, 0)
+        sums = _windowSums(x, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums/count
+            if 'mean' in stats:
+                out['mean'] = np.where(enough, mean + shift, np.nan)
+            if set(stats) & {'var', 'std'}:
+                var = (_windowSums(x**2, window) - sums*mean)/(count - ddof)
+                var = np.where(enough & (count > ddof), np.clip(var, 0, None), np.nan)
+                if 'var' in stats:
+                    out['var'] = var
+                if 'std' in stats:
+                    out['std'] = np.sqrt(var)
+    if 'min' in stats:
+        out['min'] = np.where(enough, _windowExtreme(values, window, np.fmin), np.nan)
+    if 'max' in stats:
+        out['max'] = np.where(enough, _windowExtreme(values, window, np.fmax), np.nan)
+    if 'count' in stats:
+        out['count'] = count.astype(np.int64)
+    return out
+
+
+def rollingChunks(chunks, window, stats=('mean', 'var', 'min', 'max'), min_count=1, ddof=1):
+    '''
+    Generator to calculate moving window statistics of a stream of chunks, e.g. from
+    myData.readMinuteChunks(). The last window - 1 samples of each chunk are carried
+    to the next, so the results are the same as rolling() on the whole record.
+
+    Parameters:
+        chunks: iterable of (times, values, ...) tuples with time on the last axis of each values array.
+        window, stats, min_count, ddof: see rolling().
+
+    Yields:
+        (times, [stats dict for each values array]) for each chunk.
+    '''
+    carry = None
+    for chunk in chunks:
+        times, arrays = chunk[0], [np.asarray(a) for a in chunk[1:]]
+        n_carry = 0
+        if carry is not None:
+            n_carry = carry[0].shape[-1]
+            arrays = [np.concatenate([c, a], axis=-1) for c, a in zip(carry, arrays)]
+
+        results = [{k: v[..., n_carry:] for k, v in rolling(a, window, stats, min_count, ddof).items()}
+                   for a in arrays]
+        carry = [a[..., max(a.shape[-1] - (window - 1), 0):] for a in arrays]
+        yield times, results
+
+
+# elements (series x fft length) per batch of the FFT autocorrelation, keeps the memory bounded.
+_ACF_BATCH = 2**24
+
+
+def autocorrelation(data, max_lag=None):
+    '''
+    Function to calculate the autocorrelation of many series with FFTs, O(n log n) instead of O(n^2).
+
+    Parameters:
+        data: [array_like] time series with time on the last axis, (time) or (station x time).
+              NaNs are left out of the lagged products.
+        max_lag (optional): [int] largest lag. (default length - 1)
+
+    Returns:
+        (..., max_lag + 1) array of autocorrelations at lags 0, 1, ... (biased estimate, 1 at lag 0).
+    '''
+    from scipy import fft
+
+    data = np.asarray(data, dtype=np.float64)
+    N = data.shape[-1]
+    max_lag = N - 1 if max_lag is None else min(int(max_lag), N - 1)
+    series = data.reshape(-1, N)
+
+    n_fft = fft.next_fast_len(2*N - 1) # padding so the products don't wrap around.
+    acf = np.empty((len(series), max_lag + 1))
+    step = max(1, _ACF_BATCH // n_fft)
+    for i in range(0, len(series), step):
+        x = series[i:i + step]
+        with np.errstate(invalid='ignore'):
+            x = np.nan_to_num(x - np.nanmean(x, axis=-1, keepdims=True)) # NaNs add nothing to the sums.
+        F = fft.rfft(x, n=n_fft, axis=-1)
+        sums = fft.irfft(F.real**2 + F.imag**2, n=n_fft, axis=-1)[:, :max_lag + 1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            acf[i:i + step] = sums/sums[:, :1]
+    return acf.reshape(data.shape[:-1] + (max_lag + 1,))
+
+
+def effectiveSampleSize(data, method='sum', max_lag=None):
+    '''
+    Function to estimate the effective number of independent samples of autocorrelated series.
+
+    Parameters:
+        data: [array_like] time series with time on the last axis, (time) or (station x time).
+        method (optional): [str] 'sum' for n/(1 + 2*sum of the autocorrelation up to its first
+                           zero crossing), or 'ar1' for n(1 - r1)/(1 + r1) from the lag 1
+                           autocorrelation. (default 'sum')
+        max_lag (optional): [int] largest lag to sum. (default length - 1)
+
+    Returns:
+        effective sample size of each series, between 1 and the number of non-NaN values.
+    '''
+    data = np.asarray(data, dtype=np.float64)
+    n = (~np.isnan(data)).sum(axis=-1)
+    if method == 'ar1':
+        r1 = autocorrelation(data, 1)[..., 1]
+        n_eff = n*(1 - r1)/(1 + r1)
+    elif method == 'sum':
+        acf = autocorrelation(data, max_lag)[..., 1:]
+        positive = np.cumprod(acf > 0, axis=-1, dtype=bool) # lags before the first zero crossing.
+        n_eff = n/(1 + 2*np.where(positive, acf, 0).sum(axis=-1))
+    else:
+        raise ValueError("method must be 'sum' or 'ar1'.")
+    return np.clip(n_eff, 1, np.maximum(n, 1))
+
+
+def integralTimeScale(data, dt=1.0, method='sum', max_lag=None):
+    '''
+    Function to estimate the integral time scale (time between independent samples) of series.
+
+    Parameters:
+        data: [array_like] time series with time on the last axis, (time) or (station x time).
+        dt (optional): [float] sampling interval, e.g. 1/1440 days for minute data. (default 1)
+        method, max_lag (optional): see effectiveSampleSize().
+
+    Returns:
+        integral time scale of each series in the units of dt.
+    '''
+    data = np.asarray(data, dtype=np.float64)
+    n = (~np.isnan(data)).sum(axis=-1)
+    return dt*n/effectiveSampleSize(data, method, max_lag)
+
 
 # List of functions. 
-function_list = [StudentConfidenceInterval, CI_psd, UniformRandom]
\ No newline at end of file
+function_list = [StudentConfidenceInterval, CI_psd, UniformRandom, blockBootstrap, phaseRandomise, surrogateTest, climatology, anomalies, rolling, rollingChunks, autocorrelation, effectiveSampleSize, integralTimeScale]
\ No newline at end of file
@@ -0,0 +1,39 @@
+'''
+Shared fixtures for the tests.
+
+The repository root is the myPyPackages package itself, so it is loaded under
+that name here. Tests run on small synthetic data from myBench.makeSyntheticData().
+'''
+
+import os
+import sys
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'myPyPackages' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('myPyPackages', os.path.join(ROOT, '__init__.py'),
+                                                  submodule_search_locations=[ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules['myPyPackages'] = package
+    spec.loader.exec_module(package)
+
+import matplotlib
+matplotlib.use('Agg')
+
+
+@pytest.fixture(scope='session')
+def dataRoot(tmp_path_factory):
+    '''
+    Data root with synthetic minute, hour, coastline and station files (1% of the real lengths).
+    '''
+    from myPyPackages import myData, myBench
+
+    root = str(tmp_path_factory.mktemp('data'))
+    myBench.makeSyntheticData(root, scale=0.01)
+    old = myData.getDataRoot()
+    myData.setDataRoot(root)
+    yield root
+    myData.setDataRoot(old)
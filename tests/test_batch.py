@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from myPyPackages import myData
+from myPyPackages.main import batch
+
+
+def test_runStation_reruns_only_stale_stages(dataRoot, tmp_path):
+    start = myData.findDataset('min', station='UVicSci')['start']
+    windows = {'first': (start, start + 5)}
+    out = str(tmp_path)
+
+    written = batch.runStation('UVicSci', windows, outdir=out)
+    assert len(written) == 3
+    assert batch.runStation('UVicSci', windows, outdir=out) == []
+
+    fig_file = os.path.join(out, 'UVicSci', 'first_psd.jpeg')
+    os.remove(fig_file)
+    assert batch.runStation('UVicSci', windows, outdir=out) == [fig_file]
+
+
+def _strict(name):
+    raise ValueError("not valid JSON: {}".format(name))
+
+
+def test_open_window_writes_valid_json(dataRoot, tmp_path):
+    out = str(tmp_path)
+    batch.runStation('UVicSci', {'all': (-np.inf, np.inf)}, outdir=out)
+    with open(os.path.join(out, 'UVicSci', 'all_stats.json')) as f:
+        stats = json.load(f, parse_constant=_strict)
+    times = myData.readMinuteData('UVicSci').times.values
+    assert (stats['start'], stats['end']) == (times[0], times[-1])
+
+
+def test_runBatch_warns_when_skipping_heatmaps(dataRoot, tmp_path):
+    start = myData.findDataset('min', station='UVicSci')['start']
+    with pytest.warns(UserWarning, match='heatmap'):
+        batch.runBatch(['UVicSci'], {'first': (start, start + 5)}, outdir=str(tmp_path), workers=1)
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location('myPyPackages', {init!r}, submodule_search_locations=[{root!r}])
+package = importlib.util.module_from_spec(spec)
+sys.modules['myPyPackages'] = package
+spec.loader.exec_module(package)
+
+import myPyPackages
+myPyPackages.DateStrtoNum
+print(sorted(name for name in ('pandas', 'scipy', 'matplotlib') if name in sys.modules))
+'''
+
+
+def test_lazy_import_leaves_heavy_modules_unloaded():
+    script = SCRIPT.format(init=os.path.join(ROOT, '__init__.py'), root=ROOT)
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
@@ -0,0 +1,41 @@
+import tracemalloc
+
+import matplotlib.pyplot as plt
+
+from myPyPackages import myData, mySignal
+from myPyPackages.main import instrument, batch
+
+
+def test_disable_keeps_callers_tracing():
+    tracemalloc.start()
+    try:
+        instrument.enable(memory=True)
+        instrument.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    instrument.enable(memory=True)
+    instrument.disable()
+    assert not tracemalloc.is_tracing()
+
+
+def test_restore_undoes_instrumentAll():
+    original = mySignal.myWelch
+    instrument.instrumentAll()
+    assert mySignal.myWelch is not original
+    instrument.restore()
+    assert mySignal.myWelch is original
+    assert original in mySignal.mySignal.function_list
+
+
+def test_runBatch_in_process(dataRoot, tmp_path):
+    start = myData.findDataset('min', station='UVicSci')['start']
+    figures = plt.get_fignums()
+    written = batch.runBatch(['UVicSci'], {'first': (start, start + 2)}, outdir=str(tmp_path),
+                             workers=1, heatmaps=False, profile=True)
+    assert len(written) == 3
+    assert plt.get_fignums() == figures # the PSD figures don't go through pyplot.
+    assert 'psd' in instrument.getRecords()['records']
+    assert not getattr(myData.readMinuteData, '_instrumented', False)
+    instrument.reset()
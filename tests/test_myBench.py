@@ -0,0 +1,36 @@
+import importlib
+import json
+
+from myPyPackages import myBench
+
+_myBench = importlib.import_module('myPyPackages.myBench.myBench')
+
+
+def test_runBenchmarks_records_the_scale_used(tmp_path):
+    root = str(tmp_path/'data')
+    first = myBench.runBenchmarks(scale=0.001, repeat=1, benchmarks=['readCoastLine'], root=root)
+    assert first['info']['scale'] == 0.001 and first['info']['minute_rows'] == int(_myBench.MINUTE_N*0.001)
+
+    # synthetic data of another scale is written again.
+    second = myBench.runBenchmarks(scale=0.002, repeat=1, benchmarks=['readCoastLine'], root=root)
+    assert second['info']['scale'] == 0.002 and second['info']['minute_rows'] == int(_myBench.MINUTE_N*0.002)
+
+    # data that isn't from makeSyntheticData is used as it is, with an unknown scale.
+    (tmp_path/'data'/_myBench.SYNTHETIC_FILE).unlink()
+    third = myBench.runBenchmarks(scale=0.5, repeat=1, benchmarks=['readCoastLine'], root=root)
+    assert third['info']['scale'] is None and third['info']['minute_rows'] == second['info']['minute_rows']
+
+
+def _result(**mins):
+    return {'results': {name: {'min': t, 'peak_mb': 1.0} for name, t in mins.items()}}
+
+
+def test_compareBenchmarks(tmp_path):
+    old = _result(a=1.0, b=1.0, gone=1.0)
+    new = _result(a=1.05, b=1.5, added=9.0)
+    assert myBench.compareBenchmarks(old, new) == {'b': 1.5}
+    assert myBench.compareBenchmarks(old, new, threshold=1.01) == {'a': 1.05, 'b': 1.5}
+
+    old_file = tmp_path/'old.json'
+    old_file.write_text(json.dumps(old))
+    assert myBench.compareBenchmarks(str(old_file), new) == {'b': 1.5}
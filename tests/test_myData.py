@@ -0,0 +1,283 @@
+import concurrent.futures
+import importlib
+import os
+
+import numpy as np
+import pytest
+from matplotlib.path import Path
+
+from myPyPackages import myData, myDates
+
+_myData = importlib.import_module('myPyPackages.myData.myData')
+
+
+def test_readMinuteChunks_matches_getRange(dataRoot):
+    data = myData.readMinuteData('UVicSci')
+    start, end = data.times.iloc[1234], data.times.iloc[25000]
+    ref = myDates.getRange(data, start, end)
+
+    chunks = list(myData.readMinuteChunks('UVicSci', chunk_size=997, start=start, end=end))
+    times, temp, press = [np.concatenate(c) for c in zip(*chunks)]
+    np.testing.assert_allclose(times, ref.times.values)
+    np.testing.assert_allclose(temp, ref.temperature.values)
+    np.testing.assert_allclose(press, ref.pressure.values)
+
+
+def test_insidePolygon_matches_matplotlib_path():
+    rng = np.random.default_rng(0)
+    theta = np.sort(rng.uniform(0, 2*np.pi, 60))
+    radius = 1 + 0.5*rng.random(60)
+    outer = np.column_stack([radius*np.cos(theta), radius*np.sin(theta)])
+    island = 0.2*outer[::3] + [3, 0]
+    px, py = np.vstack([outer, [[np.nan, np.nan]], island]).T
+
+    x, y = np.meshgrid(np.linspace(-2, 4, 121), np.linspace(-2, 2, 83))
+    points = np.column_stack([x.ravel(), y.ravel()])
+    ref = Path(outer).contains_points(points) | Path(island).contains_points(points)
+    assert np.array_equal(_myData._insidePolygon(x, y, px, py).ravel(), ref)
+
+
+def test_landMask_matches_matplotlib_path(dataRoot):
+    grid = (60, 40)
+    coastline = myData.readCoastLine()
+    xi, yi = _myData._coastGrid(coastline, grid)
+    mask = myData.landMask(grid, refresh=True)
+    ref = Path(coastline[['long', 'lati']].values).contains_points(np.column_stack([xi.ravel(), yi.ravel()]))
+    assert mask.shape == xi.shape
+    assert np.array_equal(mask.ravel(), ref)
+    assert np.array_equal(myData.landMask(grid), mask) # from the cache.
+
+
+def test_elevationGrid_needs_terrain_model(dataRoot):
+    grid = (30, 20)
+    elev_file = os.path.join(dataRoot, _myData.ELEVATION_FILE)
+    with pytest.raises(FileNotFoundError):
+        myData.elevationGrid(grid)
+
+    # a plane is interpolated exactly on land, the ocean is 0 m.
+    coastline = myData.readCoastLine()
+    long, lati = np.meshgrid(np.linspace(coastline.long.min() - 1, coastline.long.max() + 1, 25),
+                             np.linspace(coastline.lati.min() - 1, coastline.lati.max() + 1, 25))
+    np.savetxt(elev_file, np.column_stack([long.ravel(), lati.ravel(), (100*long + 10*lati).ravel()]))
+    try:
+        elev = myData.elevationGrid(grid, refresh=True)
+    finally:
+        os.remove(elev_file)
+    xi, yi = _myData._coastGrid(coastline, grid)
+    land = myData.landMask(grid)
+    np.testing.assert_allclose(elev[land], (100*xi + 10*yi)[land])
+    assert not elev[~land].any()
+
+
+def test_getCatalog_reads_headers_and_row_counts(dataRoot):
+    catalog = myData.getCatalog(refresh=True)
+    minute = [d for d in catalog if d['resolution'] == 'min']
+    assert {d['station'] for d in minute} >= {'UVicSci', 'Craigflower'}
+    for d in minute:
+        times = myData.readMinuteData(d['station']).times.values
+        assert d['n'] == len(times) and d['year'] == 2022
+        np.testing.assert_allclose([d['start'], d['end']], [times[0], times[-1]])
+
+    hour = myData.findDataset('hr', variable='temperature')
+    times = myData.readHourData(0).times.values
+    assert hour['n'] == len(times) and os.path.isabs(hour['path'])
+    np.testing.assert_allclose([hour['start'], hour['end']], [times[0], times[-1]])
+
+
+def test_getCatalog_json_cache_and_invalidation(tmp_path, monkeypatch):
+    old_root = myData.getDataRoot()
+    folder = tmp_path/'Minute_2021'
+    folder.mkdir()
+    data_file = folder/'Test_Tp.dat'
+    data_file.write_text('Start 738000.0 End 738000.00138889\ndegC hPa\n1.0 1000.0\n2.0 1001.0\n3.0 1002.0\n')
+    myData.setDataRoot(str(tmp_path))
+    try:
+        d = myData.findDataset('min', station='Test')
+        assert (d['n'], d['year'], d['start']) == (3, 2021, 738000.0)
+        assert np.isclose(d['end'], 738000.00138889)
+        assert os.path.exists(tmp_path/'.catalog.json')
+
+        # unchanged files come from .catalog.json without being read again.
+        def fail(*args):
+            raise AssertionError("header read again")
+        monkeypatch.setattr(_myData, '_readHeader', fail)
+        assert myData.getCatalog(refresh=True)[0]['n'] == 3
+        monkeypatch.undo()
+
+        with open(data_file, 'a') as f:
+            f.write('4.0 1003.0\n')
+        os.utime(data_file, (0, os.stat(data_file).st_mtime + 10))
+        assert myData.getCatalog(refresh=True)[0]['n'] == 4
+    finally:
+        myData.setDataRoot(old_root)
+
+
+def _checkStations(out, names, reference, aligned):
+    if aligned:
+        assert out['stations'] == names
+        for j, name in enumerate(names):
+            ref = reference(name)
+            index = np.searchsorted(out['times'], ref.times.values[0] - 1e-9)
+            np.testing.assert_allclose(out['times'][index:index + len(ref)], ref.times.values)
+            for var in ('temperature', 'pressure'):
+                np.testing.assert_array_equal(out[var][index:index + len(ref), j], ref[var].values)
+    else:
+        assert list(out) == names
+        for name in names:
+            ref = reference(name)
+            np.testing.assert_allclose(out[name].times.values, ref.times.values)
+            np.testing.assert_array_equal(out[name][['temperature', 'pressure']].values,
+                                          ref[['temperature', 'pressure']].values)
+
+
+@pytest.mark.parametrize('aligned', [False, True])
+def test_readStations_matches_single_reads(dataRoot, aligned, monkeypatch):
+    names = ['UVicSci', 'Monterey', 'Craigflower']
+    for cache in (False, True): # text files are parsed in a process pool.
+        out = myData.readStations(names, workers=2, cache=cache, aligned=aligned)
+        _checkStations(out, names, myData.readMinuteData, aligned)
+
+    # with every cache up to date the .npz files are loaded in a thread pool.
+    class NoProcesses:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("process pool used for cached files")
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', NoProcesses)
+    out = myData.readStations(names, workers=2, cache=True, aligned=aligned)
+    _checkStations(out, names, myData.readMinuteData, aligned)
+    monkeypatch.undo()
+
+    hour_names = ['VIU', 'Bowser', 'UVicSci']
+    stations = list(myData.getStationInfo().station)
+    out = myData.readStations(hour_names, resolution='hr', workers=2, aligned=aligned)
+    _checkStations(out, hour_names, lambda name: myData.readHourData(stations.index(name)), aligned)
+
+
+def test_StationPanel_views_and_values(dataRoot):
+    names = ['UVicSci', 'Monterey', 'Craigflower']
+    aligned = myData.readStations(names, workers=1, aligned=True)
+    panel = myData.StationPanel.fromAligned(aligned)
+    assert panel.values is aligned['temperature'].T.base # no copy.
+    assert panel.shape == (2, 3, len(aligned['times']))
+
+    read = myData.readPanel(names, workers=1)
+    for var in ('temperature', 'pressure'):
+        np.testing.assert_array_equal(read.matrix(var), aligned[var])
+        assert np.shares_memory(read.matrix(var), read.values)
+
+    # stations next to each other, a variable and a time range are views.
+    start, end = panel.times[100], panel.times[5000]
+    sub = panel.sel(['Monterey', 'Craigflower'], 'pressure', start, end)
+    assert np.shares_memory(sub.values, panel.values)
+    assert sub.stations == ['Monterey', 'Craigflower'] and sub.variables == ['pressure']
+    np.testing.assert_array_equal(sub.get('pressure'), aligned['pressure'][100:5000, 1:].T)
+    np.testing.assert_array_equal(sub.times, aligned['times'][100:5000])
+
+    # other stations are copied, in the order asked for.
+    picked = panel.sel(['Craigflower', 'UVicSci'], start=start, end=end)
+    assert not np.shares_memory(picked.values, panel.values)
+    assert picked.stations == ['Craigflower', 'UVicSci'] and picked.variables == ['temperature', 'pressure']
+    for i, var in enumerate(picked.variables):
+        np.testing.assert_array_equal(picked.values[i], aligned[var][100:5000][:, [2, 0]].T)
+
+    frame = panel.toFrame('Monterey')
+    np.testing.assert_array_equal(frame.temperature.values, aligned['temperature'][:, 1])
+
+
+@pytest.fixture
+def smallRoot(tmp_path):
+    '''
+    Data root with one small minute file with NaNs and a wide range column (scale > 0.01 in int16).
+    '''
+    rng = np.random.default_rng(0)
+    values = np.column_stack([np.round(rng.uniform(-20, 30, 500), 2), np.round(rng.uniform(0, 5000, 500), 2)])
+    values[[3, 250], [0, 1]] = np.nan
+    folder = tmp_path/'Minute_2021'
+    folder.mkdir()
+    data_file = folder/'Test_Tp.dat'
+    with open(data_file, 'w') as f:
+        f.write('Temperature Pressure\ndegC hPa\n')
+        np.savetxt(f, values, fmt='%.2f')
+
+    old_root = myData.getDataRoot()
+    myData.setDataRoot(str(tmp_path))
+    yield data_file, values
+    myData.setDataRoot(old_root)
+
+
+def test_int16_cache_round_trip(smallRoot):
+    data_file, values = smallRoot
+    for i in range(2): # writing, then loading the cache.
+        data = myData.readMinuteData('Test', cache=True, dtype='int16')
+        got = data[['temperature', 'pressure']].values
+        assert got.dtype == np.float32
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(values))
+
+        with np.load(_myData._cacheFile(myData.findDataset('min', station='Test'), 'int16')) as f:
+            scale = f['scale']
+        assert scale[0] == 0.01 and scale[1] > 0.01
+        # at most half a step, plus the float32 rounding of the returned values.
+        error = np.nan_to_num(np.abs(got - values))
+        assert (error <= scale/2 + np.finfo(np.float32).eps*np.abs(np.nan_to_num(values))).all()
+        assert error[:, 0].max() < 1e-3 # 2 decimal data fits the 0.01 scale exactly.
+
+
+def test_float32_cache_matches_parse_and_invalidates(smallRoot):
+    data_file, values = smallRoot
+    parsed = myData.readMinuteData('Test', dtype=np.float32)
+    for i in range(2):
+        cached = myData.readMinuteData('Test', cache=True, dtype=np.float32)
+        np.testing.assert_array_equal(cached[['temperature', 'pressure']].values, parsed[['temperature', 'pressure']].values)
+
+    # changing the source file makes the cache stale.
+    values[0, 0] = 12.34
+    with open(data_file, 'w') as f:
+        f.write('Temperature Pressure\ndegC hPa\n')
+        np.savetxt(f, values, fmt='%.2f')
+    os.utime(data_file, (0, os.stat(data_file).st_mtime + 10))
+    myData.getCatalog(refresh=True)
+    for dtype in (np.float32, 'int16'):
+        assert np.isclose(myData.readMinuteData('Test', cache=True, dtype=dtype).temperature[0], 12.34)
+
+
+def test_rowIndex_cache_written_whole(dataRoot, monkeypatch):
+    dataset = myData.findDataset('min', station='Monterey')
+    index_file = os.path.join(dataRoot, '.cache', '{}.rows100.npy'.format(dataset['path'][len(dataRoot) + 1:]))
+    saved = []
+    real_save = np.save
+    monkeypatch.setattr(np, 'save', lambda file, arr: (saved.append(file), real_save(file, arr)))
+    offsets = _myData._rowIndex(dataset, step=100)
+    monkeypatch.undo()
+
+    # written to a temporary file then moved into place, never in place.
+    assert saved and saved[0] != index_file
+    np.testing.assert_array_equal(np.load(index_file), offsets)
+    assert not [f for f in os.listdir(os.path.dirname(index_file)) if '.rows100.' in f and f != os.path.basename(index_file)]
+    with open(dataset['path'], 'rb') as f:
+        lines = f.readlines()
+        f.seek(offsets[3])
+        assert f.readline() == lines[2 + 300] # after the 2 header lines.
+
+
+def _haversine(long1, lati1, long2, lati2):
+    long1, lati1, long2, lati2 = map(np.radians, (long1, lati1, long2, lati2))
+    a = np.sin((lati2 - lati1)/2)**2 + np.cos(lati1)*np.cos(lati2)*np.sin((long2 - long1)/2)**2
+    return 2*_myData.EARTH_RADIUS*np.arcsin(np.sqrt(a))
+
+
+def test_StationIndex_matches_haversine(dataRoot):
+    info = myData.getStationInfo()
+    index = myData.getStationIndex(info)
+    long, lati = np.meshgrid(np.linspace(234, 237.5, 40), np.linspace(48.2, 50.3, 30))
+    direct = _haversine(long[..., None], lati[..., None], info.long.values, info.lati.values)
+
+    dist, idx = index.query(long, lati, k=3)
+    order = np.sort(direct, axis=-1)[..., :3]
+    np.testing.assert_allclose(dist, order, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(np.take_along_axis(direct, idx, axis=-1), dist, rtol=1e-9, atol=1e-9)
+
+    found = index.queryRadius(long, lati, 40.0)
+    for point in np.ndindex(long.shape):
+        assert sorted(found[point]) == list(np.flatnonzero(direct[point] <= 40.0))
+
+    pairs = _haversine(info.long.values[:, None], info.lati.values[:, None], info.long.values, info.lati.values)
+    np.testing.assert_allclose(index.distanceMatrix(), pairs, atol=1e-9)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from myPyPackages import myDates
+
+
+def _record(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    times = 40000 + 17/1440 + np.arange(n)/1440 # starts part way into an hour.
+    values = rng.standard_normal(n)
+    values[rng.random(n) < 0.1] = np.nan
+    return times, values
+
+
+def test_resample_matches_pandas_groupby():
+    times, values = _record()
+    out = myDates.resample(times, values, width=1/24)
+
+    bins = np.floor(times*24 + 1e-6)
+    ref = pd.Series(values).groupby(bins).agg(['mean', 'min', 'max', 'count'])
+    std = pd.Series(values).groupby(bins).std(ddof=0)
+    assert np.allclose(out['times'], ref.index.values/24)
+    for stat in ('mean', 'min', 'max', 'count'):
+        assert np.allclose(out[stat], ref[stat].values, equal_nan=True)
+    assert np.allclose(out['std'], std.values, equal_nan=True)
+
+
+def test_resampleChunks_matches_resample():
+    times, values = _record()
+    whole = myDates.resample(times, values, width=1/24)
+    edges = [0, 1, 150, 151, 433, 1000]
+    chunks = [(times[a:b], values[a:b]) for a, b in zip(edges[:-1], edges[1:])]
+    parts = list(myDates.resampleChunks(chunks, width=1/24))
+    assert np.allclose(np.concatenate([t for t, _ in parts]), whole['times'])
+    for stat in ('mean', 'min', 'max', 'std', 'count'):
+        got = np.concatenate([r[0][stat] for _, r in parts])
+        assert np.allclose(got, whole[stat], equal_nan=True)
+
+
+def test_resample_short_input():
+    empty = myDates.resample(np.empty(0), np.empty((3, 0)))
+    assert empty['times'].shape == (0,) and empty['mean'].shape == (3, 0)
+
+    one = myDates.resample([40000 + 17/1440], np.array([[1.0], [np.nan]]))
+    assert np.allclose(one['times'], [40000])
+    assert np.allclose(one['mean'], [[1.0], [np.nan]], equal_nan=True)
+    assert np.array_equal(one['count'], [[1], [0]])
+    assert len(myDates.resample([40000.5], [1.0], partial=False)['times']) == 0
@@ -0,0 +1,236 @@
+import numpy as np
+import pytest
+
+from myPyPackages import myData, mySignal
+
+
+def test_KernelInterpolator_uses_great_circle_distances(dataRoot):
+    info = myData.getStationInfo()
+    gp = mySignal.KernelInterpolator(info, (30, 20), landOnly=False)
+    d_ss = myData.getStationIndex(info).distanceMatrix()
+    assert np.isclose(gp.length_scale, np.median(d_ss[np.triu_indices(len(info), 1)]))
+
+    zi, std = gp.predict(np.full(len(info), 7.5), return_std=True)
+    np.testing.assert_allclose(zi, 7.5)
+    assert ((std >= 0) & (std <= 1)).all()
+
+
+def test_filterChunks_matches_filterBank():
+    rng = np.random.default_rng(0)
+    t = np.arange(5000)/1440
+    values = 10 + np.sin(2*np.pi*t)[None, :] + 0.1*rng.standard_normal((3, 5000))
+    bands = ['diurnal', (0.5, 5)]
+    whole = mySignal.filterBank(values, bands, fs=1440, zero_phase=False)
+
+    edges = [0, 0, 1, 700, 701, 3000, 5000]
+    chunks = [(t[a:b], values[:, a:b]) for a, b in zip(edges[:-1], edges[1:])]
+    parts = list(mySignal.filterChunks(chunks, bands, fs=1440))
+    for band in bands:
+        got = np.concatenate([r[0][band] for _, r in parts], axis=-1)
+        np.testing.assert_allclose(got, whole[band], rtol=1e-9, atol=1e-9)
+
+
+def test_filterChunks_rejects_nans():
+    values = np.ones((2, 100))
+    values[1, 50] = np.nan
+    with pytest.raises(ValueError):
+        list(mySignal.filterChunks([(np.arange(100), values)], ['diurnal'], fs=1440))
+
+
+def test_harmonicFitChunks_matches_harmonicFit():
+    rng = np.random.default_rng(1)
+    t = 736330 + np.arange(3000)/1440
+    values = 5 + 2*np.cos(2*np.pi*t - 1)[None, :] + 0.1*rng.standard_normal((2, 3000))
+    values[0, 100:400] = np.nan
+    whole = mySignal.harmonicFit(t, values)
+    chunks = [(t[a:b], values[:, a:b]) for a, b in [(0, 0), (0, 1000), (1000, 3000)]]
+    part = mySignal.harmonicFitChunks(chunks)[0]
+    np.testing.assert_allclose(part['coef'], whole['coef'], rtol=1e-8, atol=1e-10)
+
+    with pytest.raises(ValueError):
+        mySignal.harmonicFitChunks([])
+
+
+def test_bandAverage_multitaper_coverage():
+    # white noise of unit variance has a one sided PSD of 2 at fs=1.
+    rng = np.random.default_rng(0)
+    NW = 4
+    hits = []
+    for trial in range(200):
+        mt = mySignal.multitaper(rng.standard_normal(4096), NW=NW)
+        keep = slice(2*NW, -1) # leaving out the bins the mean removal and the Nyquist halving bias.
+        bands = mySignal.bandAverage(mt['freqs'][keep], mt['psd'][keep], dof=mt['dof'], bandwidth=mt['bandwidth'])
+        hits.append((bands['lower'] <= 2) & (2 <= bands['upper']))
+    assert 0.93 <= np.mean(hits) <= 0.98
+    assert (bands['dof'] <= mt['dof']*bands['count']).all()
+
+
+def test_bandAverage_needs_positive_frequencies():
+    with pytest.raises(ValueError, match='no frequencies above 0'):
+        mySignal.bandAverage(np.array([0.0]), np.array([1.0]))
+    with pytest.raises(ValueError, match='no frequencies above 0'):
+        mySignal.bandAverage(np.array([]), np.zeros((2, 0)))
+
+
+def test_multitaper_parseval():
+    # the one sided PSD integrates to the variance of the series.
+    rng = np.random.default_rng(7)
+    x = 3*rng.standard_normal((4, 8192)) + 5
+    mt = mySignal.multitaper(x, fs=10.0)
+    df = mt['freqs'][1]
+    np.testing.assert_allclose(mt['psd'].sum(axis=-1)*df, x.var(axis=-1), rtol=0.03)
+    assert np.allclose(mt['psd'].mean(axis=-1), 2*9/10, rtol=0.05)
+
+
+def test_multitaper_single_taper():
+    tapers, ratios = mySignal.dpssTapers(256, NW=2, K=1)
+    assert tapers.shape == (1, 256) and ratios.shape == (1,)
+    assert np.isclose((tapers**2).sum(), 1)
+
+    x = np.random.default_rng(8).standard_normal((3, 256))
+    mt = mySignal.multitaper(x, NW=2, K=1)
+    assert mt['psd'].shape == (3, 129) and mt['dof'] == 2
+    one = mySignal.multitaper(x[1], NW=2, K=1)
+    assert one['psd'].shape == (129,)
+    np.testing.assert_allclose(one['psd'], mt['psd'][1])
+
+
+def test_cwtChunks_matches_cwt():
+    rng = np.random.default_rng(2)
+    dt = 1/24
+    t = np.arange(6000)*dt
+    x = 15 + 3*np.sin(2*np.pi*t)[None, :] + 0.1*np.cumsum(rng.standard_normal((2, 6000)), axis=1)
+    scales = mySignal.waveletScales(1000, dt, s0=4*dt, max_scale=2)
+    whole = mySignal.cwt(x, dt, scales)
+
+    edges = [0, 1, 700, 1500, 1501, 4000, 6000]
+    chunks = [(t[a:b], x[:, a:b]) for a, b in zip(edges[:-1], edges[1:])]
+    parts = list(mySignal.cwtChunks(chunks, dt, scales, means=[x.mean(axis=-1)]))
+    np.testing.assert_allclose(np.concatenate([times for times, _ in parts]), t)
+    power = np.concatenate([r[0]['power'] for _, r in parts], axis=-1)
+    assert (np.abs(power - whole['power']) <= 1e-6*whole['power'].max(axis=-1, keepdims=True)).all()
+    np.testing.assert_allclose(parts[0][1][0]['scales'], scales)
+
+    # the cone of influence only differs at periods longer than the largest scale.
+    coi = np.concatenate([r[0]['coi'] for _, r in parts])
+    longest = whole['periods'].max()
+    np.testing.assert_allclose(np.minimum(coi, longest), np.minimum(whole['coi'], longest))
+
+
+def _eofData(seed=3):
+    rng = np.random.default_rng(seed)
+    patterns = rng.standard_normal((3, 8))
+    amplitudes = rng.standard_normal((2000, 3))*[5, 2, 1]
+    data = 10 + amplitudes @ patterns + 0.1*rng.standard_normal((2000, 8))
+    data[[5, 700, 1999], [1, 3, 7]] = np.nan
+    return data
+
+
+def test_cwtChunks_default_scales():
+    # scales up to half the chunk length, the margin is longer than the chunks.
+    rng = np.random.default_rng(9)
+    dt = 1/24
+    t = np.arange(8000)*dt
+    x = 15 + 3*np.sin(2*np.pi*t)[None, :] + 0.3*np.cumsum(rng.standard_normal((2, 8000)), axis=1)
+    scales = mySignal.waveletScales(2000, dt)
+    whole = mySignal.cwt(x, dt, scales)
+
+    chunks = [(t[a:a + 2000], x[:, a:a + 2000]) for a in range(0, 8000, 2000)]
+    parts = list(mySignal.cwtChunks(chunks, dt, scales, means=[x.mean(axis=-1)]))
+    np.testing.assert_allclose(np.concatenate([times for times, _ in parts]), t)
+    power = np.concatenate([r[0]['power'] for _, r in parts], axis=-1)
+    error = np.abs(power - whole['power'])/whole['power'].max(axis=-1, keepdims=True)
+
+    outside = whole['periods'][:, None] < whole['coi'][None, :]
+    assert outside[-1].any()
+    assert error[:, outside].max() < 1e-3
+    assert error[:, scales > 4*dt].max() < 1e-6
+
+
+@pytest.mark.parametrize('scale', [False, True])
+def test_chunkedEOF_matches_EOF(scale):
+    data = _eofData()
+    whole = mySignal.EOF(data, n_modes=3, scale=scale)
+    chunks = [data[a:b] for a, b in [(0, 1), (1, 500), (500, 1337), (1337, 2000)]]
+    chunked = mySignal.chunkedEOF(chunks, n_modes=3, scale=whole['std'] if scale else None)
+
+    signs = np.sign((whole['modes']*chunked['modes']).sum(axis=1))
+    np.testing.assert_allclose(chunked['modes']*signs[:, None], whole['modes'], atol=1e-10)
+    np.testing.assert_allclose(chunked['variance'], whole['variance'], rtol=1e-10)
+    np.testing.assert_allclose(chunked['eigenvalues'], whole['eigenvalues'], rtol=1e-10)
+    np.testing.assert_allclose(chunked['mean'], whole['mean'], rtol=1e-12)
+    assert chunked['n'] == 1997
+
+
+def test_projectEOF_recovers_pcs():
+    data = _eofData()
+    eof = mySignal.EOF(data, n_modes=3)
+    np.testing.assert_allclose(mySignal.projectEOF(data, eof), eof['pcs'], atol=1e-9, equal_nan=True)
+    assert np.isnan(eof['pcs'][[5, 700, 1999]]).all()
+    assert eof['variance'].sum() > 0.99
+
+
+def test_crossValidate_matches_direct_leave_one_out(dataRoot):
+    from scipy import interpolate
+
+    info = myData.getStationInfo()
+    points = info[['long', 'lati']].values
+    rng = np.random.default_rng(4)
+    values = 10 + points[:, 0] - 2*points[:, 1] + rng.standard_normal((6, len(info)))
+    values[2, 4] = np.nan
+
+    idw = mySignal.crossValidate(values, info, 'idw')['predicted']
+    linear = mySignal.crossValidate(values, info, 'linear', workers=2)
+    for t in range(len(values)):
+        for j in range(len(info)):
+            others = np.flatnonzero((np.arange(len(info)) != j) & ~np.isnan(values[t]))
+            w = 1/((points[others] - points[j])**2).sum(axis=1)
+            assert np.isclose(idw[t, j], (w*values[t, others]).sum()/w.sum())
+            ref = interpolate.griddata(points[others], values[t, others], points[j][None, :], method='linear')[0]
+            np.testing.assert_allclose(linear['predicted'][t, j], ref, rtol=1e-10, equal_nan=True)
+
+    table = linear['table']
+    assert list(table.index) == list(info.station)
+    error = linear['predicted'] - values
+    count = (~np.isnan(error)).sum(axis=0)
+    np.testing.assert_array_equal(table['count'], count)
+    with np.errstate(invalid='ignore'):
+        np.testing.assert_allclose(table['rmse'], np.sqrt(np.nansum(error**2, axis=0)/count), equal_nan=True)
+
+
+def test_fitLapseRate_recovers_lapse_rate():
+    rng = np.random.default_rng(5)
+    elev = rng.uniform(0, 800, 12)
+    rates = np.array([0.004, 0.0065, 0.009, -0.002])
+    values = 10 + rng.standard_normal((4, 1)) - rates[:, None]*elev + 0.01*rng.standard_normal((4, 12))
+    values[1, 3] = np.nan
+
+    np.testing.assert_allclose(mySignal.fitLapseRate(values, elev, per_step=True), rates, atol=1e-4)
+    assert np.isclose(mySignal.fitLapseRate(values[[0, 0]], elev), mySignal.fitLapseRate(values[0], elev))
+    assert np.isclose(mySignal.fitLapseRate(values, elev), rates.mean(), atol=1e-4)
+
+
+@pytest.mark.parametrize('variable', ['temperature', 'pressure'])
+def test_toSeaLevel_fromSeaLevel_round_trip(variable):
+    rng = np.random.default_rng(6)
+    elev = rng.uniform(0, 800, 5)
+    values = (1000 if variable == 'pressure' else 10) + rng.standard_normal((5, 5))  # T == S
+    lapse = np.array([0.0065, 0.003, 0.0, -0.004, 0.01])
+    t0 = np.array([5.0, 10, 15, 20, 25])
+    kwargs = {'lapse_rate': lapse, 'temperature': t0}
+
+    sea = mySignal.toSeaLevel(values, elev, variable, **kwargs)
+    np.testing.assert_allclose(mySignal.fromSeaLevel(sea, elev, variable, **kwargs), values)
+    # the per time step arrays are applied row by row, not per station.
+    for t in range(5):
+        row = mySignal.toSeaLevel(values[t], elev, variable, lapse_rate=lapse[t], temperature=t0[t])
+        np.testing.assert_allclose(sea[t], row)
+
+    if variable == 'temperature':
+        np.testing.assert_allclose(sea, values + lapse[:, None]*elev)
+    else:
+        # hypsometric equation for the mean layer temperature, isothermal for 0 lapse rate.
+        tm = t0[:, None] + 273.15 - lapse[:, None]*elev/2
+        hyps = values*np.exp(9.80665*elev/(287.05*tm))
+        np.testing.assert_allclose(sea, hyps, rtol=1e-4)
+        assert not np.isclose(sea[1], mySignal.toSeaLevel(values[1], elev, variable, temperature=t0[1])).any()
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from myPyPackages import myStats
+
+
+def _record(seed=0):
+    rng = np.random.default_rng(seed)
+    times = 736330.5 + np.arange(0, 800, 1/24) # hourly from mid-2016 across two new years.
+    values = rng.standard_normal((len(times), 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return times, values
+
+
+@pytest.mark.parametrize('cycle', ['doy', 'hour', 'doy-hour'])
+def test_climatology_matches_pandas_groupby(cycle):
+    times, values = _record()
+    clim = myStats.climatology(times, values, dtype='min', cycle=cycle)
+
+    dates = pd.to_datetime(times - 719529, unit='D').round('min') # 719529 is 1970-01-01.
+    keys = {'doy': dates.dayofyear - 1, 'hour': dates.hour,
+            'doy-hour': (dates.dayofyear - 1)*24 + dates.hour}[cycle]
+    ref = pd.DataFrame(values).groupby(np.asarray(keys))
+    index = ref.mean().index.values
+    assert np.allclose(clim['mean'][index], ref.mean().values, equal_nan=True)
+    assert np.array_equal(clim['count'][index], ref.count().values)
+    assert not clim['count'][np.setdiff1d(np.arange(len(clim['count'])), index)].any()
+
+    anom = myStats.anomalies(times, values, clim=clim)
+    assert np.allclose(anom, values - ref.transform('mean').values, equal_nan=True)
+
+
+def test_climatology_checks_input():
+    times, values = _record()
+    with pytest.raises(ValueError):
+        myStats.climatology(times, values.T)
+    with pytest.raises(ValueError):
+        myStats.anomalies(times, np.nan_to_num(values).astype(np.int64), inplace=True)
+    with pytest.raises(ValueError):
+        myStats.anomalies(times, values.tolist(), inplace=True)
+
+
+@pytest.mark.parametrize('window, min_count', [(1, 1), (7, 1), (60, 40)])
+def test_rolling_matches_pandas(window, min_count):
+    _, values = _record()
+    values = values.T[:, :2000] + 100 # (station x time), offset to test the sums of squares.
+    stats = ('mean', 'var', 'std', 'min', 'max', 'count')
+    out = myStats.rolling(values, window, stats, min_count=min_count)
+
+    ref = pd.DataFrame(values.T).rolling(window, min_periods=min_count)
+    for stat in ('mean', 'var', 'std', 'min', 'max'):
+        np.testing.assert_allclose(out[stat], getattr(ref, stat)().values.T, rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(out['count'], pd.DataFrame(values.T).notna().rolling(window, min_periods=1).sum().values.T)
+
+
+def test_rollingChunks_matches_rolling():
+    _, values = _record()
+    values = values.T[:, :2000]
+    whole = myStats.rolling(values, 60, min_count=30)
+    edges = [0, 5, 70, 71, 1000, 2000]
+    chunks = [(np.arange(a, b), values[:, a:b]) for a, b in zip(edges[:-1], edges[1:])]
+    parts = list(myStats.rollingChunks(chunks, 60, min_count=30))
+    for stat in whole:
+        got = np.concatenate([r[0][stat] for _, r in parts], axis=-1)
+        np.testing.assert_allclose(got, whole[stat], rtol=1e-9, atol=1e-9)
+
+
+def test_surrogateTest_seed_reproducible_across_workers():
+    data = np.random.default_rng(3).standard_normal((3, 512))
+    one = myStats.surrogateTest(data, n_surrogates=120, batch_size=40, workers=1, seed=7)
+    two = myStats.surrogateTest(data, n_surrogates=120, batch_size=40, workers=2, seed=7)
+    for key in ('observed', 'lower', 'upper', 'pvalue', 'freqs'):
+        np.testing.assert_array_equal(one[key], two[key])
+
+
+@pytest.mark.parametrize('joint', [True, False])
+def test_surrogate_shapes(joint):
+    data = np.random.default_rng(4).standard_normal((3, 100))
+    assert myStats.blockBootstrap(data, 5, block_len=7, joint=joint, seed=0).shape == (5, 3, 100)
+    assert myStats.phaseRandomise(data, 5, joint=joint, seed=0).shape == (5, 3, 100)
+    assert myStats.blockBootstrap(data[0], 5, seed=0).shape == (5, 100)
+
+    welch = myStats.surrogateTest(data, n_surrogates=20, joint=joint, workers=1, seed=0)
+    assert welch['observed'].shape == welch['lower'].shape == welch['pvalue'].shape == (3, len(welch['freqs']))
+    corr = myStats.surrogateTest(data, 'corr', n_surrogates=20, joint=joint, workers=1, seed=0)
+    assert corr['observed'].shape == corr['upper'].shape == corr['pvalue'].shape == (3, 3)
+
+
+def test_surrogateTest_block_bootstrap_false_positives():
+    # white noise has no peaks, few frequencies should look significant.
+    data = np.random.default_rng(5).standard_normal((2, 2048))
+    out = myStats.surrogateTest(data, n_surrogates=200, workers=1, seed=1)
+    assert (out['pvalue'] < 0.05).mean() <= 0.05
+
+
+def test_surrogateTest_corr_null_coverage():
+    rng = np.random.default_rng(6)
+    upper = np.triu_indices(6, 1)
+    hits, pvalues = [], []
+    for trial in range(10):
+        out = myStats.surrogateTest(rng.standard_normal((6, 512)), 'corr', n_surrogates=200, workers=1, seed=trial)
+        hits.append(((out['lower'] <= out['observed']) & (out['observed'] <= out['upper']))[upper])
+        pvalues.append(out['pvalue'][upper])
+        assert np.isnan(np.diag(out['pvalue'])).all()
+    assert 0.9 <= np.mean(hits) <= 0.99
+    assert np.mean(np.array(pvalues) < 0.05) <= 0.1
+
+
+def test_surrogateTest_rejects_phase_welch():
+    with pytest.raises(ValueError):
+        myStats.surrogateTest(np.random.default_rng(0).standard_normal(256), 'welch', method='phase')
+
+
+def test_autocorrelation_matches_np_correlate():
+    rng = np.random.default_rng(10)
+    data = rng.standard_normal((3, 300)).cumsum(axis=1)
+    data[1, [5, 50, 51]] = np.nan
+    acf = myStats.autocorrelation(data, max_lag=40)
+    assert acf.shape == (3, 41)
+    for series, result in zip(data, acf):
+        x = np.nan_to_num(series - np.nanmean(series))
+        direct = np.correlate(x, x, mode='full')[len(x) - 1:]
+        np.testing.assert_allclose(result, direct[:41]/direct[0], atol=1e-12)
+    full = myStats.autocorrelation(data[0])
+    assert full.shape == (300,)
+    np.testing.assert_allclose(full[:41], acf[0], atol=1e-12)
+
+
+@pytest.mark.parametrize('method, rtol', [('ar1', 0.1), ('sum', 0.2)])
+def test_effectiveSampleSize_ar1(method, rtol):
+    # AR(1) series x[t] = phi*x[t-1] + noise have n(1 - phi)/(1 + phi) independent samples.
+    rng = np.random.default_rng(11)
+    n, phi = 20000, 0.8
+    noise = rng.standard_normal((4, n))
+    x = np.empty_like(noise)
+    x[:, 0] = noise[:, 0]/np.sqrt(1 - phi**2)
+    for t in range(1, n):
+        x[:, t] = phi*x[:, t - 1] + noise[:, t]
+
+    expected = n*(1 - phi)/(1 + phi)
+    np.testing.assert_allclose(myStats.effectiveSampleSize(x, method), expected, rtol=rtol)
+    np.testing.assert_allclose(myStats.integralTimeScale(x, 0.5, method), 0.5*(1 + phi)/(1 - phi), rtol=rtol)
+
+
+def test_StudentConfidenceInterval_small_N_EFF():
+    data = np.arange(10.0)
+    for n_eff in (1, 0.5):
+        lower, upper, t = myStats.StudentConfidenceInterval(data, N_EFF=n_eff)
+        assert np.isfinite([lower, upper, t]).all() and lower < data.mean() < upper
+    lower, upper, t = myStats.StudentConfidenceInterval(data)
+    assert np.isclose(t, 2.262157, atol=1e-6)